@@ -1 +1,2 @@
 # PYTHOX PACKAGE
+__version__ = "0.1.0"
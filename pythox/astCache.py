@@ -0,0 +1,120 @@
+# On-disk cache of parsed scripts, same idea as __pycache__/*.pyc.
+#
+# A cache file is MAGIC + sha256(version, source) + pickled list[Stmt]. Any
+# mismatch or unreadable file just counts as a miss, and the caller reparses.
+#
+# The python backend also caches its transpiled code objects, marshalled,
+# keyed on the interpreter's bytecode magic as well since marshal output is
+# only readable by the same CPython version.
+import hashlib
+import importlib.util
+import marshal
+import os
+import pickle
+import tempfile
+from types import CodeType
+
+from . import __version__
+from .stmt import Stmt
+
+# Bump whenever the layout of expr.py/stmt.py changes
+MAGIC = b"PXC\x03"
+# Bump whenever the generated Python code changes
+CODE_MAGIC = b"PXY\x03"
+CACHE_DIR = "__pycache__"
+
+
+def cache_path(script: str) -> str:
+    directory, name = os.path.split(os.path.abspath(script))
+    return os.path.join(directory, CACHE_DIR, f"{name}.pythox-{__version__}.pxc")
+
+
+def code_path(script: str) -> str:
+    directory, name = os.path.split(os.path.abspath(script))
+    return os.path.join(directory, CACHE_DIR, f"{name}.pythox-{__version__}.pxy")
+
+
+def source_key(source: str, *extra: bytes) -> bytes:
+    digest = hashlib.sha256(__version__.encode())
+    for part in extra:
+        digest.update(b"\0")
+        digest.update(part)
+    digest.update(b"\0")
+    digest.update(source.encode())
+    return digest.digest()
+
+
+def code_key(source: str, variant: str) -> bytes:
+    # variant tells apart code generated with different options
+    return source_key(source, importlib.util.MAGIC_NUMBER, variant.encode())
+
+
+def read(path: str, header: bytes) -> memoryview | None:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if not data.startswith(header):
+        return None
+    return memoryview(data)[len(header) :]
+
+
+def write(path: str, header: bytes, payload: bytes) -> bool:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and swap it in, so a concurrent run never
+        # reads half a cache file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header + payload)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        return False
+    return True
+
+
+def load(script: str, source: str) -> list[Stmt] | None:
+    data = read(cache_path(script), MAGIC + source_key(source))
+    if data is None:
+        return None
+    try:
+        statements = pickle.loads(data)
+    except Exception:
+        # Truncated or written by an incompatible build, treat as a miss
+        return None
+    if not isinstance(statements, list):
+        return None
+    return statements
+
+
+def store(script: str, source: str, statements: list[Stmt]) -> bool:
+    path = cache_path(script)
+    try:
+        payload = pickle.dumps(statements, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, RecursionError):
+        return False
+    return write(path, MAGIC + source_key(source), payload)
+
+
+def load_code(script: str, source: str, variant: str = "") -> CodeType | None:
+    data = read(code_path(script), CODE_MAGIC + code_key(source, variant))
+    if data is None:
+        return None
+    try:
+        code = marshal.loads(data)
+    except (EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(code, CodeType):
+        return None
+    return code
+
+
+def store_code(script: str, source: str, code: CodeType, variant: str = "") -> bool:
+    return write(
+        code_path(script), CODE_MAGIC + code_key(source, variant), marshal.dumps(code)
+    )
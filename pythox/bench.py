@@ -0,0 +1,313 @@
+import argparse
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from math import sqrt
+from pathlib import Path
+from statistics import fmean, stdev
+
+BENCHMARKS = Path(__file__).parent.parent / "tests" / "loxscripts" / "benchmark"
+# Lines of generated Lox run alongside the scripts unless --synthetic says
+SYNTHETIC_LINES = [10_000]
+# Seconds one run may take before the benchmark counts as skipped
+TIMEOUT = 120.0
+BASELINE_VERSION = 1
+# What scanning, parsing or running printed when the script couldn't run
+ERROR = re.compile(r"^(\[line \d+\] )?(Runtime)?Error")
+# Two-sided 95% critical values of Student's t for 1 to 30 degrees of
+# freedom, the normal distribution's beyond that
+T_CRITICAL = (
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+)  # fmt: skip
+
+
+def synthetic(lines: int) -> str:
+    """
+    Roughly `lines` lines of Lox, one small function and a call per 11.
+
+    Deterministic, and only uses what every backend runs, so it measures
+    scanning and parsing at scale with a short run at the end.
+    """
+    parts = ["var total = 0;\n"]
+    for i in range(max(1, lines // 11)):
+        parts.append(
+            f"fun f{i}(a, b) {{\n"
+            f"  var x = a * {i % 97} + b - a / 2;\n"
+            f"  if (x > {i % 89}) {{\n"
+            f"    x = x - 1;\n"
+            f"  }} else {{\n"
+            f"    x = x + 1;\n"
+            f"  }}\n"
+            f'  var s = "item" + "{i}";\n'
+            f"  return x;\n"
+            f"}}\n"
+            f"total = total + f{i}({i % 13}, 2);\n"
+        )
+    parts.append("print total;\n")
+    return "".join(parts)
+
+
+def significant(baseline: list[float], current: list[float]) -> bool:
+    """Welch's t-test: do the two means differ at the 95% level?"""
+    if len(baseline) < 2 or len(current) < 2:
+        return False
+    a = stdev(baseline) ** 2 / len(baseline)
+    b = stdev(current) ** 2 / len(current)
+    difference = abs(fmean(current) - fmean(baseline))
+    if a + b == 0:
+        return difference > 0
+    df = (a + b) ** 2 / (a * a / (len(baseline) - 1) + b * b / (len(current) - 1))
+    critical = T_CRITICAL[int(df) - 1] if int(df) <= len(T_CRITICAL) else 1.960
+    return difference / sqrt(a + b) > critical
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> dict[str, str]:
+    """Benchmark name -> verdict on its end-to-end time against the baseline."""
+    verdicts = {}
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None or before["status"] != "ok" or result["status"] != "ok":
+            verdicts[name] = "-"
+            continue
+        change = fmean(result["total"]) / fmean(before["total"]) - 1
+        if not significant(before["total"], result["total"]):
+            verdicts[name] = "same"
+        elif change > threshold:
+            verdicts[name] = "REGRESSED"
+        else:
+            verdicts[name] = "slower" if change > 0 else "faster"
+    return verdicts
+
+
+def measure(path: Path, backend: str, optimize: bool, timeout: float) -> dict:
+    """One run of the script in a fresh interpreter process."""
+    root = str(Path(__file__).parent.parent)
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        filter(None, (root, environment.get("PYTHONPATH")))
+    )
+    command = [sys.executable, "-m", "pythox.bench", "--child", str(path), backend]
+    if not optimize:
+        command.append("--no-optimize")
+    try:
+        process = subprocess.run(
+            command, capture_output=True, text=True, timeout=timeout, env=environment
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {timeout:g}s"}
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines() or ["exited with no output"]
+        return {"error": f"crashed: {lines[-1]}"}
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+def run(path: Path, repeat: int, warmup: int, **options) -> dict:
+    for _ in range(warmup):
+        sample = measure(path, **options)
+        if sample["error"] is not None:
+            return {"status": "skipped", "reason": sample["error"]}
+    samples = []
+    for _ in range(repeat):
+        sample = measure(path, **options)
+        if sample["error"] is not None:
+            return {"status": "skipped", "reason": sample["error"]}
+        samples.append(sample)
+    return {
+        "status": "ok",
+        "bytes": samples[0]["bytes"],
+        "tokens": samples[0]["tokens"],
+        "nodes": samples[0]["nodes"],
+        **{
+            phase: [sample[phase] for sample in samples]
+            for phase in ("scan", "parse", "interpret", "total")
+        },
+    }
+
+
+def row(name: str, result: dict, before: dict | None, verdict: str | None) -> str:
+    if result["status"] != "ok":
+        return f"{name:<24} skipped: {result['reason']}"
+    total = result["total"]
+    spread = stdev(total) if len(total) > 1 else 0.0
+    scan = result["bytes"] / fmean(result["scan"]) / 1e6
+    parse = result["nodes"] / fmean(result["parse"]) / 1e3
+    line = (
+        f"{name:<24} {fmean(total) * 1000:>10.1f} ± {spread * 1000:<7.1f}"
+        f" {scan:>8.2f} {parse:>10.1f}"
+    )
+    if verdict is not None:
+        if before is not None and before["status"] == "ok":
+            change = fmean(total) / fmean(before["total"]) - 1
+            line += f" {fmean(before['total']) * 1000:>10.1f} {change:>+8.1%}"
+        else:
+            line += f" {'-':>10} {'-':>8}"
+        line += f"  {verdict}"
+    return line
+
+
+def scripts(names: list[str]) -> list[Path]:
+    if not names:
+        return sorted(BENCHMARKS.glob("*.lox"))
+    paths = []
+    for name in names:
+        path = Path(name)
+        if not path.is_file():
+            path = BENCHMARKS / (name if name.endswith(".lox") else name + ".lox")
+        if not path.is_file():
+            raise SystemExit(f"No benchmark named {name!r}.")
+        paths.append(path)
+    return paths
+
+
+def positive(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def main(argv: list[str]) -> int:
+    from .pythox import BACKENDS
+
+    parser = argparse.ArgumentParser(
+        prog="pythox bench",
+        description="Time Lox scripts end to end, each run in a fresh process.",
+    )
+    parser.add_argument(
+        "scripts",
+        nargs="*",
+        help=f"names in {BENCHMARKS.name}/ or paths, all by default",
+    )
+    parser.add_argument("--repeat", type=positive, default=5, help="measured runs (5)")
+    parser.add_argument("--warmup", type=int, default=1, help="discarded runs (1)")
+    parser.add_argument(
+        "--backend", default="tree", choices=BACKENDS, help="execution engine (tree)"
+    )
+    parser.add_argument("--no-optimize", dest="optimize", action="store_false")
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        action="append",
+        metavar="LINES",
+        help=f"run generated programs this long too ({SYNTHETIC_LINES[0]}), 0 for none",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=TIMEOUT, help="seconds per run (120)"
+    )
+    parser.add_argument("--save", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="baseline to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="fail when a benchmark is significantly this much slower (0.10)",
+    )
+    options = parser.parse_args(argv)
+
+    baseline = None
+    if options.compare is not None:
+        with open(options.compare) as file:
+            baseline = json.load(file)
+        if baseline.get("backend") != options.backend:
+            print(
+                f"Warning: the baseline ran the {baseline.get('backend')} backend.",
+                file=sys.stderr,
+            )
+
+    results = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "backend": options.backend,
+        "optimize": options.optimize,
+        "benchmarks": {},
+    }
+    settings = dict(
+        repeat=options.repeat,
+        warmup=options.warmup,
+        backend=options.backend,
+        optimize=options.optimize,
+        timeout=options.timeout,
+    )
+    header = (
+        f"{'benchmark':<24} {'total ms':>10}   {'±':<7} {'scan MB/s':>8}"
+        f" {'parse kn/s':>10}"
+    )
+    if baseline is not None:
+        header += f" {'baseline':>10} {'change':>8}  verdict"
+    print(header, flush=True)
+
+    verdicts = {}
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [(path.stem, path) for path in scripts(options.scripts)]
+        for lines in options.synthetic or SYNTHETIC_LINES:
+            if lines > 0:
+                path = Path(directory) / f"synthetic_{lines}.lox"
+                path.write_text(synthetic(lines))
+                paths.append((path.stem, path))
+        for name, path in paths:
+            result = results["benchmarks"][name] = run(path, **settings)
+            before = verdict = None
+            if baseline is not None:
+                before = baseline["benchmarks"].get(name)
+                verdict = compare(
+                    baseline, {"benchmarks": {name: result}}, options.threshold
+                )[name]
+                verdicts[name] = verdict
+            print(row(name, result, before, verdict), flush=True)
+
+    if options.save is not None:
+        with open(options.save, "w") as file:
+            json.dump(results, file, indent=2)
+    regressed = [name for name, verdict in verdicts.items() if verdict == "REGRESSED"]
+    if regressed:
+        print(
+            f"{len(regressed)} regressed more than {options.threshold:.0%}: "
+            + ", ".join(regressed),
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def child(argv: list[str]) -> None:
+    # One measured run, the result goes to stdout as the last line of JSON
+    from .output import OutputSink
+    from .pythox import Pythox
+
+    path, backend, *flags = argv
+    source = Path(path).read_text()
+    printed = io.StringIO()
+    pythox = Pythox(backend=backend, optimize="--no-optimize" not in flags)
+    pythox.output = OutputSink(printed.write)
+    with redirect_stdout(printed):
+        stats = pythox.measure(source, traceMemory=False, countStatements=False)
+        pythox.output.flush()
+    lines = printed.getvalue().splitlines()
+    error = next((line for line in lines if ERROR.match(line)), None)
+    if error is None and pythox.hadError:
+        # Scan, parse and resolve errors, whatever they printed first
+        error = lines[0] if lines else "failed to compile"
+    phases = {phase.name: phase.wall for phase in stats.phases}
+    result = {
+        "error": error,
+        "bytes": len(source.encode()),
+        "tokens": stats.tokens,
+        "nodes": sum(stats.nodes.values()),
+        "scan": phases.get("scan", 0.0),
+        "parse": phases.get("parse", 0.0),
+        "interpret": phases.get("interpret", 0.0),
+        "total": sum(phases.values()),
+    }
+    print(json.dumps(result))
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--child"]:
+    child(sys.argv[2:])
@@ -0,0 +1,576 @@
+from array import array
+from dataclasses import fields
+from enum import IntEnum
+
+from .expr import *
+from .stmt import *
+from .ttoken import Token, TokenType
+
+
+class OpCode(IntEnum):
+    CONSTANT = 0
+    NIL = 1
+    TRUE = 2
+    FALSE = 3
+    POP = 4
+    EQUAL = 5
+    NOT_EQUAL = 6
+    GREATER = 7
+    GREATER_EQUAL = 8
+    LESS = 9
+    LESS_EQUAL = 10
+    ADD = 11
+    SUBTRACT = 12
+    MULTIPLY = 13
+    DIVIDE = 14
+    NOT = 15
+    NEGATE = 16
+    PRINT = 17
+    CONSTANT_LONG = 18
+    # Variables live in the Resolver's array frames, like the tree walker's:
+    # LOCAL ops index the innermost frame with a byte, OUTER ops follow a
+    # 16-bit depth of enclosing links to a 16-bit slot. GLOBAL ops take the
+    # GlobalSite.
+    GET_LOCAL = 19
+    SET_LOCAL = 20
+    GET_OUTER = 21
+    SET_OUTER = 22
+    GET_GLOBAL = 23
+    SET_GLOBAL = 24
+    DEFINE_GLOBAL = 25
+    BEGIN_BLOCK = 26
+    END_BLOCK = 27
+    # 16-bit offsets counting from after the operand, JUMP_IF_FALSE pops
+    # the condition
+    JUMP = 28
+    JUMP_IF_FALSE = 29
+    LOOP = 30
+    CALL = 31
+    RETURN = 32
+    CLOSURE = 33
+    CLASS = 34
+    GET_PROPERTY = 35
+    SET_PROPERTY = 36
+    SUPER = 37
+
+
+# Same limit as clox, a CONSTANT operand is a single byte. Function
+# chunks are held to it
+MAX_CONSTANTS = 256
+# CONSTANT_LONG takes a 24-bit operand, for big top-level scripts
+MAX_LONG_CONSTANTS = 1 << 24
+# LOCAL slots and argument counts are a byte, frame depths, OUTER slots,
+# block sizes and jumps 16 bits
+MAX_BYTE = 1 << 8
+MAX_SHORT = 1 << 16
+# clox's per-function limits, its locals and upvalues are indexed by a byte
+MAX_LOCALS = 256
+MAX_UPVALUES = 256
+
+# Ops followed by a byte, a 16-bit operand, two of them, or a 24-bit one
+# like CONSTANT_LONG's
+_BYTE_OPERAND = {OpCode.CONSTANT, OpCode.GET_LOCAL, OpCode.SET_LOCAL, OpCode.CALL}
+_SHORT_OPERAND = {
+    OpCode.BEGIN_BLOCK,
+    OpCode.JUMP,
+    OpCode.JUMP_IF_FALSE,
+    OpCode.LOOP,
+}
+_TWO_SHORTS = {OpCode.GET_OUTER, OpCode.SET_OUTER}
+_LONG_OPERAND = {
+    OpCode.GET_GLOBAL,
+    OpCode.SET_GLOBAL,
+    OpCode.DEFINE_GLOBAL,
+    OpCode.CLOSURE,
+    OpCode.CLASS,
+    OpCode.GET_PROPERTY,
+    OpCode.SET_PROPERTY,
+    OpCode.SUPER,
+}
+
+_BINARY_OPCODES: dict[TokenType, OpCode] = {
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+}
+
+_UNARY_OPCODES: dict[TokenType, OpCode] = {
+    TokenType.BANG: OpCode.NOT,
+    TokenType.MINUS: OpCode.NEGATE,
+}
+
+
+class Chunk:
+    """
+    Compiled bytecode: opcodes and operands in one byte array, a constant
+    pool, and the source line of every byte for error reporting.
+    """
+
+    __slots__ = ("code", "constants", "lines", "maxStack")
+
+    def __init__(self):
+        self.code = array("B")
+        # Literal values, plus whatever an op works on: sites, names,
+        # function and class templates
+        self.constants: list = []
+        self.lines = array("I")
+        # Deepest the value stack gets, worked out at compile time
+        self.maxStack: int = 0
+
+    def write(self, byte: int, line: int) -> None:
+        self.code.append(byte)
+        self.lines.append(line)
+
+    def addConstant(self, value) -> int:
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+    def operand(self, offset: int, size: int) -> int:
+        # Little-endian, like the VM reads them
+        return sum(self.code[offset + i] << 8 * i for i in range(size))
+
+    def disassemble(self) -> str:
+        lines = []
+        offset = 0
+        while offset < len(self.code):
+            op = OpCode(self.code[offset])
+            text = f"{offset:04} {self.lines[offset]:4} {op.name}"
+            if op is OpCode.CONSTANT:
+                index = self.code[offset + 1]
+                text += f" {index} '{self.constants[index]}'"
+                offset += 1
+            elif op is OpCode.CONSTANT_LONG:
+                index = self.operand(offset + 1, 3)
+                text += f" {index} '{self.constants[index]}'"
+                offset += 3
+            elif op in _BYTE_OPERAND:
+                text += f" {self.code[offset + 1]}"
+                offset += 1
+            elif op in _SHORT_OPERAND:
+                text += f" {self.operand(offset + 1, 2)}"
+                offset += 2
+            elif op in _TWO_SHORTS:
+                text += f" {self.operand(offset + 1, 2)} {self.operand(offset + 3, 2)}"
+                offset += 4
+            elif op in _LONG_OPERAND:
+                text += f" {self.operand(offset + 1, 3)}"
+                offset += 3
+            lines.append(text)
+            offset += 1
+        return "\n".join(lines)
+
+
+class CompileError(Exception):
+    def __init__(self, line: int, message: str, token: Token | None = None):
+        super().__init__(message)
+        self.line = line
+        self.token = token
+
+    def __str__(self):
+        if self.token is None:
+            return f"[line {self.line}] Error: {self.args[0]}"
+        # Same shape as the parser's and resolver's errors
+        return f"[line {self.line}] Error at '{self.token.lexeme}': {self.args[0]}"
+
+
+def nodeToken(node, last: bool = False) -> Token | None:
+    """First token in a node's subtree, or its last, None if it has none."""
+    pending = [node]
+    while pending:
+        item = pending.pop()
+        if item.__class__ is Token:
+            return item
+        if item.__class__ is tuple or item.__class__ is list:
+            pending.extend(item if last else reversed(item))
+        elif hasattr(item, "__dataclass_fields__"):
+            children = [getattr(item, f.name) for f in fields(item)]
+            pending.extend(children if last else reversed(children))
+    return None
+
+
+def firstLine(node) -> int | None:
+    """Line of the first token in a node's subtree, None if it has none."""
+    token = nodeToken(node)
+    return None if token is None else token.line
+
+
+class FunctionTemplate:
+    """What CLOSURE makes a LoxFunction from, besides the frame it closes over."""
+
+    __slots__ = ("declaration", "size", "captured", "chunk", "isInitializer")
+
+    def __init__(
+        self,
+        declaration: Function,
+        size: int,
+        captured: bool,
+        chunk: "Chunk",
+        isInitializer: bool = False,
+    ):
+        self.declaration = declaration
+        self.size = size
+        self.captured = captured
+        self.chunk = chunk
+        self.isInitializer = isInitializer
+
+    def __str__(self):
+        return f"<fn {self.declaration.name.lexeme}>"
+
+
+class ClassTemplate:
+    """What CLASS makes a LoxClass from, the superclass comes off the stack."""
+
+    __slots__ = ("name", "superclass", "methods")
+
+    def __init__(
+        self, name: str, superclass: Token | None, methods: list[FunctionTemplate]
+    ):
+        self.name = name
+        # The superclass name, for the error when it isn't a class
+        self.superclass = superclass
+        self.methods = methods
+
+    def __str__(self):
+        return self.name
+
+
+class Compiler:
+    """
+    Single pass from the AST to a Chunk.
+
+    Variables are located with the tables `interpreter`'s Resolver filled
+    in, so the statements have to be resolved first. Without an
+    interpreter only expressions over literals compile. Each function body
+    gets a Chunk of its own, with a Compiler of its own that holds it to
+    clox's limits on constants, locals and closure variables.
+    """
+
+    def __init__(
+        self,
+        chunk: Chunk | None = None,
+        maxConstants: int = MAX_CONSTANTS,
+        interpreter=None,
+        enclosing: "Compiler | None" = None,
+    ):
+        self.chunk: Chunk = chunk if chunk is not None else Chunk()
+        self.maxConstants: int = maxConstants
+        self.interpreter = interpreter
+        # Compiler of the enclosing function, None at the top level
+        self.enclosing = enclosing
+        # Nodes without a token get the line of the last token seen
+        self.line: int = 1
+        self.depth: int = 0
+        # Locals declared so far in each of the function's frames,
+        # innermost last. Like clox, slot zero is taken before any frame
+        # is: by `this` in methods, by the callee otherwise
+        self.frames: list[int] = [1]
+        # Variables of enclosing functions this one uses, clox's upvalues,
+        # as (compiler, frame, slot)
+        self.upvalues: set[tuple] = set()
+
+    def compile(self, statements: list[Stmt]) -> Chunk:
+        for stmt in statements:
+            self.statement(stmt)
+        return self.chunk
+
+    def statement(self, stmt: Stmt) -> None:
+        line = firstLine(stmt)
+        if line is not None:
+            self.line = line
+        match stmt:
+            case Expression(expression):
+                self.expression(expression)
+                self.emit(OpCode.POP, -1)
+            case Print(expression):
+                self.expression(expression)
+                self.emit(OpCode.PRINT, -1)
+            case Var(name, initializer):
+                if initializer is None:
+                    self.emit(OpCode.NIL, 1)
+                else:
+                    self.expression(initializer)
+                self.line = name.line
+                self.define(stmt, name)
+            case Block(statements):
+                size = self.resolved().frames[id(stmt)][1]
+                if size >= MAX_SHORT:
+                    raise CompileError(self.line, "Too many locals.")
+                self.emit(OpCode.BEGIN_BLOCK, 0)
+                self.writeOperand(size, 2)
+                self.frames.append(0)
+                for inner in statements:
+                    self.statement(inner)
+                self.frames.pop()
+                self.emit(OpCode.END_BLOCK, 0)
+            case If(condition, thenBranch, elseBranch):
+                self.expression(condition)
+                skipThen = self.emitJump(OpCode.JUMP_IF_FALSE, -1)
+                self.statement(thenBranch)
+                if elseBranch is None:
+                    self.patchJump(skipThen)
+                else:
+                    skipElse = self.emitJump(OpCode.JUMP, 0)
+                    self.patchJump(skipThen)
+                    self.statement(elseBranch)
+                    self.patchJump(skipElse)
+            case While(condition, body):
+                start = len(self.chunk.code)
+                self.expression(condition)
+                exit = self.emitJump(OpCode.JUMP_IF_FALSE, -1)
+                self.statement(body)
+                # clox reports it at the body's closing '}'
+                self.emitLoop(start, nodeToken(body, last=True))
+                self.patchJump(exit)
+            case Return(keyword, value):
+                if value is None:
+                    self.emit(OpCode.NIL, 1)
+                else:
+                    self.expression(value)
+                self.line = keyword.line
+                self.emit(OpCode.RETURN, -1)
+            case Function(name, _, _):
+                template = self.function(stmt)
+                self.emitLong(OpCode.CLOSURE, self.makeConstant(template), 1)
+                self.line = name.line
+                self.define(stmt, name)
+            case Class(name, superclass, methods):
+                if superclass is not None:
+                    self.expression(superclass)
+                    # The methods close over the frame holding `super`
+                    self.frames.append(1)
+                template = ClassTemplate(
+                    name.lexeme,
+                    None if superclass is None else superclass.name,
+                    [
+                        self.function(method, method.name.lexeme == "init")
+                        for method in methods
+                    ],
+                )
+                if superclass is not None:
+                    self.frames.pop()
+                self.line = name.line
+                effect = 1 if superclass is None else 0
+                self.emitLong(OpCode.CLASS, self.makeConstant(template), effect)
+                self.define(stmt, name)
+            case _:
+                raise CompileError(
+                    firstLine(stmt) or self.line,
+                    f"Can't compile {type(stmt).__name__}.",
+                )
+
+    def function(
+        self, stmt: Function, isInitializer: bool = False
+    ) -> FunctionTemplate:
+        _, size, captured = self.resolved().functions[id(stmt)]
+        # Function chunks get clox's constant limit, whatever the script's is
+        compiler = Compiler(interpreter=self.interpreter, enclosing=self)
+        compiler.frames[0] += len(stmt.params)
+        compiler.line = stmt.name.line
+        compiler.compile(stmt.body)
+        # Falling off the end returns nil, init() its `this` all the same
+        compiler.emit(OpCode.NIL, 1)
+        compiler.emit(OpCode.RETURN, -1)
+        return FunctionTemplate(stmt, size, captured, compiler.chunk, isInitializer)
+
+    def define(self, stmt: Var | Function | Class, name: Token) -> None:
+        local = self.resolved().slots.get(id(stmt))
+        if local is None:
+            self.emitLong(OpCode.DEFINE_GLOBAL, self.makeConstant(name.lexeme), -1)
+        else:
+            self.frames[-1] += 1
+            if sum(self.frames) > MAX_LOCALS:
+                raise CompileError(
+                    name.line, "Too many local variables in function.", name
+                )
+            self.slot(OpCode.SET_LOCAL, OpCode.SET_OUTER, 0, local[1], 0)
+            self.emit(OpCode.POP, -1)
+
+    def expression(self, expr: Expr) -> None:
+        match expr:
+            case Literal(value):
+                if value is None:
+                    self.emit(OpCode.NIL, 1)
+                elif value is True:
+                    self.emit(OpCode.TRUE, 1)
+                elif value is False:
+                    self.emit(OpCode.FALSE, 1)
+                else:
+                    self.emitConstant(value, expr.token)
+
+            case Grouping(expression):
+                self.expression(expression)
+
+            case Unary(operator, right):
+                self.expression(right)
+                self.line = operator.line
+                self.emit(_UNARY_OPCODES[operator.tType], 0)
+
+            case Binary(left, operator, right):
+                self.expression(left)
+                self.expression(right)
+                self.line = operator.line
+                self.emit(_BINARY_OPCODES[operator.tType], -1)
+
+            case Variable(name) | This(name):
+                self.line = name.line
+                self.variable(
+                    expr, OpCode.GET_LOCAL, OpCode.GET_OUTER, OpCode.GET_GLOBAL, 1
+                )
+
+            case Assign(name, value):
+                self.expression(value)
+                self.line = name.line
+                self.variable(
+                    expr, OpCode.SET_LOCAL, OpCode.SET_OUTER, OpCode.SET_GLOBAL, 0
+                )
+
+            case Call(callee, paren, arguments):
+                self.expression(callee)
+                for argument in arguments:
+                    self.expression(argument)
+                self.line = paren.line
+                self.emitByte(OpCode.CALL, len(arguments), -len(arguments))
+
+            case Get(object, name):
+                self.expression(object)
+                self.line = name.line
+                site = self.resolved().sites[id(expr)]
+                self.emitLong(OpCode.GET_PROPERTY, self.makeConstant(site), 0)
+
+            case Set(object, name, value):
+                self.expression(object)
+                self.expression(value)
+                self.line = name.line
+                site = self.resolved().sites[id(expr)]
+                self.emitLong(OpCode.SET_PROPERTY, self.makeConstant(site), -1)
+
+            case Super(keyword):
+                self.line = keyword.line
+                # `super` is slot 1 of its frame, past the enclosing link
+                self.capture(self.resolved().sites[id(expr)].depth, 1, keyword)
+                self.emitLong(OpCode.SUPER, self.makeConstant(expr), 1)
+
+            case _:
+                raise CompileError(
+                    firstLine(expr) or self.line,
+                    f"Can't compile {type(expr).__name__}.",
+                )
+
+    def variable(
+        self, expr: Expr, local: OpCode, outer: OpCode, global_: OpCode, effect: int
+    ) -> None:
+        site = self.resolved().sites.get(id(expr))
+        if site is None or site.__class__ is not tuple:
+            # A GlobalSite caches the variable's cell for the op
+            if site is None:
+                raise CompileError(self.line, "Unresolved variable.")
+            self.emitLong(global_, self.makeConstant(site), effect)
+            return
+        _, depth, slot = site
+        # The name, or `this`, is the node's first token
+        self.capture(depth, slot, nodeToken(expr))
+        self.slot(local, outer, depth, slot, effect)
+
+    def capture(self, depth: int, slot: int, token: Token) -> None:
+        """
+        Counts a variable of an enclosing function against the closure
+        variable limit of every function in between, the way clox threads
+        an upvalue through each of them.
+        """
+        compiler = self
+        between = []
+        while depth >= len(compiler.frames):
+            if compiler.enclosing is None:
+                return
+            depth -= len(compiler.frames)
+            between.append(compiler)
+            compiler = compiler.enclosing
+        variable = (compiler, len(compiler.frames) - 1 - depth, slot)
+        for function in between:
+            function.upvalues.add(variable)
+            if len(function.upvalues) > MAX_UPVALUES:
+                raise CompileError(
+                    token.line, "Too many closure variables in function.", token
+                )
+
+    def slot(
+        self, local: OpCode, outer: OpCode, depth: int, slot: int, effect: int
+    ) -> None:
+        if depth == 0 and slot < MAX_BYTE:
+            self.emitByte(local, slot, effect)
+            return
+        if depth >= MAX_SHORT or slot >= MAX_SHORT:
+            raise CompileError(self.line, "Too many nested scopes or locals.")
+        self.emit(outer, effect)
+        self.writeOperand(depth, 2)
+        self.writeOperand(slot, 2)
+
+    def resolved(self):
+        if self.interpreter is None:
+            raise CompileError(self.line, "Can't compile unresolved statements.")
+        return self.interpreter
+
+    def emit(self, op: OpCode, stackEffect: int) -> None:
+        self.chunk.write(op, self.line)
+        self.depth += stackEffect
+        if self.depth > self.chunk.maxStack:
+            self.chunk.maxStack = self.depth
+
+    def emitByte(self, op: OpCode, operand: int, stackEffect: int) -> None:
+        if operand >= MAX_BYTE:
+            raise CompileError(self.line, "Too many arguments.")
+        self.emit(op, stackEffect)
+        self.chunk.write(operand, self.line)
+
+    def emitLong(self, op: OpCode, operand: int, stackEffect: int) -> None:
+        self.emit(op, stackEffect)
+        self.writeOperand(operand, 3)
+
+    def writeOperand(self, operand: int, size: int) -> None:
+        for shift in range(0, 8 * size, 8):
+            self.chunk.write(operand >> shift & 0xFF, self.line)
+
+    def emitJump(self, op: OpCode, stackEffect: int) -> int:
+        # Offset patched once the target is known
+        self.emit(op, stackEffect)
+        self.writeOperand(0, 2)
+        return len(self.chunk.code) - 2
+
+    def patchJump(self, operand: int) -> None:
+        jump = len(self.chunk.code) - operand - 2
+        if jump >= MAX_SHORT:
+            raise CompileError(self.line, "Too much code to jump over.")
+        self.chunk.code[operand] = jump & 0xFF
+        self.chunk.code[operand + 1] = jump >> 8
+
+    def emitLoop(self, start: int, token: Token | None = None) -> None:
+        # Back from after LOOP's own operand to the condition
+        jump = len(self.chunk.code) + 3 - start
+        if jump >= MAX_SHORT:
+            line = self.line if token is None else token.line
+            raise CompileError(line, "Loop body too large.", token)
+        self.emit(OpCode.LOOP, 0)
+        self.writeOperand(jump, 2)
+
+    def makeConstant(self, value, token: Token | None = None) -> int:
+        # Names, sites and templates count against the limit too, like
+        # clox's identifier constants
+        if len(self.chunk.constants) >= self.maxConstants:
+            line = self.line if token is None else token.line
+            raise CompileError(line, "Too many constants in one chunk.", token)
+        return self.chunk.addConstant(value)
+
+    def emitConstant(self, value: float | str, token: Token | None = None) -> None:
+        index = self.makeConstant(value, token)
+        if index < MAX_CONSTANTS:
+            self.emit(OpCode.CONSTANT, 1)
+            self.chunk.write(index, self.line)
+            return
+        self.emitLong(OpCode.CONSTANT_LONG, index, 1)
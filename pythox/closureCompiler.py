@@ -0,0 +1,578 @@
+from functools import partial
+from types import CodeType
+from typing import Callable
+
+from .expr import *
+from .stmt import *
+from .ttoken import TokenType
+from .interpreter import (
+    RETURN,
+    BoundMethod,
+    GlobalSite,
+    Interpreter,
+    LoxClass,
+    LoxFunction,
+    LoxInstance,
+    RuntimeError_,
+)
+from .rope import STRINGS, concat
+
+
+def runAll(statements: tuple[tuple[Stmt, Callable], ...]):
+    # A compiled function body. Each closure comes paired with its
+    # statement, the profiler reads the line being run off `stmt`.
+    for stmt, run in statements:
+        if run() is not None:
+            return RETURN
+    return None
+
+
+def runBlock(
+    interpreter: Interpreter, size: int, statements: tuple[tuple[Stmt, Callable], ...]
+):
+    frame = [None] * size
+    previous = frame[0] = interpreter.environment
+    try:
+        interpreter.environment = frame
+        for stmt, run in statements:
+            if run() is not None:
+                return RETURN
+        return None
+    finally:
+        interpreter.environment = previous
+
+
+class ClosureCompiler:
+    """
+    Turns AST nodes into nests of Python closures, one per node.
+
+    Everything the Resolver worked out is read once at compile time: a
+    variable's frame depth and slot, a block's frame size, the site a
+    global or property caches into. The operator is resolved once too, so
+    running a node is just calling its closure; no structural match, no
+    side table or handler lookup. Function bodies are compiled with their
+    declaration and run by Interpreter.call() through the LoxFunction's
+    `compiled`. The closures mirror Interpreter.evaluate/execute exactly,
+    including the error messages and the token the error is reported on.
+    """
+
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+
+    def statements(self, statements: list[Stmt]) -> tuple[tuple[Stmt, Callable], ...]:
+        return tuple((stmt, self.statement(stmt)) for stmt in statements)
+
+    def statement(self, stmt: Stmt) -> Callable[[], object]:
+        # Each closure returns RETURN when a Return ran and None otherwise,
+        # like execute(). Every one is defined right here, STATEMENT_CODES
+        # collects them for sys.monitoring.
+        interpreter = self.interpreter
+        match stmt:
+            case Expression(expression):
+                evaluate = self.expression(expression)
+
+                def expressionStatement():
+                    evaluate()
+
+                return expressionStatement
+
+            case Print(expression):
+                evaluate = self.expression(expression)
+                stringify = interpreter.stringify
+
+                def printStatement():
+                    # Looked up per call, the writer may be swapped out
+                    interpreter.output_writer(stringify(evaluate()) + "\n")
+
+                return printStatement
+
+            case Var(name, initializer):
+                evaluate = None
+                if initializer is not None:
+                    evaluate = self.expression(initializer)
+                local = interpreter.slots.get(id(stmt))
+                if local is None:
+                    defineGlobal = interpreter.defineGlobal
+                    lexeme = name.lexeme
+
+                    def globalVar():
+                        defineGlobal(lexeme, None if evaluate is None else evaluate())
+
+                    return globalVar
+                slot = local[1]
+
+                def localVar():
+                    value = None if evaluate is None else evaluate()
+                    interpreter.environment[slot] = value
+
+                return localVar
+
+            case Block(statements):
+                size = interpreter.frames[id(stmt)][1]
+                return partial(runBlock, interpreter, size, self.statements(statements))
+
+            case If(condition, thenBranch, elseBranch):
+                test = self.expression(condition)
+                then = self.statement(thenBranch)
+                orElse = None
+                if elseBranch is not None:
+                    orElse = self.statement(elseBranch)
+
+                def ifStatement():
+                    value = test()
+                    if value is not None and value is not False:
+                        return then()
+                    if orElse is not None:
+                        return orElse()
+                    return None
+
+                return ifStatement
+
+            case While(condition, body):
+                test = self.expression(condition)
+                run = self.statement(body)
+
+                def whileStatement():
+                    while (value := test()) is not None and value is not False:
+                        if run() is not None:
+                            return RETURN
+                    return None
+
+                return whileStatement
+
+            case Return(_, value):
+                evaluate = None if value is None else self.expression(value)
+
+                def returnStatement():
+                    interpreter.returnValue = None if evaluate is None else evaluate()
+                    return RETURN
+
+                return returnStatement
+
+            case Function(name, _, _):
+                make = self.function(stmt)
+                define = self.define(stmt, name)
+
+                def functionStatement():
+                    define(make(interpreter.environment))
+
+                return functionStatement
+
+            case Class(name, superclassExpr, methods):
+                superclass = None
+                if superclassExpr is not None:
+                    superclass = self.expression(superclassExpr)
+                makers = [
+                    (
+                        method.name.lexeme,
+                        self.function(method, method.name.lexeme == "init"),
+                    )
+                    for method in methods
+                ]
+                define = self.define(stmt, name)
+                lexeme = name.lexeme
+
+                def classStatement():
+                    parent = None
+                    closure = interpreter.environment
+                    if superclass is not None:
+                        parent = superclass()
+                        if parent.__class__ is not LoxClass:
+                            raise RuntimeError_(
+                                superclassExpr.name, "Superclass must be a class."
+                            )
+                        closure = [closure, parent]
+                    define(
+                        LoxClass(
+                            lexeme,
+                            parent,
+                            {method: make(closure) for method, make in makers},
+                        )
+                    )
+
+                return classStatement
+
+        # No Python frame between run() and execute(), so statement counts
+        # see it as the top-level statement it is
+        return partial(interpreter.execute, stmt)
+
+    def function(
+        self, stmt: Function, isInitializer: bool = False
+    ) -> Callable[[list | None], LoxFunction]:
+        # Compiles the body once, returns what makes a LoxFunction of it
+        # closing over a given frame
+        _, size, captured = self.interpreter.functions[id(stmt)]
+        body = partial(runAll, self.statements(stmt.body))
+
+        def make(closure: list | None) -> LoxFunction:
+            return LoxFunction(
+                stmt, closure, size, None if captured else [], isInitializer, body
+            )
+
+        return make
+
+    def define(self, stmt: Var | Function | Class, name: Token) -> Callable:
+        local = self.interpreter.slots.get(id(stmt))
+        if local is None:
+            return partial(self.interpreter.defineGlobal, name.lexeme)
+        slot = local[1]
+        interpreter = self.interpreter
+
+        def defineLocal(value):
+            interpreter.environment[slot] = value
+
+        return defineLocal
+
+    def expression(self, expr: Expr) -> Callable[[], object]:
+        interpreter = self.interpreter
+        match expr:
+            case Literal(value):
+                return lambda: value
+
+            case Grouping(expression):
+                return self.expression(expression)
+
+            case Unary(operator, right):
+                return self.unary(operator, self.expression(right))
+
+            case Binary(left, operator, right):
+                return self.binary(
+                    operator, self.expression(left), self.expression(right)
+                )
+
+            case Variable(name) | This(name):
+                return self.variable(expr, name)
+
+            case Assign(name, value):
+                return self.assign(expr, name, self.expression(value))
+
+            case Call(callee, paren, arguments):
+                return self.call(expr, callee, paren, arguments)
+
+            case Get(object, name):
+                return self.get(expr, self.expression(object))
+
+            case Set(object, name, value):
+                return self.set(expr, self.expression(object), self.expression(value))
+
+            case Super():
+                superMethod = interpreter.superMethod
+                return lambda: BoundMethod(*superMethod(expr))
+
+        # Not supported by the tree walker either, defer to it
+        evaluate = interpreter.evaluate
+        return lambda: evaluate(expr)
+
+    def variable(self, expr: Variable | This, name: Token) -> Callable[[], object]:
+        interpreter = self.interpreter
+        site = interpreter.sites.get(id(expr))
+        if site.__class__ is GlobalSite:
+            globalCell = interpreter.globalCell
+
+            def globalVariable():
+                cell = site.cell
+                if cell is None:
+                    cell = globalCell(site, name)
+                return cell.value
+
+            return globalVariable
+        if site is None:
+            # Never resolved, e.g. compiled outside interpret()
+            return partial(interpreter.lookUpGlobal, name)
+        _, depth, slot = site
+        if depth == 0:
+            return lambda: interpreter.environment[slot]
+        if depth == 1:
+            return lambda: interpreter.environment[0][slot]
+
+        def outerVariable():
+            frame = interpreter.environment
+            for _ in range(depth):
+                frame = frame[0]
+            return frame[slot]
+
+        return outerVariable
+
+    def assign(
+        self, expr: Assign, name: Token, evaluate: Callable
+    ) -> Callable[[], object]:
+        interpreter = self.interpreter
+        site = interpreter.sites.get(id(expr))
+        if site.__class__ is GlobalSite:
+            globalCell = interpreter.globalCell
+
+            def assignGlobal():
+                value = evaluate()
+                cell = site.cell
+                if cell is None:
+                    cell = globalCell(site, name)
+                cell.value = value
+                return value
+
+            return assignGlobal
+        if site is None:
+
+            def assignUnresolved():
+                value = evaluate()
+                interpreter.lookUpGlobal(name)
+                interpreter.globals[name.lexeme].value = value
+                return value
+
+            return assignUnresolved
+        _, depth, slot = site
+
+        def assignLocal():
+            value = evaluate()
+            frame = interpreter.environment
+            for _ in range(depth):
+                frame = frame[0]
+            frame[slot] = value
+            return value
+
+        return assignLocal
+
+    def call(
+        self, expr: Call, callee: Expr, paren: Token, arguments: list[Expr]
+    ) -> Callable[[], object]:
+        interpreter = self.interpreter
+        argumentClosures = tuple(self.expression(argument) for argument in arguments)
+        count = len(argumentClosures)
+        callFunction = interpreter.call
+        callValue = interpreter.callValue
+
+        if callee.__class__ is Super:
+            superMethod = interpreter.superMethod
+            callMethod = interpreter.callMethod
+
+            def callSuper():
+                receiver, method = superMethod(callee)
+                arguments = [argument() for argument in argumentClosures]
+                return callMethod(receiver, method, arguments, paren)
+
+            return callSuper
+
+        if callee.__class__ is Get:
+            # obj.method(args) calls the cached method with obj as `this`,
+            # no BoundMethod in between
+            receiverClosure = self.expression(callee.object)
+            site = interpreter.sites.get(id(callee))
+            getProperty = interpreter.getProperty
+
+            def callProperty():
+                receiver = receiverClosure()
+                if (
+                    site is not None
+                    and receiver.__class__ is LoxInstance
+                    and receiver.shape is site.shape
+                ):
+                    method = site.method
+                    if method is None:
+                        function = receiver.values[site.slot]
+                    elif method.arity == count:
+                        pool = method.pool
+                        frame = pool.pop() if pool else method.frame()
+                        frame[1] = receiver
+                        index = 2
+                        for argument in argumentClosures:
+                            frame[index] = argument()
+                            index += 1
+                        return callFunction(method, frame, paren)
+                    else:
+                        function = BoundMethod(receiver, method)
+                else:
+                    function = getProperty(callee, receiver)
+                return callValue(
+                    function, [argument() for argument in argumentClosures], paren
+                )
+
+            return callProperty
+
+        calleeClosure = self.expression(callee)
+
+        def callExpression():
+            function = calleeClosure()
+            # Same fast path as evaluate(), arguments go straight into a
+            # pooled frame
+            if function.__class__ is LoxFunction and function.arity == count:
+                pool = function.pool
+                frame = pool.pop() if pool else function.frame()
+                index = 1
+                for argument in argumentClosures:
+                    frame[index] = argument()
+                    index += 1
+                return callFunction(function, frame, paren)
+            return callValue(
+                function, [argument() for argument in argumentClosures], paren
+            )
+
+        return callExpression
+
+    def get(self, expr: Get, object: Callable) -> Callable[[], object]:
+        site = self.interpreter.sites.get(id(expr))
+        getProperty = self.interpreter.getProperty
+        if site is None:
+            return lambda: getProperty(expr, object())
+
+        def getExpression():
+            instance = object()
+            if instance.__class__ is LoxInstance and instance.shape is site.shape:
+                if site.method is None:
+                    return instance.values[site.slot]
+                return BoundMethod(instance, site.method)
+            return getProperty(expr, instance)
+
+        return getExpression
+
+    def set(
+        self, expr: Set, object: Callable, evaluate: Callable
+    ) -> Callable[[], object]:
+        site = self.interpreter.sites.get(id(expr))
+        setProperty = self.interpreter.setProperty
+        name = expr.name
+
+        def setExpression():
+            instance = object()
+            if instance.__class__ is not LoxInstance:
+                raise RuntimeError_(name, "Only instances have fields.")
+            value = evaluate()
+            if site is not None and instance.shape is site.shape:
+                if site.next is None:
+                    instance.values[site.slot] = value
+                else:
+                    instance.shape = site.next
+                    instance.values.append(value)
+                return value
+            setProperty(expr, instance, value)
+            return value
+
+        return setExpression
+
+    def unary(self, operator: Token, right: Callable) -> Callable[[], object]:
+        match operator.tType:
+            case TokenType.MINUS:
+                return lambda: -float(right())
+            case TokenType.BANG:
+                isTruthy = self.interpreter.isTruthy
+                return lambda: not isTruthy(right())
+
+        raise AssertionError("Unreachable: unexpected unary operator")
+
+    def binary(
+        self, operator: Token, left: Callable, right: Callable
+    ) -> Callable[[], object]:
+        match operator.tType:
+            case TokenType.PLUS:
+
+                def plus():
+                    a = left()
+                    b = right()
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a + b
+                    if isinstance(a, STRINGS) and isinstance(b, STRINGS):
+                        return concat(a, b)
+                    raise RuntimeError_(
+                        operator, "Operands must be two numbers or two strings"
+                    )
+
+                return plus
+
+            case TokenType.MINUS:
+
+                def minus():
+                    a = left()
+                    b = right()
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a - b
+                    raise RuntimeError_(operator, "Operands must be numbers.")
+
+                return minus
+
+            case TokenType.STAR:
+
+                def star():
+                    a = left()
+                    b = right()
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a * b
+                    raise RuntimeError_(operator, "Operands must be numbers.")
+
+                return star
+
+            case TokenType.SLASH:
+
+                def slash():
+                    a = left()
+                    b = right()
+                    if isinstance(a, float) and isinstance(b, float):
+                        if b == 0.0:
+                            raise RuntimeError_(operator, "Division by zero.")
+                        return a / b
+                    raise RuntimeError_(operator, "Operands must be numbers.")
+
+                return slash
+
+            case TokenType.GREATER:
+
+                def greater():
+                    a = left()
+                    b = right()
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a > b
+                    raise RuntimeError_(operator, "Operands must be numbers.")
+
+                return greater
+
+            case TokenType.GREATER_EQUAL:
+
+                def greaterEqual():
+                    a = left()
+                    b = right()
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a >= b
+                    raise RuntimeError_(operator, "Operands must be numbers.")
+
+                return greaterEqual
+
+            case TokenType.LESS:
+
+                def less():
+                    a = left()
+                    b = right()
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a < b
+                    raise RuntimeError_(operator, "Operands must be numbers.")
+
+                return less
+
+            case TokenType.LESS_EQUAL:
+
+                def lessEqual():
+                    a = left()
+                    b = right()
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a <= b
+                    raise RuntimeError_(operator, "Operands must be numbers.")
+
+                return lessEqual
+
+            case TokenType.EQUAL_EQUAL:
+                isEqual = self.interpreter.isEqual
+                return lambda: isEqual(left(), right())
+
+            case TokenType.BANG_EQUAL:
+                isEqual = self.interpreter.isEqual
+                return lambda: not isEqual(left(), right())
+
+        raise AssertionError("Unreachable: unexpected binary operator")
+
+
+# Code of every closure that runs one statement, so sys.monitoring can
+# count them. A Block runs as runBlock, its partial has no frame of its own.
+STATEMENT_CODES = frozenset(
+    {
+        const
+        for const in ClosureCompiler.statement.__code__.co_consts
+        if isinstance(const, CodeType)
+    }
+    | {runBlock.__code__}
+)
@@ -20,6 +20,19 @@ class Binary(Expr):
     right: Expr
 
 
+@dataclass(frozen=True, slots=True)
+class Call(Expr):
+    callee: Expr
+    paren: Token
+    arguments: list[Expr]
+
+
+@dataclass(frozen=True, slots=True)
+class Get(Expr):
+    object: Expr
+    name: Token
+
+
 @dataclass(frozen=True, slots=True)
 class Grouping(Expr):
     expression: Expr
@@ -29,6 +42,8 @@ class Grouping(Expr):
 class Literal(Expr):
     # Hmmm should we use object?
     value: float | str | bool | None
+    # Where it came from, for compile errors. None once folded or desugared
+    token: Token | None = None
 
 
 @dataclass(frozen=True, slots=True)
@@ -38,6 +53,24 @@ class Logical(Expr):
     right: Expr
 
 
+@dataclass(frozen=True, slots=True)
+class Set(Expr):
+    object: Expr
+    name: Token
+    value: Expr
+
+
+@dataclass(frozen=True, slots=True)
+class Super(Expr):
+    keyword: Token
+    method: Token
+
+
+@dataclass(frozen=True, slots=True)
+class This(Expr):
+    keyword: Token
+
+
 @dataclass(frozen=True, slots=True)
 class Unary(Expr):
     operator: Token
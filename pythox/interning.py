@@ -0,0 +1,67 @@
+import sys
+
+# The table is swept for dead strings when it grows past this, or past
+# twice what survived the last sweep
+INTERN_MIN = 1024
+
+
+def _refcounts(strings: dict[str, str]) -> dict[str, int]:
+    getrefcount = sys.getrefcount
+    return {text: getrefcount(text) for text in strings}
+
+
+def _tableOnly() -> int:
+    # What _refcounts reports for a string nothing but its table holds.
+    # Measured rather than hardcoded, the references the table, the loop
+    # and getrefcount add between them differ between CPython versions.
+    probe = "".join(["pythox", "-probe"])
+    strings = {probe: probe}
+    del probe
+    return next(iter(_refcounts(strings).values()))
+
+
+# A string reported above this is used outside the table
+TABLE_ONLY = _tableOnly()
+
+
+class InternTable:
+    """
+    One canonical object per distinct Lox string.
+
+    The scanner interns identifiers and string literals, concat() interns
+    the strings it builds, so two equal strings are almost always the same
+    object and isEqual can answer with an `is`. Python strs can't be weakly
+    referenced, so the table is weak by sweeping: once it doubles, strings
+    nothing outside the table refers to any more are dropped.
+    """
+
+    __slots__ = ("strings", "limit")
+
+    def __init__(self, limit: int = INTERN_MIN):
+        self.strings: dict[str, str] = {}
+        self.limit = limit
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, text: str) -> str:
+        strings = self.strings
+        canonical = strings.get(text)
+        if canonical is None:
+            if len(strings) >= self.limit:
+                self.sweep()
+                strings = self.strings
+            strings[text] = canonical = text
+        return canonical
+
+    def sweep(self) -> None:
+        self.strings = {
+            text: text
+            for text, count in _refcounts(self.strings).items()
+            if count > TABLE_ONLY
+        }
+        self.limit = max(INTERN_MIN, 2 * len(self.strings))
+
+
+STRING_TABLE = InternTable()
+intern = STRING_TABLE.intern
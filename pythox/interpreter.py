@@ -1,20 +1,527 @@
 import sys
+from dataclasses import fields
+from functools import partial
+from time import perf_counter
+from typing import Callable, Iterable
 
 from .expr import *
 from .stmt import *
+from .resolver import Resolver
+from .output import OutputSink
+from .rope import STRINGS, Rope, concat
 from .ttoken import TokenType
 
 
+# Executions of a Binary site before it specializes on its operand types
+QUICKEN_AFTER = 4
+# Deoptimizations after which a site stays on the generic path for good
+MAX_DEOPTS = 2
+
+# Returned by a specialized handler whose type guard failed
+_DEOPT = object()
+
+# Returned by execute() when a Return ran, the value is in returnValue.
+# Every other statement completes with None.
+RETURN = object()
+
+# Lox calls that can be active at once before "Stack overflow."
+MAX_DEPTH = 1024
+# Python frames a Lox call can take: call(), execute() and evaluate() plus
+# nested statements and, without explicitStack, nested expressions.
+# interpret() raises Python's recursion limit to fit maxDepth calls.
+FRAMES_PER_CALL = 24
+
+# Continuations on explicitStack mode's work stack
+_UNARY, _BINARY, _ASSIGN, _GET, _SET_OBJECT, _SET, _CALL_GET, _CALL = range(8)
+
+
+class GlobalCell:
+    """Storage for one global, created once when the name is first defined."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class GlobalSite:
+    """
+    Inline cache for a Variable/Assign that resolved to a global.
+
+    Cells are never removed, so once a site has found its cell it keeps it.
+    A site that found nothing remembers the globals version it looked at
+    and only probes the table again after a new global was defined.
+    """
+
+    __slots__ = ("node", "cell", "version")
+
+    def __init__(self, node: Expr):
+        # Keeps node alive so its id isn't reused while the site exists
+        self.node = node
+        self.cell: GlobalCell | None = None
+        self.version: int = -1
+
+
+class LoxFunction:
+    """
+    A function value: its declaration plus the frame it closes over.
+
+    Calls write their arguments straight into a frame laid out by the
+    Resolver, [closure, param 0, ..., local 0, ...]. Frames that no
+    closure can capture go back on `pool` when the call returns and are
+    reused by the next one, recursion just grows the pool to its depth.
+    When a backend compiled the body, `compiled` holds it: the closure
+    the ClosureCompiler made, which call() runs in place of walking
+    `body`, or the Chunk the VM runs.
+    """
+
+    __slots__ = (
+        "declaration",
+        "body",
+        "closure",
+        "arity",
+        "size",
+        "pool",
+        "isInitializer",
+        "compiled",
+    )
+
+    def __init__(
+        self,
+        declaration: Function,
+        closure: list | None,
+        size: int,
+        pool,
+        isInitializer: bool = False,
+        compiled=None,
+    ):
+        self.declaration = declaration
+        self.body = declaration.body
+        self.closure = closure
+        self.arity: int = len(declaration.params)
+        self.size = size
+        # None when the frame may outlive the call
+        self.pool: list[list] | None = pool
+        # init() hands back `this` whatever its body returns
+        self.isInitializer = isInitializer
+        # A closure returning RETURN like execute(), or a VM Chunk
+        self.compiled = compiled
+
+    def frame(self) -> list:
+        frame = [None] * self.size
+        frame[0] = self.closure
+        return frame
+
+    def __str__(self):
+        return f"<fn {self.declaration.name.lexeme}>"
+
+
+class BoundMethod:
+    """A method read off an instance, `this` goes in its frame's slot 0."""
+
+    __slots__ = ("receiver", "method")
+
+    def __init__(self, receiver: "LoxInstance", method: LoxFunction):
+        self.receiver = receiver
+        self.method = method
+
+    def __str__(self):
+        return str(self.method)
+
+
+class NativeFunction:
+    """
+    A Python callable exposed to Lox as a global.
+
+    Calls check the declared arity and then call `function` straight with
+    the argument values, no frame or environment is set up. Strings come
+    in as str, ropes included, and an int result goes back as a Lox
+    number. Anything the callable raises is reported as a runtime error
+    at the call.
+    """
+
+    __slots__ = ("name", "arity", "function")
+
+    def __init__(self, name: str, arity: int, function: Callable):
+        self.name = name
+        self.arity = arity
+        self.function = function
+
+    def __str__(self):
+        return "<native fn>"
+
+
+# Defined in every interpreter, before the natives it's constructed with.
+# clock() is seconds on a monotonic clock, for timing.
+NATIVES = (NativeFunction("clock", 0, perf_counter),)
+
+
+class Shape:
+    """
+    Hidden class: which slot of an instance's values holds each field.
+
+    Shapes are immutable and shared. Adding a field moves an instance to
+    the child shape for that name, created once and then found in
+    `transitions`, so instances whose fields were set in the same order
+    end up with the same shape.
+    """
+
+    __slots__ = ("fields", "transitions")
+
+    def __init__(self, fields: dict[str, int]):
+        self.fields = fields
+        self.transitions: dict[str, Shape] = {}
+
+    def adding(self, name: str) -> "Shape":
+        shape = self.transitions.get(name)
+        if shape is None:
+            shape = Shape({**self.fields, name: len(self.fields)})
+            self.transitions[name] = shape
+        return shape
+
+
+class LoxClass:
+    __slots__ = ("name", "superclass", "methods", "shape")
+
+    def __init__(
+        self,
+        name: str,
+        superclass: "LoxClass | None",
+        methods: dict[str, LoxFunction],
+    ):
+        self.name = name
+        self.superclass = superclass
+        # Flattened when the class is defined: inherited methods first,
+        # overridden by the class's own, so a lookup never walks the chain
+        self.methods = methods
+        if superclass is not None:
+            self.methods = {**superclass.methods, **methods}
+        # Root of this class's shape tree, every instance starts here
+        self.shape = Shape({})
+
+    def __str__(self):
+        return self.name
+
+
+class LoxInstance:
+    __slots__ = ("klass", "shape", "values")
+
+    def __init__(self, klass: LoxClass):
+        self.klass = klass
+        self.shape = klass.shape
+        # Field values in shape order
+        self.values: list = []
+
+    def __str__(self):
+        return f"{self.klass.name} instance"
+
+
+class PropertySite:
+    """
+    Monomorphic inline cache for a Get/Set, keyed on the instance's shape.
+
+    A Get hit reads values[slot] directly, or binds `method` when the
+    name was a method. Shapes belong to one class, so the shape alone
+    decides which. A Set hit either stores to values[slot] or, when
+    `next` is set, appends the new field and moves the instance to
+    `next`, which is how constructors add their fields. A miss does the
+    full lookup and caches whatever shape it saw last.
+    """
+
+    __slots__ = ("node", "shape", "slot", "method", "next")
+
+    def __init__(self, node: Expr):
+        # Keeps node alive so its id isn't reused while the site exists
+        self.node = node
+        self.shape: Shape | None = None
+        self.slot: int = 0
+        self.method: LoxFunction | None = None
+        self.next: Shape | None = None
+
+
+class SuperSite:
+    """
+    A resolved `super.method`: how far out the `super` frame is, plus the
+    method found for the superclass it held last time.
+
+    The superclass is fixed when the class is defined, so each site
+    resolves its method once. Method tables never change afterwards.
+    """
+
+    __slots__ = ("node", "depth", "superclass", "method")
+
+    def __init__(self, node: Expr, depth: int):
+        # Keeps node alive so its id isn't reused while the site exists
+        self.node = node
+        self.depth = depth
+        self.superclass: LoxClass | None = None
+        self.method: LoxFunction | None = None
+
+
+class BinarySite(Binary):
+    """
+    A Binary node that records the operand types it sees.
+
+    Once the same type pair shows up QUICKEN_AFTER times in a row, `fast`
+    is set to a handler specialized for it.
+    """
+
+    __slots__ = ("kind", "hits", "deopts", "fast")
+    # Binary is frozen, the feedback slots get updated in place
+    __setattr__ = object.__setattr__
+
+    def __init__(self, left: Expr, operator: Token, right: Expr):
+        super().__init__(left, operator, right)
+        self.kind: type | None = None
+        self.hits: int = 0
+        self.deopts: int = 0
+        self.fast = None
+
+
+def quicken(node):
+    """Copy of the tree with every Binary swapped for a BinarySite."""
+    match node:
+        case Expression(expression):
+            return Expression(quicken(expression))
+        case Print(expression):
+            return Print(quicken(expression))
+        case Var(name, initializer):
+            if initializer is None:
+                return node
+            return Var(name, quicken(initializer))
+        case Block(statements, brace):
+            return Block([quicken(stmt) for stmt in statements], brace)
+        case While(condition, body):
+            return While(quicken(condition), quicken(body))
+        case If(condition, thenBranch, elseBranch):
+            return If(
+                quicken(condition),
+                quicken(thenBranch),
+                None if elseBranch is None else quicken(elseBranch),
+            )
+        case Function(name, params, body):
+            return Function(name, params, [quicken(stmt) for stmt in body])
+        case Return(keyword, value):
+            if value is None:
+                return node
+            return Return(keyword, quicken(value))
+        case Call(callee, paren, arguments):
+            return Call(quicken(callee), paren, [quicken(arg) for arg in arguments])
+        case Class(name, superclass, methods):
+            return Class(name, superclass, [quicken(method) for method in methods])
+        case Get(object, name):
+            return Get(quicken(object), name)
+        case Set(object, name, value):
+            return Set(quicken(object), name, quicken(value))
+        case Assign(name, value):
+            return Assign(name, quicken(value))
+        case Grouping(expression):
+            return Grouping(quicken(expression))
+        case Unary(operator, right):
+            return Unary(operator, quicken(right))
+        case Binary(left, operator, right):
+            return BinarySite(quicken(left), operator, quicken(right))
+    return node
+
+
 class Interpreter:
-    def __init__(self, output_writer=sys.stdout.write):
+    def __init__(
+        self,
+        output_writer=sys.stdout.write,
+        closures: bool = False,
+        quicken: bool = False,
+        explicitStack: bool = False,
+        maxDepth: int = MAX_DEPTH,
+        natives: Iterable[NativeFunction] = (),
+    ):
         self.output_writer = output_writer
+        self.hadError: bool = False
+        self.globals: dict[str, GlobalCell] = {}
+        # Bumped whenever a new name is added to globals
+        self.globalsVersion: int = 0
+        for native in (*NATIVES, *natives):
+            self.defineGlobal(native.name, native)
+        # Innermost block's frame: [enclosing frame, slot 0, slot 1, ...],
+        # None at the top level
+        self.environment: list | None = None
+        # Filled in by the Resolver, keyed by id(node). Each entry keeps its
+        # node alive so the id can't be reused by another one.
+        # Variable/Assign/This -> (node, depth, frame index) for a local,
+        # GlobalSite for a global. Get/Set -> PropertySite, Super -> SuperSite.
+        self.sites: dict[
+            int, tuple[Expr, int, int] | GlobalSite | PropertySite | SuperSite
+        ] = {}
+        # Var declaring a local -> (node, frame index)
+        self.slots: dict[int, tuple[Stmt, int]] = {}
+        # Block -> (node, frame length)
+        self.frames: dict[int, tuple[Stmt, int]] = {}
+        # Function -> (node, frame length, whether a closure can capture
+        # the frame)
+        self.functions: dict[int, tuple[Function, int, bool]] = {}
+        # Set by a Return just before execute() hands back RETURN
+        self.returnValue = None
+        # Lox calls in progress, and how many may be
+        self.depth: int = 0
+        self.maxDepth: int = maxDepth
+        # Evaluate expressions with a work stack instead of recursion, so
+        # nesting depth is only limited by memory
+        if explicitStack:
+            self.evaluateTree = self.evaluate
+            self.evaluate = self.evaluateExplicit
+        # Run statements through quicken() first, so their Binary sites
+        # specialize on the operand types they see
+        self.quicken: bool = quicken
+        # id(stmt) -> (stmt, quickened copy), so sites keep their feedback
+        # when the same statements are interpreted again
+        self._quickened: dict[int, tuple[Stmt, Stmt]] = {}
+        self.specialized: int = 0
+        self.deoptimized: int = 0
+        # Compile each statement into nested closures before running it
+        # instead of walking the tree
+        self.compiler = None
+        if closures:
+            from .closureCompiler import ClosureCompiler
+
+            self.compiler = ClosureCompiler(self)
+            # id(stmt) -> (stmt, closure), keeps stmt alive so ids stay unique
+            self._compiled: dict[int, tuple[Stmt, object]] = {}
 
     def interpret(self, statements: list[Stmt]):
+        # Backends override interpretStatements(), this wraps every one of
+        # them so maxDepth Lox calls fit on the Python stack
+        recursionLimit = sys.getrecursionlimit()
+        sys.setrecursionlimit(recursionLimit + self.maxDepth * FRAMES_PER_CALL)
+        try:
+            self.interpretStatements(statements)
+        except RecursionError:
+            # Nested too deeply outside any call, nothing to point at
+            self.flushOutput()
+            print("RuntimeError: Stack overflow.")
+        finally:
+            sys.setrecursionlimit(recursionLimit)
+
+    def interpretStatements(self, statements: list[Stmt]):
+        if self.quicken:
+            # Resolved after quickening, the copies are what runs
+            if isinstance(statements, list):
+                statements = [self.quickened(stmt) for stmt in statements]
+            else:
+                statements = map(self.quickened, statements)
         try:
+            if isinstance(statements, list):
+                # A resolution error anywhere means nothing runs
+                if not self.resolveAll(statements):
+                    return
+                for stmt in statements:
+                    self.run(stmt)
+                return
+            failed = False
             for stmt in statements:
-                self.execute(stmt)
+                # After an error the rest is still resolved, so all its
+                # errors get reported, but nothing more runs
+                if not self.resolveAll([stmt]):
+                    failed = True
+                elif not failed:
+                    self.run(stmt)
+                # Streamed statements show their output as they finish
+                self.flushOutput()
         except RuntimeError_ as e:
+            self.flushOutput()
             print(e)
+        finally:
+            self.flushOutput()
+
+    def flushOutput(self):
+        # Only an OutputSink's write holds output back
+        sink = getattr(self.output_writer, "__self__", None)
+        if sink.__class__ is OutputSink:
+            sink.flush()
+
+    def resolveAll(self, statements: list[Stmt]) -> bool:
+        resolver = Resolver(self)
+        resolver.resolve(statements)
+        if resolver.hadError:
+            self.hadError = True
+        return not resolver.hadError
+
+    # Resolver callbacks, frame index 0 holds the enclosing frame
+    def resolve(self, expr: Expr, depth: int, slot: int):
+        if expr.__class__ is Super:
+            # `super` is always slot 0 of its frame
+            site = self.sites.get(id(expr))
+            if site is None or site.depth != depth:
+                self.sites[id(expr)] = SuperSite(expr, depth)
+            return
+        self.sites[id(expr)] = (expr, depth, slot + 1)
+
+    def resolveGlobal(self, expr: Expr):
+        # Keep what the site already cached when statements are rerun
+        if id(expr) not in self.sites:
+            self.sites[id(expr)] = GlobalSite(expr)
+
+    def resolveDeclaration(self, stmt: Stmt, slot: int):
+        self.slots[id(stmt)] = (stmt, slot + 1)
+
+    def resolveFrame(self, block: Stmt, size: int):
+        self.frames[id(block)] = (block, size + 1)
+
+    def resolveFunction(self, function: Function, size: int, captured: bool):
+        self.functions[id(function)] = (function, size + 1, captured)
+
+    def resolveProperty(self, expr: Get | Set):
+        if id(expr) not in self.sites:
+            self.sites[id(expr)] = PropertySite(expr)
+
+    def run(self, stmt: Stmt):
+        if self.compiler is not None:
+            self.compiled(stmt)()
+        else:
+            self.execute(stmt)
+
+    def compiled(self, stmt: Stmt):
+        # Compiling costs a few tree walks, so hang on to the result for
+        # statements that get interpreted again
+        entry = self._compiled.get(id(stmt))
+        if entry is None:
+            entry = self._compiled[id(stmt)] = (stmt, self.compiler.statement(stmt))
+        return entry[1]
+
+    def quickened(self, stmt: Stmt) -> Stmt:
+        entry = self._quickened.get(id(stmt))
+        if entry is None:
+            entry = self._quickened[id(stmt)] = (stmt, quicken(stmt))
+        return entry[1]
+
+    def forget(self, stmt: Stmt) -> None:
+        # Drops a top-level statement's side table entries once it has run,
+        # so a REPL session only holds on to what can still run again: the
+        # bodies of the functions and methods it declared keep theirs
+        entry = self._quickened.pop(id(stmt), None)
+        if entry is not None:
+            # The copy is what got resolved and run
+            stmt = entry[1]
+        if self.compiler is not None:
+            self._compiled.pop(id(stmt), None)
+        pending = [stmt]
+        while pending:
+            node = pending.pop()
+            if node.__class__ is list:
+                pending.extend(node)
+                continue
+            if not hasattr(node, "__dataclass_fields__"):
+                continue
+            key = id(node)
+            self.sites.pop(key, None)
+            self.slots.pop(key, None)
+            self.frames.pop(key, None)
+            self.functions.pop(key, None)
+            match node:
+                case Function():
+                    continue
+                case Class(_, superclass, _):
+                    pending.append(superclass)
+                    continue
+            pending.extend(getattr(node, field.name) for field in fields(node))
 
     def execute(self, stmt: Stmt):
         match stmt:
@@ -25,74 +532,604 @@ class Interpreter:
                 value = self.evaluate(stmt.expression)
                 self.output_writer(self.stringify(value) + "\n")
                 return None
+            case Var():
+                value = None
+                if stmt.initializer is not None:
+                    value = self.evaluate(stmt.initializer)
+                self.define(stmt, stmt.name, value)
+                return None
+            case Block():
+                frame = [None] * self.frames[id(stmt)][1]
+                frame[0] = self.environment
+                return self.executeBlock(stmt.statements, frame)
+            case If():
+                if self.isTruthy(self.evaluate(stmt.condition)):
+                    return self.execute(stmt.thenBranch)
+                if stmt.elseBranch is not None:
+                    return self.execute(stmt.elseBranch)
+                return None
+            case While():
+                while self.isTruthy(self.evaluate(stmt.condition)):
+                    if self.execute(stmt.body) is not None:
+                        return RETURN
+                return None
+            case Return():
+                value = stmt.value
+                self.returnValue = None if value is None else self.evaluate(value)
+                return RETURN
+            case Function():
+                self.define(stmt, stmt.name, self.function(stmt))
+                return None
+            case Class():
+                superclass = None
+                closure = self.environment
+                if stmt.superclass is not None:
+                    superclass = self.evaluate(stmt.superclass)
+                    if superclass.__class__ is not LoxClass:
+                        raise RuntimeError_(
+                            stmt.superclass.name, "Superclass must be a class."
+                        )
+                    closure = [closure, superclass]
+                methods = {
+                    method.name.lexeme: self.function(
+                        method, method.name.lexeme == "init", closure
+                    )
+                    for method in stmt.methods
+                }
+                klass = LoxClass(stmt.name.lexeme, superclass, methods)
+                self.define(stmt, stmt.name, klass)
+                return None
+
+    def function(
+        self, stmt: Function, isInitializer: bool = False, closure: list | None = None
+    ) -> LoxFunction:
+        _, size, captured = self.functions[id(stmt)]
+        if closure is None:
+            closure = self.environment
+        return LoxFunction(
+            stmt, closure, size, None if captured else [], isInitializer
+        )
+
+    def define(self, stmt: Var | Function, name: Token, value) -> None:
+        local = self.slots.get(id(stmt))
+        if local is None:
+            self.defineGlobal(name.lexeme, value)
+        else:
+            self.environment[local[1]] = value
+
+    def executeBlock(self, statements: list[Stmt], frame: list):
+        previous = self.environment
+        try:
+            self.environment = frame
+            for stmt in statements:
+                if self.execute(stmt) is not None:
+                    return RETURN
+            return None
+        finally:
+            self.environment = previous
+
+    def call(self, function: LoxFunction, frame: list, paren: Token):
+        # Frame already holds the arguments. Returns come back as RETURN
+        # from execute(), not as an exception unwinding the Python stack.
+        previous = self.environment
+        self.environment = frame
+        self.depth += 1
+        try:
+            if self.depth > self.maxDepth:
+                raise RuntimeError_(paren, "Stack overflow.")
+            compiled = function.compiled
+            if compiled is None:
+                for stmt in function.body:
+                    if self.execute(stmt) is not None:
+                        if function.isInitializer:
+                            return frame[1]
+                        return self.returnValue
+            elif compiled() is not None:
+                if function.isInitializer:
+                    return frame[1]
+                return self.returnValue
+            if function.isInitializer:
+                return frame[1]
+            return None
+        except RecursionError:
+            # Python ran out first, report it on the call that hit it
+            raise RuntimeError_(paren, "Stack overflow.") from None
+        finally:
+            self.depth -= 1
+            self.environment = previous
+            if function.pool is not None:
+                function.pool.append(frame)
 
     def evaluate(self, expr: Expr):
         match expr:
             case Literal():
                 return expr.value
 
+            case Variable() | This():
+                site = self.sites.get(id(expr))
+                if site.__class__ is GlobalSite:
+                    if site.cell is not None:
+                        return site.cell.value
+                    return self.globalCell(site, expr.name).value
+                if site is None:
+                    # Never resolved, e.g. evaluated outside interpret()
+                    return self.lookUpGlobal(expr.name)
+                frame = self.environment
+                for _ in range(site[1]):
+                    frame = frame[0]
+                return frame[site[2]]
+
+            case Call():
+                callee = expr.callee
+                if callee.__class__ is Get:
+                    # obj.method(args) calls the cached method with obj as
+                    # `this`, no BoundMethod in between
+                    receiver = self.evaluate(callee.object)
+                    site = self.sites.get(id(callee))
+                    if (
+                        site is not None
+                        and receiver.__class__ is LoxInstance
+                        and receiver.shape is site.shape
+                    ):
+                        if site.method is not None:
+                            return self.invoke(receiver, site.method, expr)
+                        callee = receiver.values[site.slot]
+                    else:
+                        callee = self.getProperty(callee, receiver)
+                elif callee.__class__ is Super:
+                    receiver, method = self.superMethod(callee)
+                    return self.invoke(receiver, method, expr)
+                else:
+                    callee = self.evaluate(callee)
+                arguments = expr.arguments
+                # Comparing counts first keeps the mismatch case, and its
+                # argument list, off the common path
+                if (
+                    callee.__class__ is LoxFunction
+                    and len(arguments) == callee.arity
+                ):
+                    pool = callee.pool
+                    frame = pool.pop() if pool else callee.frame()
+                    index = 1
+                    for argument in arguments:
+                        frame[index] = self.evaluate(argument)
+                        index += 1
+                    return self.call(callee, frame, expr.paren)
+                if (
+                    callee.__class__ is NativeFunction
+                    and len(arguments) == callee.arity
+                ):
+                    return self.callNative(
+                        callee,
+                        [self.evaluate(argument) for argument in arguments],
+                        expr.paren,
+                    )
+                return self.callSlow(callee, expr)
+
+            case Get():
+                instance = self.evaluate(expr.object)
+                site = self.sites.get(id(expr))
+                if (
+                    site is not None
+                    and instance.__class__ is LoxInstance
+                    and instance.shape is site.shape
+                ):
+                    if site.method is None:
+                        return instance.values[site.slot]
+                    return BoundMethod(instance, site.method)
+                return self.getProperty(expr, instance)
+
+            case Set():
+                instance = self.evaluate(expr.object)
+                if instance.__class__ is not LoxInstance:
+                    raise RuntimeError_(expr.name, "Only instances have fields.")
+                value = self.evaluate(expr.value)
+                site = self.sites.get(id(expr))
+                if site is not None and instance.shape is site.shape:
+                    if site.next is None:
+                        instance.values[site.slot] = value
+                    else:
+                        instance.shape = site.next
+                        instance.values.append(value)
+                    return value
+                self.setProperty(expr, instance, value)
+                return value
+
+            case Super():
+                return BoundMethod(*self.superMethod(expr))
+
             case Grouping():
                 return self.evaluate(expr.expression)
 
             case Unary():
                 right = self.evaluate(expr.right)
-
-                match expr.operator.tType:
-                    case TokenType.BANG:
-                        return not self.isTruthy(right)
-                    case TokenType.MINUS:
-                        return -float(right)
-                # Should never come here
-                print("reached unreachable branch in Unary during AST eval")
-                return None
+                return UNARY_OPS[expr.operator.tType](self, expr.operator, right)
 
             case Binary():
                 left = self.evaluate(expr.left)
                 right = self.evaluate(expr.right)
-                match expr.operator.tType:
-                    case TokenType.GREATER:
-                        self.check_number_operands(expr.operator, left, right)
-                        return float(left) > float(right)
-                    case TokenType.GREATER_EQUAL:
-                        self.check_number_operands(expr.operator, left, right)
-                        return float(left) >= float(right)
-                    case TokenType.LESS:
-                        self.check_number_operands(expr.operator, left, right)
-                        return float(left) < float(right)
-                    case TokenType.LESS_EQUAL:
-                        self.check_number_operands(expr.operator, left, right)
-                        return float(left) <= float(right)
-                    case TokenType.BANG_EQUAL:
-                        return not self.isEqual(left, right)
-                    case TokenType.EQUAL_EQUAL:
-                        return self.isEqual(left, right)
-                    case TokenType.MINUS:
-                        self.check_number_operands(expr.operator, left, right)
-                        return float(left) - float(right)
-                    case TokenType.PLUS:
-                        if isinstance(left, float) and isinstance(right, float):
-                            return float(left) + float(right)
-                        if isinstance(left, str) and isinstance(right, str):
-                            return left + right
-
-                        # WARN: Do we even reach here?
-                        # Python is much more forgiving than java
-                        raise RuntimeError_(
-                            expr.operator, "Operands must be two numbers or two strings"
+                if expr.__class__ is BinarySite:
+                    fast = expr.fast
+                    if fast is not None:
+                        result = fast(left, right)
+                        if result is not _DEOPT:
+                            return result
+                    return self.observe(expr, left, right)
+                return BINARY_OPS[expr.operator.tType](
+                    self, expr.operator, left, right
+                )
+
+            case Assign():
+                value = self.evaluate(expr.value)
+                site = self.sites.get(id(expr))
+                if site.__class__ is GlobalSite:
+                    cell = site.cell
+                    if cell is None:
+                        cell = self.globalCell(site, expr.name)
+                    cell.value = value
+                    return value
+                if site is None:
+                    self.lookUpGlobal(expr.name)
+                    self.globals[expr.name.lexeme].value = value
+                    return value
+                frame = self.environment
+                for _ in range(site[1]):
+                    frame = frame[0]
+                frame[site[2]] = value
+                return value
+
+    def evaluateExplicit(self, expr: Expr):
+        # evaluate() without recursing into subexpressions: nodes waiting on
+        # their operands sit on `work` as (continuation, node), operands
+        # come back on `values`. Leaves still go through evaluateTree().
+        # Calls recurse into the callee's body, that's what maxDepth limits.
+        work = [expr]
+        values = []
+        while work:
+            item = work.pop()
+            if item.__class__ is tuple:
+                step, node = item
+                if step == _BINARY:
+                    right = values.pop()
+                    left = values.pop()
+                    if node.__class__ is BinarySite:
+                        fast = node.fast
+                        result = _DEOPT if fast is None else fast(left, right)
+                        if result is _DEOPT:
+                            result = self.observe(node, left, right)
+                    else:
+                        result = BINARY_OPS[node.operator.tType](
+                            self, node.operator, left, right
                         )
-                    case TokenType.SLASH:
-                        self.check_number_operands(expr.operator, left, right)
-                        # Python ftw?
-                        # Auto converts all division
-                        # to floats
-                        if right == 0.0:
-                            raise RuntimeError_(expr.operator, "Division by zero.")
-                        return left / right
-                    case TokenType.STAR:
-                        self.check_number_operands(expr.operator, left, right)
-                        return float(left) * float(right)
-                # Should never come here
-                raise AssertionError("Unreachable: unexpected binary operator")
+                    values.append(result)
+                elif step == _UNARY:
+                    values.append(
+                        UNARY_OPS[node.operator.tType](
+                            self, node.operator, values.pop()
+                        )
+                    )
+                elif step == _CALL:
+                    count = len(node.arguments)
+                    arguments = values[len(values) - count :]
+                    del values[len(values) - count :]
+                    callee = values.pop()
+                    values.append(self.callValue(callee, arguments, node.paren))
+                elif step == _CALL_GET:
+                    # The property is looked up before the arguments run
+                    values.append(self.getProperty(node.callee, values.pop()))
+                    work.append((_CALL, node))
+                    work.extend(reversed(node.arguments))
+                elif step == _ASSIGN:
+                    # The value stays on the stack as the result
+                    self.assignVariable(node, values[-1])
+                elif step == _GET:
+                    values.append(self.getProperty(node, values.pop()))
+                elif step == _SET_OBJECT:
+                    if values[-1].__class__ is not LoxInstance:
+                        raise RuntimeError_(node.name, "Only instances have fields.")
+                    work.append((_SET, node))
+                    work.append(node.value)
+                else:
+                    value = values.pop()
+                    self.setProperty(node, values.pop(), value)
+                    values.append(value)
+                continue
+
+            cls = item.__class__
+            if cls is Grouping:
+                work.append(item.expression)
+            elif cls is Binary or cls is BinarySite:
+                work.append((_BINARY, item))
+                work.append(item.right)
+                work.append(item.left)
+            elif cls is Unary:
+                work.append((_UNARY, item))
+                work.append(item.right)
+            elif cls is Assign:
+                work.append((_ASSIGN, item))
+                work.append(item.value)
+            elif cls is Get:
+                work.append((_GET, item))
+                work.append(item.object)
+            elif cls is Set:
+                work.append((_SET_OBJECT, item))
+                work.append(item.object)
+            elif cls is Call and item.callee.__class__ is not Super:
+                if item.callee.__class__ is Get:
+                    work.append((_CALL_GET, item))
+                    work.append(item.callee.object)
+                else:
+                    work.append((_CALL, item))
+                    work.extend(reversed(item.arguments))
+                    work.append(item.callee)
+            else:
+                values.append(self.evaluateTree(item))
+        return values.pop()
+
+    def assignVariable(self, expr: Assign, value):
+        # The Assign case of evaluate() once the value is known
+        site = self.sites.get(id(expr))
+        if site.__class__ is GlobalSite:
+            cell = site.cell
+            if cell is None:
+                cell = self.globalCell(site, expr.name)
+            cell.value = value
+            return value
+        if site is None:
+            self.lookUpGlobal(expr.name)
+            self.globals[expr.name.lexeme].value = value
+            return value
+        frame = self.environment
+        for _ in range(site[1]):
+            frame = frame[0]
+        frame[site[2]] = value
+        return value
+
+    def callSlow(self, callee, expr: Call):
+        # Arguments are still evaluated first, so their errors win
+        arguments = [self.evaluate(argument) for argument in expr.arguments]
+        return self.callValue(callee, arguments, expr.paren)
+
+    def callValue(self, callee, arguments: list, paren: Token):
+        match callee:
+            case LoxFunction() if len(arguments) == callee.arity:
+                pool = callee.pool
+                frame = pool.pop() if pool else callee.frame()
+                frame[1 : len(arguments) + 1] = arguments
+                return self.call(callee, frame, paren)
+            case BoundMethod():
+                return self.callMethod(
+                    callee.receiver, callee.method, arguments, paren
+                )
+            case LoxClass():
+                instance = LoxInstance(callee)
+                initializer = callee.methods.get("init")
+                if initializer is not None:
+                    self.callMethod(instance, initializer, arguments, paren)
+                elif arguments:
+                    raise self.arityError(paren, 0, arguments)
+                return instance
+            case NativeFunction():
+                if len(arguments) != callee.arity:
+                    raise self.arityError(paren, callee.arity, arguments)
+                return self.callNative(callee, arguments, paren)
+            case LoxFunction():
+                raise self.arityError(paren, callee.arity, arguments)
+        raise RuntimeError_(paren, "Can only call functions and classes.")
+
+    def callNative(self, native: NativeFunction, arguments: list, paren: Token):
+        for index, argument in enumerate(arguments):
+            if argument.__class__ is Rope:
+                arguments[index] = str(argument)
+        try:
+            result = native.function(*arguments)
+        except RuntimeError_:
+            raise
+        except Exception as e:
+            raise RuntimeError_(paren, f"{native.name}: {e}") from e
+        if result.__class__ is int:
+            return float(result)
+        return result
+
+    def callMethod(self, receiver, method: LoxFunction, arguments: list, paren):
+        if len(arguments) != method.arity:
+            raise self.arityError(paren, method.arity, arguments)
+        pool = method.pool
+        frame = pool.pop() if pool else method.frame()
+        frame[1] = receiver
+        frame[2 : len(arguments) + 2] = arguments
+        return self.call(method, frame, paren)
+
+    def invoke(self, receiver, method: LoxFunction, expr: Call):
+        # A method call without the BoundMethod, same checks as calling one
+        arguments = expr.arguments
+        if len(arguments) != method.arity:
+            return self.callSlow(BoundMethod(receiver, method), expr)
+        pool = method.pool
+        frame = pool.pop() if pool else method.frame()
+        frame[1] = receiver
+        index = 2
+        for argument in arguments:
+            frame[index] = self.evaluate(argument)
+            index += 1
+        return self.call(method, frame, expr.paren)
+
+    def superMethod(self, expr: Super) -> tuple["LoxInstance", LoxFunction]:
+        site = self.sites[id(expr)]
+        # `this` is slot 0 of the method's frame, just inside the one
+        # holding `super`
+        frame = self.environment
+        for _ in range(site.depth - 1):
+            frame = frame[0]
+        receiver = frame[1]
+        superclass = frame[0][1]
+        if superclass is not site.superclass:
+            method = superclass.methods.get(expr.method.lexeme)
+            if method is None:
+                raise RuntimeError_(
+                    expr.method, f"Undefined property '{expr.method.lexeme}'."
+                )
+            site.superclass, site.method = superclass, method
+        return receiver, site.method
+
+    def arityError(self, paren: Token, arity: int, arguments: list):
+        return RuntimeError_(
+            paren, f"Expected {arity} arguments but got {len(arguments)}."
+        )
+
+    def getProperty(self, expr: Get, instance):
+        if instance.__class__ is not LoxInstance:
+            raise RuntimeError_(expr.name, "Only instances have properties.")
+        name = expr.name.lexeme
+        site = self.sites.get(id(expr))
+        slot = instance.shape.fields.get(name)
+        if slot is not None:
+            if site is not None:
+                site.shape, site.slot, site.method = instance.shape, slot, None
+            return instance.values[slot]
+        method = instance.klass.methods.get(name)
+        if method is not None:
+            if site is not None:
+                site.shape, site.method = instance.shape, method
+            return BoundMethod(instance, method)
+        raise RuntimeError_(expr.name, f"Undefined property '{name}'.")
+
+    def setProperty(self, expr: Set, instance, value):
+        shape = instance.shape
+        slot = shape.fields.get(expr.name.lexeme)
+        site = self.sites.get(id(expr))
+        if slot is None:
+            added = shape.adding(expr.name.lexeme)
+            if site is not None:
+                site.shape, site.next = shape, added
+            instance.shape = added
+            instance.values.append(value)
+        else:
+            if site is not None:
+                site.shape, site.slot, site.next = shape, slot, None
+            instance.values[slot] = value
+
+    def defineNative(
+        self, name: str, arity: int, function: Callable
+    ) -> NativeFunction:
+        native = NativeFunction(name, arity, function)
+        self.defineGlobal(name, native)
+        return native
+
+    def defineGlobal(self, name: str, value) -> None:
+        cell = self.globals.get(name)
+        if cell is None:
+            self.globals[name] = GlobalCell(value)
+            self.globalsVersion += 1
+        else:
+            # Redefinition reuses the cell, cached sites stay valid
+            cell.value = value
+
+    def globalCell(self, site: GlobalSite, name: Token) -> GlobalCell:
+        # Slow path for a site without a cell yet
+        if site.version != self.globalsVersion:
+            site.version = self.globalsVersion
+            site.cell = self.globals.get(name.lexeme)
+        if site.cell is None:
+            raise self.undefined(name)
+        return site.cell
+
+    def lookUpGlobal(self, name: Token):
+        try:
+            return self.globals[name.lexeme].value
+        except KeyError:
+            raise self.undefined(name) from None
+
+    def undefined(self, name: Token) -> "RuntimeError_":
+        return RuntimeError_(name, f"Undefined variable '{name.lexeme}'.")
+
+    def observe(self, site: BinarySite, left, right):
+        if site.fast is not None:
+            # Guard failed, back to recording
+            site.fast = None
+            site.kind = None
+            site.hits = 0
+            site.deopts += 1
+            self.deoptimized += 1
+
+        # Generic path, raises exactly what an unquickened Binary would
+        result = BINARY_OPS[site.operator.tType](self, site.operator, left, right)
+
+        kind = left.__class__
+        if kind is not right.__class__:
+            kind = None
+        if kind is not site.kind:
+            site.kind = kind
+            site.hits = 0
+        site.hits += 1
+        if site.hits >= QUICKEN_AFTER:
+            fast = None
+            if site.deopts < MAX_DEOPTS:
+                fast = SPECIALIZED.get(kind, {}).get(site.operator.tType)
+            if fast is not None:
+                site.fast = fast
+                self.specialized += 1
+            else:
+                # Nothing to specialize on, stop recording
+                handler = BINARY_OPS[site.operator.tType]
+                site.fast = partial(handler, self, site.operator)
+        return result
+
+    # Operator handlers, dispatched through UNARY_OPS / BINARY_OPS by kind
+    def negate(self, operator: Token, right):
+        return -float(right)
+
+    def logicalNot(self, operator: Token, right):
+        return not self.isTruthy(right)
+
+    def greater(self, operator: Token, left, right):
+        self.check_number_operands(operator, left, right)
+        return left > right
+
+    def greaterEqual(self, operator: Token, left, right):
+        self.check_number_operands(operator, left, right)
+        return left >= right
+
+    def less(self, operator: Token, left, right):
+        self.check_number_operands(operator, left, right)
+        return left < right
+
+    def lessEqual(self, operator: Token, left, right):
+        self.check_number_operands(operator, left, right)
+        return left <= right
+
+    def notEqual(self, operator: Token, left, right):
+        return not self.isEqual(left, right)
+
+    def equal(self, operator: Token, left, right):
+        return self.isEqual(left, right)
+
+    def subtract(self, operator: Token, left, right):
+        self.check_number_operands(operator, left, right)
+        return left - right
+
+    def add(self, operator: Token, left, right):
+        if isinstance(left, float) and isinstance(right, float):
+            return left + right
+        if isinstance(left, STRINGS) and isinstance(right, STRINGS):
+            return concat(left, right)
+
+        # WARN: Do we even reach here?
+        # Python is much more forgiving than java
+        raise RuntimeError_(operator, "Operands must be two numbers or two strings")
+
+    def divide(self, operator: Token, left, right):
+        self.check_number_operands(operator, left, right)
+        # Python ftw?
+        # Auto converts all division
+        # to floats
+        if right == 0.0:
+            raise RuntimeError_(operator, "Division by zero.")
+        return left / right
+
+    def multiply(self, operator: Token, left, right):
+        self.check_number_operands(operator, left, right)
+        return left * right
 
     def isTruthy(self, objecta) -> bool:
         if objecta is None:
@@ -102,22 +1139,28 @@ class Interpreter:
         return True
 
     def isEqual(self, objecta, objectb) -> bool:
-        if objecta is None and objectb is None:
-            return True
-        if objecta is None:
+        # Strings are interned, so equal strings are nearly always the same
+        # object. NaN is the one value not equal to itself.
+        if objecta is objectb:
+            return objecta.__class__ is not float or objecta == objectb
+        if objecta is None or objectb is None:
             return False
         return objecta == objectb
 
     def stringify(self, objecta) -> str:
+        if objecta.__class__ is float:
+            text = NUMBER_TEXT.get(objecta)
+            if text is None:
+                text = str(objecta)
+                if text.endswith(".0"):
+                    text = text[0:-2]
+            return text
         if objecta is None:
             return "nil"
-        if isinstance(objecta, float):
-            text = str(objecta)
-            if text.endswith(".0"):
-                text = text[0:-2]
-            return text
-        if isinstance(objecta, bool):
-            return "true" if objecta else "false"
+        if objecta is True:
+            return "true"
+        if objecta is False:
+            return "false"
         return str(objecta)
 
     def check_number_operand(self, operator: Token, operand: object):
@@ -131,6 +1174,89 @@ class Interpreter:
         raise RuntimeError_(operator, "Operands must be numbers.")
 
 
+# stringify() of the small integers loops count with. Not 0, -0.0 is the
+# same key and prints as -0.
+NUMBER_TEXT = {float(n): str(n) for n in range(-1024, 1025) if n}
+
+UNARY_OPS = {
+    TokenType.BANG: Interpreter.logicalNot,
+    TokenType.MINUS: Interpreter.negate,
+}
+
+BINARY_OPS = {
+    TokenType.GREATER: Interpreter.greater,
+    TokenType.GREATER_EQUAL: Interpreter.greaterEqual,
+    TokenType.LESS: Interpreter.less,
+    TokenType.LESS_EQUAL: Interpreter.lessEqual,
+    TokenType.BANG_EQUAL: Interpreter.notEqual,
+    TokenType.EQUAL_EQUAL: Interpreter.equal,
+    TokenType.MINUS: Interpreter.subtract,
+    TokenType.PLUS: Interpreter.add,
+    TokenType.SLASH: Interpreter.divide,
+    TokenType.STAR: Interpreter.multiply,
+}
+
+# Specialized handlers by operand type. Each guards on the exact types it
+# was specialized for and returns _DEOPT instead of raising, so errors are
+# always reported by the generic handlers.
+SPECIALIZED = {
+    float: {
+        TokenType.GREATER: lambda a, b: (
+            a > b if a.__class__ is float and b.__class__ is float else _DEOPT
+        ),
+        TokenType.GREATER_EQUAL: lambda a, b: (
+            a >= b if a.__class__ is float and b.__class__ is float else _DEOPT
+        ),
+        TokenType.LESS: lambda a, b: (
+            a < b if a.__class__ is float and b.__class__ is float else _DEOPT
+        ),
+        TokenType.LESS_EQUAL: lambda a, b: (
+            a <= b if a.__class__ is float and b.__class__ is float else _DEOPT
+        ),
+        TokenType.BANG_EQUAL: lambda a, b: (
+            a != b if a.__class__ is float and b.__class__ is float else _DEOPT
+        ),
+        TokenType.EQUAL_EQUAL: lambda a, b: (
+            a == b if a.__class__ is float and b.__class__ is float else _DEOPT
+        ),
+        TokenType.MINUS: lambda a, b: (
+            a - b if a.__class__ is float and b.__class__ is float else _DEOPT
+        ),
+        TokenType.PLUS: lambda a, b: (
+            a + b if a.__class__ is float and b.__class__ is float else _DEOPT
+        ),
+        TokenType.SLASH: lambda a, b: (
+            a / b
+            if a.__class__ is float and b.__class__ is float and b != 0.0
+            else _DEOPT
+        ),
+        TokenType.STAR: lambda a, b: (
+            a * b if a.__class__ is float and b.__class__ is float else _DEOPT
+        ),
+    },
+    str: {
+        TokenType.BANG_EQUAL: lambda a, b: (
+            a is not b and a != b
+            if a.__class__ is str and b.__class__ is str
+            else _DEOPT
+        ),
+        TokenType.EQUAL_EQUAL: lambda a, b: (
+            a is b or a == b if a.__class__ is str and b.__class__ is str else _DEOPT
+        ),
+        TokenType.PLUS: lambda a, b: (
+            concat(a, b) if a.__class__ is str and b.__class__ is str else _DEOPT
+        ),
+    },
+    Rope: {
+        TokenType.PLUS: lambda a, b: (
+            Rope(a, b, a.length + b.length)
+            if a.__class__ is Rope and b.__class__ is Rope
+            else _DEOPT
+        ),
+    },
+}
+
+
 class RuntimeError_(Exception):
     def __init__(self, token, message):
         super().__init__(message)
@@ -0,0 +1,158 @@
+from typing import Iterable, Iterator
+
+from .expr import *
+from .stmt import *
+from .interpreter import Interpreter, BINARY_OPS, UNARY_OPS
+from .rope import Rope
+
+
+class Optimizer:
+    """
+    Constant folding and Grouping elimination over the parsed AST.
+
+    Binary/Unary nodes over literals are evaluated once with the
+    interpreter's own operator handlers, so folding can't drift from Lox
+    semantics. Anything that would raise (division by zero, bad operand
+    types) is left in place to fail at runtime on the same line.
+    """
+
+    def __init__(self):
+        self.removed: int = 0
+        # Only used for its operator handlers, never prints
+        self._interpreter = Interpreter()
+
+    def optimize(self, statements: Iterable[Stmt]) -> Iterator[Stmt]:
+        # Lazy so the streaming pipeline can fold one statement at a time
+        for stmt in statements:
+            removed = self.removed
+            try:
+                yield self.statement(stmt)
+            except RecursionError:
+                # Nested deeper than fold() can recurse, run it as written
+                self.removed = removed
+                yield stmt
+
+    def statement(self, stmt: Stmt) -> Stmt:
+        match stmt:
+            case Expression(expression):
+                return Expression(self.fold(expression))
+            case Print(expression):
+                return Print(self.fold(expression))
+            case Var(name, initializer):
+                if initializer is None:
+                    return stmt
+                return Var(name, self.fold(initializer))
+            case Block(statements, brace):
+                return Block([self.statement(inner) for inner in statements], brace)
+            case While(condition, body):
+                return While(self.fold(condition), self.statement(body))
+            case If(condition, thenBranch, elseBranch):
+                return If(
+                    self.fold(condition),
+                    self.statement(thenBranch),
+                    None if elseBranch is None else self.statement(elseBranch),
+                )
+            case Function(name, params, body):
+                return Function(name, params, [self.statement(s) for s in body])
+            case Return(keyword, value):
+                if value is None:
+                    return stmt
+                return Return(keyword, self.fold(value))
+            case Class(name, superclass, methods):
+                return Class(
+                    name, superclass, [self.statement(method) for method in methods]
+                )
+        return stmt
+
+    def fold(self, expr: Expr) -> Expr:
+        match expr:
+            case Grouping(expression):
+                self.removed += 1
+                return self.fold(expression)
+
+            case Unary(operator, right):
+                right = self.fold(right)
+                if isinstance(right, Literal):
+                    try:
+                        value = UNARY_OPS[operator.tType](
+                            self._interpreter, operator, right.value
+                        )
+                    except Exception:
+                        return Unary(operator, right)
+                    self.removed += 1
+                    return Literal(value)
+                return Unary(operator, right)
+
+            case Binary(left, operator, right):
+                left = self.fold(left)
+                right = self.fold(right)
+                if isinstance(left, Literal) and isinstance(right, Literal):
+                    try:
+                        value = BINARY_OPS[operator.tType](
+                            self._interpreter, operator, left.value, right.value
+                        )
+                    except Exception:
+                        return Binary(left, operator, right)
+                    if value.__class__ is Rope:
+                        # Literals are always flat, they get cached and
+                        # compiled
+                        value = str(value)
+                    self.removed += 2
+                    return Literal(value)
+                return Binary(left, operator, right)
+
+            case Logical(left, operator, right):
+                return Logical(self.fold(left), operator, self.fold(right))
+
+            case Ternary(left, qmark, middle, colon, right):
+                return Ternary(
+                    self.fold(left), qmark, self.fold(middle), colon, self.fold(right)
+                )
+
+            case Assign(name, value):
+                return Assign(name, self.fold(value))
+
+            case Call(callee, paren, arguments):
+                return Call(
+                    self.fold(callee), paren, [self.fold(arg) for arg in arguments]
+                )
+
+            case Get(object, name):
+                return Get(self.fold(object), name)
+
+            case Set(object, name, value):
+                return Set(self.fold(object), name, self.fold(value))
+
+        return expr
+
+
+if __name__ in ("__main__"):
+    import sys
+    from .scanner import Scanner
+    from .parser import Parser
+    from .astPrinter import print_ast
+    from .bytecode import firstLine
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m pythox.optimizer <file.lox>", file=sys.stderr)
+        sys.exit(64)
+
+    path = sys.argv[1]
+    with open(path, "r") as f:
+        source = f.read()
+
+    statements = Parser(Scanner(source).scanTokens()).parse()
+    if statements is not None:
+        optimizer = Optimizer()
+        for stmt in optimizer.optimize(statements):
+            match stmt:
+                case Expression(expression):
+                    print(print_ast(expression))
+                case Print(expression):
+                    print(f"(print {print_ast(expression)})")
+                case Var(name, initializer) if initializer is not None:
+                    print(f"(var {name.lexeme} {print_ast(initializer)})")
+                case _:
+                    # print_ast only knows expressions
+                    print(f"<{type(stmt).__name__} at line {firstLine(stmt)}>")
+        print(f"removed {optimizer.removed} nodes")
@@ -0,0 +1,86 @@
+import os
+import sys
+from time import monotonic
+from typing import Callable, TextIO
+
+
+class OutputSink:
+    """
+    Batches what `print` writes and hands it on in big chunks.
+
+    Its write method stands in for the plain write function as any
+    backend's output_writer. Output is passed on once `limit` characters
+    are pending, or on the first write `interval` seconds after the last
+    flush (checked on writes, there's no timer thread), and whenever
+    flush() is called. Interpreters flush after each interpret() and
+    before printing an error, the CLI gets every prompt's output that way.
+
+    With `fd` the text is encoded and written to that file descriptor
+    directly, skipping the text stream. Pass the stream that shares the
+    fd as `stream` so anything printed to it is flushed first and stays
+    in order.
+    """
+
+    __slots__ = (
+        "target",
+        "fd",
+        "stream",
+        "encoding",
+        "pending",
+        "size",
+        "limit",
+        "interval",
+        "deadline",
+    )
+
+    def __init__(
+        self,
+        target: Callable[[str], object] | None = None,
+        fd: int | None = None,
+        stream: TextIO | None = None,
+        limit: int = 1 << 16,
+        interval: float = 0.1,
+    ):
+        if (target is None) == (fd is None):
+            raise ValueError("OutputSink needs exactly one of target or fd")
+        self.target = target
+        self.fd = fd
+        self.stream = stream
+        self.encoding: str = getattr(stream, "encoding", None) or "utf-8"
+        self.pending: list[str] = []
+        self.size: int = 0
+        self.limit = limit
+        self.interval = interval
+        self.deadline: float = monotonic() + interval
+
+    @classmethod
+    def stdout(cls, **options) -> "OutputSink":
+        # Straight to the fd when sys.stdout has one, pytest's capture and
+        # other stand-ins only have write()
+        try:
+            fd = sys.stdout.fileno()
+        except (AttributeError, OSError, ValueError):
+            return cls(sys.stdout.write, **options)
+        return cls(fd=fd, stream=sys.stdout, **options)
+
+    def write(self, text: str) -> None:
+        self.pending.append(text)
+        self.size += len(text)
+        if self.size >= self.limit or monotonic() >= self.deadline:
+            self.flush()
+
+    def flush(self) -> None:
+        self.deadline = monotonic() + self.interval
+        if not self.pending:
+            return
+        text = "".join(self.pending)
+        self.pending.clear()
+        self.size = 0
+        if self.fd is None:
+            self.target(text)
+            return
+        if self.stream is not None:
+            self.stream.flush()
+        data = memoryview(text.encode(self.encoding))
+        while data:
+            data = data[os.write(self.fd, data) :]
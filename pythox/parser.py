@@ -1,28 +1,200 @@
-from .ttoken import Token, TokenType
+from typing import Iterable, Iterator
+
+from .ttoken import (
+    BINARY_PRECEDENCE,
+    STATEMENT_START,
+    UNARY_OPERATORS,
+    Token,
+    TokenBuffer,
+    TokenStream,
+    TokenType,
+)
 from .expr import *
 from .stmt import *
 
 
+# Operator sets per precedence level, one membership test per loop
+_EQUALITY, _COMPARISON, _TERM, _FACTOR = (
+    frozenset(k for k, level in BINARY_PRECEDENCE.items() if level == wanted)
+    for wanted in (1, 2, 3, 4)
+)
+
+# Binds tighter than any binary operator, and `=` looser
+_UNARY_PRECEDENCE = max(BINARY_PRECEDENCE.values()) + 1
+_ASSIGNMENT_PRECEDENCE = 0
+
+# What an unclosed '(' in explicitStack mode is waiting for
+_GROUPING, _ARGUMENTS = "grouping", "arguments"
+
+_KEYWORD_LITERALS: dict[TokenType, bool | None] = {
+    TokenType.FALSE: False,
+    TokenType.TRUE: True,
+    TokenType.NIL: None,
+}
+
+
 class Parser:
-    def __init__(self, tokens: list[Token]):
+    def __init__(
+        self,
+        tokens: list[Token] | TokenBuffer | Iterable[Token],
+        pratt: bool = False,
+        explicitStack: bool = False,
+    ):
+        if not isinstance(tokens, (list, TokenBuffer)):
+            tokens = TokenStream(tokens)
         self.tokens = tokens
         self.current = 0
+        self.hadError = False
+        # Precedence climbing over BINARY_PRECEDENCE instead of one method
+        # per level
+        self.pratt: bool = pratt
+        # Expressions parsed with operator and operand stacks instead of
+        # recursion, so nesting depth is only limited by memory
+        self.explicitStack: bool = explicitStack
 
     def parse(self) -> list[Stmt] | None:
         try:
             statements: list[Stmt] = []
             while not self.is_at_end():
-                statements.append(self.statement())
+                statements.append(self.declaration())
             return statements
         except Exception as e:
             print(f"{e}")
+            self.hadError = True
             return None
 
+    def parseStream(self) -> Iterator[Stmt]:
+        # Hands out top-level statements as soon as they are parsed. A parse
+        # error ends the stream, so nothing after it ever runs.
+        try:
+            while not self.is_at_end():
+                yield self.declaration()
+        except Exception as e:
+            print(f"{e}")
+            self.hadError = True
+
+    def declaration(self) -> Stmt:
+        if self.match(TokenType.CLASS):
+            return self.classDeclaration()
+        if self.match(TokenType.FUN):
+            return self.function("function")
+        if self.match(TokenType.VAR):
+            return self.varDeclaration()
+        return self.statement()
+
+    def classDeclaration(self) -> Stmt:
+        name = self.consume(TokenType.IDENTIFIER, "Expect class name.")
+        superclass = None
+        if self.match(TokenType.LESS):
+            self.consume(TokenType.IDENTIFIER, "Expect superclass name.")
+            superclass = Variable(self.previous())
+        self.consume(TokenType.LEFT_BRACE, "Expect '{' before class body.")
+        methods: list[Stmt] = []
+        while not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
+            methods.append(self.function("method"))
+        self.consume(TokenType.RIGHT_BRACE, "Expect '}' after class body.")
+        return Class(name, superclass, methods)
+
+    def function(self, kind: str) -> Stmt:
+        name = self.consume(TokenType.IDENTIFIER, f"Expect {kind} name.")
+        self.consume(TokenType.LEFT_PAREN, f"Expect '(' after {kind} name.")
+        params: list[Token] = []
+        if not self.check(TokenType.RIGHT_PAREN):
+            while True:
+                if len(params) >= 255:
+                    self.error(self.peek(), "Can't have more than 255 parameters.")
+                params.append(
+                    self.consume(TokenType.IDENTIFIER, "Expect parameter name.")
+                )
+                if not self.match(TokenType.COMMA):
+                    break
+        self.consume(TokenType.RIGHT_PAREN, "Expect ')' after parameters.")
+        self.consume(TokenType.LEFT_BRACE, f"Expect '{{' before {kind} body.")
+        return Function(name, params, self.block())
+
+    def varDeclaration(self) -> Stmt:
+        name = self.consume(TokenType.IDENTIFIER, "Expect variable name.")
+        initializer = None
+        if self.match(TokenType.EQUAL):
+            initializer = self.expression()
+        self.consume(TokenType.SEMICOLON, "Expect ';' after variable declaration.")
+        return Var(name, initializer)
+
     def statement(self) -> Stmt:
+        if self.match(TokenType.FOR):
+            return self.forStatement()
+        if self.match(TokenType.IF):
+            return self.ifStatement()
         if self.match(TokenType.PRINT):
             return self.printStatement()
+        if self.match(TokenType.RETURN):
+            return self.returnStatement()
+        if self.match(TokenType.WHILE):
+            return self.whileStatement()
+        if self.match(TokenType.LEFT_BRACE):
+            statements = self.block()
+            return Block(statements, self.previous())
         return self.expressionStatement()
 
+    def forStatement(self) -> Stmt:
+        # Desugared into a While, with the clauses in their own Block
+        self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
+        if self.match(TokenType.SEMICOLON):
+            initializer = None
+        elif self.match(TokenType.VAR):
+            initializer = self.varDeclaration()
+        else:
+            initializer = self.expressionStatement()
+
+        condition = None
+        if not self.check(TokenType.SEMICOLON):
+            condition = self.expression()
+        self.consume(TokenType.SEMICOLON, "Expect ';' after loop condition.")
+
+        increment = None
+        if not self.check(TokenType.RIGHT_PAREN):
+            increment = self.expression()
+        self.consume(TokenType.RIGHT_PAREN, "Expect ')' after for clauses.")
+
+        body = self.statement()
+        if increment is not None:
+            body = Block([body, Expression(increment)])
+        if condition is None:
+            condition = Literal(True)
+        body = While(condition, body)
+        if initializer is not None:
+            body = Block([initializer, body])
+        return body
+
+    def ifStatement(self) -> Stmt:
+        self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'if'.")
+        condition = self.expression()
+        self.consume(TokenType.RIGHT_PAREN, "Expect ')' after if condition.")
+        thenBranch = self.statement()
+        elseBranch = self.statement() if self.match(TokenType.ELSE) else None
+        return If(condition, thenBranch, elseBranch)
+
+    def returnStatement(self) -> Stmt:
+        keyword = self.previous()
+        value = None
+        if not self.check(TokenType.SEMICOLON):
+            value = self.expression()
+        self.consume(TokenType.SEMICOLON, "Expect ';' after return value.")
+        return Return(keyword, value)
+
+    def whileStatement(self) -> Stmt:
+        self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'while'.")
+        condition = self.expression()
+        self.consume(TokenType.RIGHT_PAREN, "Expect ')' after condition.")
+        return While(condition, self.statement())
+
+    def block(self) -> list[Stmt]:
+        statements: list[Stmt] = []
+        while not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
+            statements.append(self.declaration())
+        self.consume(TokenType.RIGHT_BRACE, "Expect '}' after block.")
+        return statements
+
     def printStatement(self) -> Stmt:
         value: Expr = self.expression()
         self.consume(TokenType.SEMICOLON, "Expect ';' after value.")
@@ -34,12 +206,166 @@ class Parser:
         return Expression(expr)
 
     def expression(self) -> Expr:
-        return self.equality()
+        if self.explicitStack:
+            return self.expressionExplicit()
+        try:
+            return self.assignment()
+        except RecursionError:
+            # The innermost expression still on the stack reports it
+            self.error(self.peek(), "Stack overflow.")
+
+    def expressionExplicit(self) -> Expr:
+        # Shunting-yard over the same grammar as assignment(). Each unclosed
+        # '(' saves the operand and operator stacks of the expression around
+        # it in `outer` and starts new ones.
+        tokens = self.tokens
+        precedenceOf = BINARY_PRECEDENCE.get
+        outer: list[tuple] = []
+        operands: list[Expr] = []
+        # (operator token, precedence, whether it's a prefix operator)
+        operators: list[tuple[Token, int, bool]] = []
+        # For arguments, [callee, arguments parsed so far]
+        waiting: str | None = None
+        call: list | None = None
+
+        while True:
+            # Operand position: prefix operators, then '(' or a primary
+            token = tokens[self.current]
+            if token.tType in UNARY_OPERATORS:
+                self.current += 1
+                operators.append((token, _UNARY_PRECEDENCE, True))
+                continue
+            if token.tType is TokenType.LEFT_PAREN:
+                self.current += 1
+                outer.append((operands, operators, waiting, call))
+                operands, operators, waiting, call = [], [], _GROUPING, None
+                continue
+            expr = self.primary()
+
+            # After an operand: calls, property accesses and closing parens,
+            # until a binary operator or `=` asks for the next operand
+            while True:
+                token = tokens[self.current]
+                tType = token.tType
+                if tType is TokenType.DOT:
+                    self.current += 1
+                    name = self.consume(
+                        TokenType.IDENTIFIER, "Expect property name after '.'."
+                    )
+                    expr = Get(expr, name)
+                    continue
+                if tType is TokenType.LEFT_PAREN:
+                    self.current += 1
+                    if self.check(TokenType.RIGHT_PAREN):
+                        expr = Call(expr, self.advance(), [])
+                        continue
+                    outer.append((operands, operators, waiting, call))
+                    operands, operators = [], []
+                    waiting, call = _ARGUMENTS, [expr, []]
+                    break
+
+                precedence = precedenceOf(tType)
+                if precedence is None and tType is TokenType.EQUAL:
+                    precedence = _ASSIGNMENT_PRECEDENCE
+                if precedence is not None:
+                    self.current += 1
+                    operands.append(expr)
+                    # Binary operators are left associative, `=` right
+                    self.reduce(
+                        operands,
+                        operators,
+                        precedence + (tType is TokenType.EQUAL),
+                    )
+                    operators.append((token, precedence, False))
+                    break
+
+                # Nothing more for this expression
+                operands.append(expr)
+                self.reduce(operands, operators, _ASSIGNMENT_PRECEDENCE)
+                expr = operands.pop()
+                if waiting is None:
+                    return expr
+                if waiting is _GROUPING:
+                    self.consume(
+                        TokenType.RIGHT_PAREN, "Expect ')' after expression."
+                    )
+                    expr = Grouping(expr)
+                else:
+                    arguments = call[1]
+                    arguments.append(expr)
+                    if self.match(TokenType.COMMA):
+                        if len(arguments) >= 255:
+                            self.error(
+                                self.peek(), "Can't have more than 255 arguments."
+                            )
+                        operands, operators = [], []
+                        break
+                    paren = self.consume(
+                        TokenType.RIGHT_PAREN, "Expect ')' after arguments."
+                    )
+                    expr = Call(call[0], paren, arguments)
+                operands, operators, waiting, call = outer.pop()
+
+    def reduce(
+        self,
+        operands: list[Expr],
+        operators: list[tuple[Token, int, bool]],
+        minPrecedence: int,
+    ) -> None:
+        # Folds the operators that bind at least as tight as minPrecedence
+        # into their operands
+        while operators and operators[-1][1] >= minPrecedence:
+            operator, _, prefix = operators.pop()
+            right = operands.pop()
+            if prefix:
+                operands.append(Unary(operator, right))
+            elif operator.tType is TokenType.EQUAL:
+                operands.append(self.assignmentTarget(operands.pop(), operator, right))
+            else:
+                operands.append(Binary(operands.pop(), operator, right))
+
+    def assignmentTarget(self, expr: Expr, equals: Token, value: Expr) -> Expr:
+        if isinstance(expr, Variable):
+            return Assign(expr.name, value)
+        if isinstance(expr, Get):
+            return Set(expr.object, expr.name, value)
+        raise ParseError(
+            f"[line {equals.line}] Error at '=': Invalid assignment target."
+        )
+
+    def assignment(self) -> Expr:
+        expr = self.binary(1) if self.pratt else self.equality()
+
+        if self.match(TokenType.EQUAL):
+            equals = self.previous()
+            value = self.assignment()
+            return self.assignmentTarget(expr, equals, value)
+
+        return expr
+
+    def binary(self, minPrecedence: int) -> Expr:
+        tokens = self.tokens
+        if tokens[self.current].tType in UNARY_OPERATORS:
+            expr = self.unary()
+        else:
+            expr = self.call()
+
+        precedenceOf = BINARY_PRECEDENCE.get
+        while True:
+            operator = tokens[self.current]
+            precedence = precedenceOf(operator.tType)
+            if precedence is None or precedence < minPrecedence:
+                return expr
+            # Operators are never EOF, safe to step over directly
+            self.current += 1
+            # Everything is left associative, so the right operand only
+            # takes operators that bind tighter
+            expr = Binary(expr, operator, self.binary(precedence + 1))
 
     def equality(self) -> Expr:
         expr = self.comparison()
 
-        while self.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
+        while self.matchAny(_EQUALITY):
             operator = self.previous()
             right = self.comparison()
             expr = Binary(expr, operator, right)
@@ -49,12 +375,7 @@ class Parser:
     def comparison(self) -> Expr:
         expr = self.term()
 
-        while self.match(
-            TokenType.GREATER,
-            TokenType.GREATER_EQUAL,
-            TokenType.LESS,
-            TokenType.LESS_EQUAL,
-        ):
+        while self.matchAny(_COMPARISON):
             operator = self.previous()
             right = self.term()
             expr = Binary(expr, operator, right)
@@ -64,7 +385,7 @@ class Parser:
     def term(self) -> Expr:
         expr = self.factor()
 
-        while self.match(TokenType.MINUS, TokenType.PLUS):
+        while self.matchAny(_TERM):
             operator = self.previous()
             right = self.factor()
             expr = Binary(expr, operator, right)
@@ -74,7 +395,7 @@ class Parser:
     def factor(self) -> Expr:
         expr = self.unary()
 
-        while self.match(TokenType.SLASH, TokenType.STAR):
+        while self.matchAny(_FACTOR):
             operator = self.previous()
             right = self.unary()
             expr = Binary(expr, operator, right)
@@ -82,23 +403,60 @@ class Parser:
         return expr
 
     def unary(self) -> Expr:
-        if self.match(TokenType.BANG, TokenType.MINUS):
+        if self.matchAny(UNARY_OPERATORS):
             operator = self.previous()
             right = self.unary()
             return Unary(operator, right)
 
-        return self.primary()
+        return self.call()
+
+    def call(self) -> Expr:
+        expr = self.primary()
+        while True:
+            if self.match(TokenType.LEFT_PAREN):
+                expr = self.finishCall(expr)
+            elif self.match(TokenType.DOT):
+                name = self.consume(
+                    TokenType.IDENTIFIER, "Expect property name after '.'."
+                )
+                expr = Get(expr, name)
+            else:
+                return expr
+
+    def finishCall(self, callee: Expr) -> Expr:
+        arguments: list[Expr] = []
+        if not self.check(TokenType.RIGHT_PAREN):
+            while True:
+                if len(arguments) >= 255:
+                    self.error(self.peek(), "Can't have more than 255 arguments.")
+                arguments.append(self.expression())
+                if not self.match(TokenType.COMMA):
+                    break
+        paren = self.consume(TokenType.RIGHT_PAREN, "Expect ')' after arguments.")
+        return Call(callee, paren, arguments)
 
     def primary(self) -> Expr:
-        if self.match(TokenType.FALSE):
-            return Literal(False)
-        if self.match(TokenType.TRUE):
-            return Literal(True)
-        if self.match(TokenType.NIL):
-            return Literal(None)
+        tType = self.peek().tType
+        if tType in _KEYWORD_LITERALS:
+            return Literal(_KEYWORD_LITERALS[tType], self.advance())
+
+        if tType is TokenType.NUMBER or tType is TokenType.STRING:
+            token = self.advance()
+            return Literal(token.literal, token)
+
+        if tType is TokenType.IDENTIFIER:
+            return Variable(self.advance())
+
+        if tType is TokenType.THIS:
+            return This(self.advance())
 
-        if self.match(TokenType.NUMBER, TokenType.STRING):
-            return Literal(self.previous().literal)
+        if self.match(TokenType.SUPER):
+            keyword = self.previous()
+            self.consume(TokenType.DOT, "Expect '.' after 'super'.")
+            method = self.consume(
+                TokenType.IDENTIFIER, "Expect superclass method name."
+            )
+            return Super(keyword, method)
 
         if self.match(TokenType.LEFT_PAREN):
             expr = self.expression()
@@ -114,12 +472,20 @@ class Parser:
                 return True
         return False
 
+    def matchAny(self, types: frozenset[TokenType]) -> bool:
+        # EOF is never in an operator set, so no is_at_end() dance needed
+        if self.peek().tType in types:
+            self.advance()
+            return True
+        return False
+
     def consume(self, type: TokenType, message: str) -> Token:
         if self.check(type):
             return self.advance()
-        raise ParseError(
-            f"[line {self.peek().line}] Error at '{self.peek().lexeme}': {message}"
-        )
+        self.error(self.peek(), message)
+
+    def error(self, token: Token, message: str):
+        raise ParseError(f"[line {token.line}] Error at '{token.lexeme}': {message}")
 
     def synchronize(self):
         self.advance()
@@ -128,23 +494,8 @@ class Parser:
             if self.previous().tType == TokenType.SEMICOLON:
                 return
 
-            match self.peek().tType:
-                case TokenType.CLASS:
-                    return
-                case TokenType.FUN:
-                    return
-                case TokenType.VAR:
-                    return
-                case TokenType.FOR:
-                    return
-                case TokenType.IF:
-                    return
-                case TokenType.WHILE:
-                    return
-                case TokenType.PRINT:
-                    return
-                case TokenType.RETURN:
-                    return
+            if self.peek().tType in STATEMENT_START:
+                return
 
             self.advance()
 
@@ -0,0 +1,159 @@
+import signal
+from collections import Counter
+from dataclasses import fields
+from types import FrameType
+
+from .closureCompiler import runAll, runBlock
+from .interpreter import Interpreter
+from .ttoken import Token
+
+# Seconds of CPU time between samples
+INTERVAL = 0.001
+# Frame for samples taken outside any statement: scanning, parsing,
+# resolving, startup
+OUTSIDE = "<pythox>"
+SCRIPT = "<script>"
+
+# Python frames the sampler reads Lox state from
+_CALL = Interpreter.call.__code__
+_NODES = {
+    Interpreter.execute.__code__: "stmt",
+    Interpreter.evaluate.__code__: "expr",
+    Interpreter.evaluateExplicit.__code__: "item",
+    # Compiled closures carry no node, these run them statement by statement
+    runAll.__code__: "stmt",
+    runBlock.__code__: "stmt",
+    Interpreter.run.__code__: "stmt",
+}
+
+
+class Profiler:
+    """
+    Samples the Lox call stack of the tree-walking backends.
+
+    A SIGPROF timer interrupts the program every `interval` seconds of CPU
+    time. The handler walks the interrupted Python stack: call() frames
+    give the Lox functions being run and the line each one was called
+    from, the innermost execute()/evaluate() frame gives the line being
+    run, or for compiled closures the statement runAll()/runBlock() is
+    on. The interpreter keeps no extra state for it, so nothing is paid
+    while no Profiler is running.
+
+    Stacks are counted as tuples of "function:line" frames, outermost
+    first, ready for collapsed() and summary().
+    """
+
+    def __init__(self, interval: float = INTERVAL):
+        self.interval = interval
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        # id(node) -> (node, line of its first token or None)
+        self._lines: dict[int, tuple[object, int | None]] = {}
+        self._previous = None
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        if not hasattr(signal, "setitimer"):
+            raise RuntimeError("Profiling needs signal.setitimer, not available here.")
+        self._previous = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+        self._previous = None
+
+    def sample(self, signum: int, frame: FrameType | None) -> None:
+        self.samples[self.stack(frame)] += 1
+
+    def stack(self, frame: FrameType | None) -> tuple[str, ...]:
+        stack = []
+        line = None
+        found = False
+        while frame is not None:
+            code = frame.f_code
+            if code is _CALL:
+                local = frame.f_locals
+                name = local["function"].declaration.name.lexeme
+                stack.append(self.label(name, line))
+                # The caller is on the line it called from
+                line = local["paren"].line
+                found = True
+            elif line is None:
+                name = _NODES.get(code)
+                if name is not None:
+                    found = True
+                    line = self.line(frame.f_locals.get(name))
+            frame = frame.f_back
+        if not found:
+            return (OUTSIDE,)
+        stack.append(self.label(SCRIPT, line))
+        stack.reverse()
+        return tuple(stack)
+
+    def label(self, name: str, line: int | None) -> str:
+        return name if line is None else f"{name}:{line}"
+
+    def line(self, node) -> int | None:
+        # First token in the node's subtree, found once per node
+        entry = self._lines.get(id(node))
+        if entry is not None and entry[0] is node:
+            return entry[1]
+        line = None
+        pending = [node]
+        while pending:
+            item = pending.pop()
+            if item.__class__ is Token:
+                line = item.line
+                break
+            if item.__class__ is tuple or item.__class__ is list:
+                pending.extend(reversed(item))
+            elif hasattr(item, "__dataclass_fields__"):
+                pending.extend(getattr(item, f.name) for f in reversed(fields(item)))
+        self._lines[id(node)] = (node, line)
+        return line
+
+    def collapsed(self) -> str:
+        # One "frame;frame;frame count" line per stack, the format
+        # flamegraph.pl, speedscope and inferno read
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in sorted(self.samples.items())
+        )
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as file:
+            file.write(self.collapsed())
+
+    def summary(self, top: int = 10) -> str:
+        total = sum(self.samples.values())
+        if not total:
+            return "No samples, the program ran for less than one interval.\n"
+        selfCounts: Counter[str] = Counter()
+        totalCounts: Counter[str] = Counter()
+        functions: Counter[str] = Counter()
+        for stack, count in self.samples.items():
+            selfCounts[stack[-1]] += count
+            # A recursive frame still counts once per sample. Outermost
+            # first, so ties are listed callers first.
+            for frame in dict.fromkeys(stack):
+                totalCounts[frame] += count
+            for function in dict.fromkeys(frame.partition(":")[0] for frame in stack):
+                functions[function] += count
+        lines = [
+            f"{total} samples, {self.interval * 1000:g} ms of CPU time apart",
+            f"{'self':>7} {'total':>7}  line",
+        ]
+        for frame, count in selfCounts.most_common(top):
+            lines.append(
+                f"{count / total:7.1%} {totalCounts[frame] / total:7.1%}  {frame}"
+            )
+        lines.append(f"{'total':>15}  function")
+        for function, count in functions.most_common(top):
+            lines.append(f"{count / total:15.1%}  {function}")
+        return "\n".join(lines) + "\n"
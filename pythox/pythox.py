@@ -1,9 +1,19 @@
 import os
 import sys
+from typing import Iterable, Iterator
 
+from . import astCache, bench
+from .bytecode import CompileError
 from .scanner import Scanner
 from .parser import Parser
 from .interpreter import Interpreter
+from .optimizer import Optimizer
+from .output import OutputSink
+from .profiler import Profiler
+from .stats import RunStats
+from .stmt import Stmt
+from .transpiler import PythonInterpreter, compile_program
+from .vm import VM
 
 fancyPrompt: bool = True
 try:
@@ -16,16 +26,105 @@ except ModuleNotFoundError:
     fancyPrompt = False
 
 
+# Execution engines selectable with --backend=NAME, all share the
+# Interpreter(output_writer).interpret(statements) contract
+BACKENDS = {
+    "tree": Interpreter,
+    "closures": lambda output: Interpreter(output, closures=True),
+    "quicken": lambda output: Interpreter(output, quicken=True),
+    "vm": VM,
+    "python": PythonInterpreter,
+}
+# Backends that run statements through Interpreter.execute: --profile
+# samples their Lox call stacks, --stats counts their statements
+TREE_BACKENDS = ("tree", "closures", "quicken")
+
+
+def remembered(statements: Iterable[Stmt], ran: list[Stmt]) -> Iterator[Stmt]:
+    # Streams statements through, appending each one to ran as it goes
+    for stmt in statements:
+        ran.append(stmt)
+        yield stmt
+
+
 class Pythox:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        stream: bool = False,
+        cache: bool = True,
+        optimize: bool = True,
+        backend: str = "tree",
+        explicitStack: bool = False,
+        profile: str | None = None,
+        stats: str | None = None,
+    ) -> None:
         self.hadError: bool = False
+        # Scan, parse and execute one top-level statement at a time
+        self.stream: bool = stream
+        # Reuse the parsed AST from __pycache__ when the script is unchanged
+        self.cache: bool = cache
+        # Constant folding / Grouping elimination before execution
+        self.optimize: bool = optimize
+        self.foldedNodes: int = 0
+        self.backend: str = backend
+        # Parse, and evaluate with the tree backend, on work stacks instead
+        # of recursion so deeply nested expressions don't crash
+        self.explicitStack: bool = explicitStack
+        # Sample the script's Lox call stacks and write them here in
+        # collapsed form, "" for <script name>.folded
+        self.profile: str | None = profile
+        # Report each phase's cost to stderr after the script ran, "text"
+        # or "json"
+        self.stats: str | None = stats
+        # Every backend prints through one buffered sink on stdout
+        self.output: OutputSink = OutputSink.stdout()
+        # The REPL's interpreter and optimizer, kept across lines so each
+        # line sees earlier definitions and nothing is rebuilt per line
+        self.session: Interpreter | None = None
+        self.sessionOptimizer: Optimizer | None = None
 
     def main(self) -> None:
-        if len(sys.argv) > 2:
-            print("Usage: pythox [script]")
+        if sys.argv[1:2] == ["bench"]:
+            sys.exit(bench.main(sys.argv[2:]))
+        args: list[str] = []
+        for arg in sys.argv[1:]:
+            if arg == "--stream":
+                self.stream = True
+            elif arg == "--no-cache":
+                self.cache = False
+            elif arg == "--no-optimize":
+                self.optimize = False
+            elif arg == "--explicit-stack":
+                self.explicitStack = True
+            elif arg in ("--stats", "--stats=text", "--stats=json"):
+                self.stats = arg[8:] or "text"
+            elif arg == "--profile":
+                self.profile = ""
+            elif arg.startswith("--profile="):
+                self.profile = arg[10:]
+            elif arg.startswith("--backend=") and arg[10:] in BACKENDS:
+                self.backend = arg[10:]
+            else:
+                args.append(arg)
+
+        profileUsage = self.profile is not None and (
+            len(args) != 1 or self.backend not in TREE_BACKENDS
+        )
+        profileUsage |= self.stats is not None and len(args) != 1
+        if len(args) > 1 or any(arg.startswith("--") for arg in args) or profileUsage:
+            print(
+                "Usage: pythox [--stream] [--no-cache] [--no-optimize]"
+                f" [--backend={'|'.join(BACKENDS)}] [--explicit-stack] [script]\n"
+                "       pythox --stats[=text|json] [options] script\n"
+                "       pythox bench [--help]\n"
+                "       pythox --profile[=FILE]"
+                f" [--backend={'|'.join(TREE_BACKENDS)}] [options] script"
+            )
             sys.exit(64)
-        elif len(sys.argv) == 2:
-            self.runFile(sys.argv[1])
+        elif self.profile is not None:
+            self.runProfiled(args[0])
+        elif len(args) == 1:
+            self.runFile(args[0])
         elif fancyPrompt:
             self.runFancyPrompt()
         else:
@@ -35,11 +134,33 @@ class Pythox:
         # TODO: Add error handling
         with open(filepath, "r") as file:
             src = file.read()
-            self.run(src)
+            if self.stats is not None:
+                stats = self.measure(src)
+                report = stats.json() + "\n" if self.stats == "json" else stats.text()
+                print(report, end="", file=sys.stderr)
+            elif self.cache and not self.stream:
+                self.runCached(filepath, src)
+            else:
+                self.run(src)
             if self.hadError:
                 sys.exit(65)
 
+    def runProfiled(self, filepath: str) -> None:
+        path = self.profile
+        if not path:
+            path = os.path.splitext(os.path.basename(filepath))[0] + ".folded"
+        profiler = Profiler()
+        try:
+            with profiler:
+                self.runFile(filepath)
+        finally:
+            self.output.flush()
+            profiler.write(path)
+            print(profiler.summary(), end="", file=sys.stderr)
+            print(f"Collapsed stacks written to {path}", file=sys.stderr)
+
     def runPrompt(self) -> None:
+        self.startSession()
         while True:
             try:
                 try:
@@ -57,6 +178,7 @@ class Pythox:
         console = Console()
         history_path = os.path.expanduser("./.pythox_history")
         session = PromptSession(">>> ", history=FileHistory(history_path))
+        self.startSession()
 
         while True:
             try:
@@ -75,20 +197,158 @@ class Pythox:
                 console.print(f"[bold red]Unhandled Error:[/bold red] {e}")
 
     def run(self, source: str) -> None:
-        lexer = Scanner(source)
-        tokens = lexer.scanTokens()
+        if self.stream:
+            self.runStream(source)
+            return
 
-        parser = Parser(tokens)
-        statements = parser.parse()
+        statements = self.parse(source)
         if statements is None:
             return
 
-        interpreter = Interpreter()
-        interpreter.interpret(statements)
+        self.execute(statements)
 
         # print(print_ast(expression))
         # print(*tokens, sep='\n---xxx---\n\n')
 
+    def runCached(self, filepath: str, source: str) -> None:
+        # The python backend caches the finished code object, a hit skips
+        # scanning, parsing and compiling altogether
+        variant = "optimize" if self.optimize else ""
+        if self.backend == "python":
+            code = astCache.load_code(filepath, source, variant)
+            if code is not None:
+                PythonInterpreter(self.output.write).run(code)
+                return
+
+        cacheable = True
+        statements = astCache.load(filepath, source)
+        if statements is None:
+            lexer = Scanner(source)
+            statements = self.parse(source, lexer)
+            if statements is None:
+                return
+            # Scan errors are only printed, a cache hit would swallow them
+            cacheable = not lexer.hadError
+            if cacheable:
+                astCache.store(filepath, source, statements)
+
+        if self.backend == "python":
+            if self.optimize:
+                optimizer = Optimizer()
+                statements = list(optimizer.optimize(statements))
+                self.foldedNodes += optimizer.removed
+            interpreter = PythonInterpreter(self.output.write)
+            if not interpreter.resolveAll(statements):
+                self.hadError = True
+                return
+            try:
+                code = compile_program(statements, filepath, interpreter)
+            except CompileError as e:
+                self.hadError = True
+                print(e)
+                return
+            if cacheable:
+                astCache.store_code(filepath, source, code, variant)
+            interpreter.run(code)
+            return
+
+        self.execute(statements)
+
+    def measure(
+        self, source: str, traceMemory: bool = True, countStatements: bool = True
+    ) -> RunStats:
+        # run() one phase at a time, without streaming or the AST cache so
+        # every phase actually happens
+        stats = RunStats(traceMemory)
+        with stats.phase("scan"):
+            tokens = Scanner(source).scanTokens()
+        stats.tokens = len(tokens)
+        with stats.phase("parse"):
+            parser = Parser(tokens, pratt=True, explicitStack=self.explicitStack)
+            statements = parser.parse()
+        if statements is None:
+            self.hadError = True
+            return stats
+        stats.countNodes(statements)
+
+        if self.optimize:
+            with stats.phase("optimize"):
+                optimizer = Optimizer()
+                statements = list(optimizer.optimize(statements))
+            stats.folded = optimizer.removed
+            self.foldedNodes += optimizer.removed
+
+        interpreter = self.interpreter()
+        with stats.phase("interpret"):
+            if countStatements and self.backend in TREE_BACKENDS:
+                with stats.countStatements():
+                    interpreter.interpret(statements)
+            else:
+                interpreter.interpret(statements)
+        if interpreter.hadError:
+            self.hadError = True
+        return stats
+
+    def startSession(self) -> None:
+        self.session = self.interpreter()
+        self.sessionOptimizer = Optimizer() if self.optimize else None
+
+    def interpreter(self) -> Interpreter:
+        if self.explicitStack and self.backend == "tree":
+            return Interpreter(self.output.write, explicitStack=True)
+        return BACKENDS[self.backend](self.output.write)
+
+    def execute(self, statements: Iterable[Stmt]) -> None:
+        optimizer = None
+        if self.optimize:
+            optimizer = self.sessionOptimizer or Optimizer()
+            removed = optimizer.removed
+            folded = optimizer.optimize(statements)
+            # Keep a list a list, the vm compiles those in one go
+            statements = list(folded) if isinstance(statements, list) else folded
+
+        interpreter = self.session
+        ran = []
+        if interpreter is None:
+            interpreter = self.interpreter()
+        else:
+            # An earlier line's error doesn't stop this one
+            interpreter.hadError = False
+            if isinstance(statements, list):
+                ran = statements
+            else:
+                statements = remembered(statements, ran)
+        interpreter.interpret(statements)
+        # Resolution errors are compile errors, exit like a parse error
+        if interpreter.hadError:
+            self.hadError = True
+        # The session only needs what the line declared, not the line
+        for stmt in ran:
+            interpreter.forget(stmt)
+        if optimizer is not None:
+            self.foldedNodes += optimizer.removed - removed
+
+    def parse(self, source: str, lexer: Scanner | None = None) -> list[Stmt] | None:
+        if lexer is None:
+            lexer = Scanner(source)
+        tokens = lexer.scanTokens()
+
+        parser = Parser(tokens, pratt=True, explicitStack=self.explicitStack)
+        statements = parser.parse()
+        if statements is None:
+            self.hadError = True
+        return statements
+
+    def runStream(self, source: str) -> None:
+        lexer = Scanner(source, bulk=True)
+        parser = Parser(
+            lexer.iterTokens(), pratt=True, explicitStack=self.explicitStack
+        )
+
+        self.execute(parser.parseStream())
+        if parser.hadError:
+            self.hadError = True
+
     def error(self, line: int, message: str):
         self.report(line, "", message)
 
@@ -0,0 +1,210 @@
+from typing import Iterable
+
+from .expr import *
+from .stmt import *
+from .ttoken import Token
+
+
+class Resolver:
+    """
+    Static pass that gives every local variable a (depth, slot) pair.
+
+    depth is how many scopes out from the use the variable lives, slot its
+    index in that scope's frame. The pairs are handed to the interpreter,
+    which then reads and writes locals by index instead of by name.
+    Everything else is a global, and gets an inline cache for its cell.
+
+    A function body is one scope, parameters first, and a method's scope
+    starts with `this` ahead of them. Its frame is reported as captured
+    when any function is declared inside it, since that closure keeps
+    the frame alive past the call. A subclass's methods close over one
+    more scope, holding just `super`.
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        # Innermost last, name -> [slot, defined]
+        self.scopes: list[dict[str, list]] = []
+        # Enclosing functions, innermost last, each [captured, kind]
+        self.functions: list[list] = []
+        # Enclosing classes, innermost last, "class" or "subclass"
+        self.classes: list[str] = []
+        self.hadError = False
+
+    def resolve(self, statements: Iterable[Stmt]) -> None:
+        for stmt in statements:
+            self.statement(stmt)
+
+    def statement(self, stmt: Stmt) -> None:
+        match stmt:
+            case Block(statements):
+                self.scopes.append({})
+                self.resolve(statements)
+                self.interpreter.resolveFrame(stmt, len(self.scopes.pop()))
+
+            case Var(name, initializer):
+                self.declare(stmt, name)
+                if initializer is not None:
+                    self.expression(initializer)
+                self.define(name)
+
+            case Function(name, params, body):
+                # Defined before the body, so it can call itself
+                self.declare(stmt, name)
+                self.define(name)
+                self.function(stmt, "function")
+
+            case Class(name, superclass, methods):
+                self.declare(stmt, name)
+                self.define(name)
+                self.classes.append("class")
+                if superclass is not None:
+                    if superclass.name.lexeme == name.lexeme:
+                        self.error(
+                            superclass.name, "A class can't inherit from itself."
+                        )
+                    self.expression(superclass)
+                    self.classes[-1] = "subclass"
+                    # Methods close over a one-slot frame holding the superclass
+                    self.scopes.append({"super": [0, True]})
+                for method in methods:
+                    kind = "initializer" if method.name.lexeme == "init" else "method"
+                    self.function(method, kind)
+                if superclass is not None:
+                    self.scopes.pop()
+                self.classes.pop()
+
+            case If(condition, thenBranch, elseBranch):
+                self.expression(condition)
+                self.statement(thenBranch)
+                if elseBranch is not None:
+                    self.statement(elseBranch)
+
+            case Return(keyword, value):
+                if not self.functions:
+                    self.error(keyword, "Can't return from top-level code.")
+                if value is not None:
+                    if self.functions and self.functions[-1][1] == "initializer":
+                        self.error(
+                            keyword, "Can't return a value from an initializer."
+                        )
+                    self.expression(value)
+
+            case Expression(expression) | Print(expression):
+                self.expression(expression)
+
+            case While(condition, body):
+                self.expression(condition)
+                self.statement(body)
+
+    def expression(self, expr: Expr) -> None:
+        # A work stack instead of recursion, generated code can nest
+        # expressions far deeper than the Python stack goes. Children are
+        # pushed last-first so they're visited, and report errors, in
+        # source order.
+        work = [expr]
+        while work:
+            expr = work.pop()
+            match expr:
+                case Variable(name):
+                    if self.scopes:
+                        local = self.scopes[-1].get(name.lexeme)
+                        if local is not None and not local[1]:
+                            self.error(
+                                name,
+                                "Can't read local variable in its own initializer.",
+                            )
+                    self.resolveLocal(expr, name)
+
+                case Assign(name, value):
+                    self.resolveLocal(expr, name)
+                    work.append(value)
+
+                case Binary(left, _, right) | Logical(left, _, right):
+                    work.append(right)
+                    work.append(left)
+
+                case Call(callee, _, arguments):
+                    work.extend(reversed(arguments))
+                    work.append(callee)
+
+                case Get(object, _):
+                    self.interpreter.resolveProperty(expr)
+                    work.append(object)
+
+                case Set(object, _, value):
+                    self.interpreter.resolveProperty(expr)
+                    work.append(object)
+                    work.append(value)
+
+                case This(keyword):
+                    if not self.classes:
+                        self.error(keyword, "Can't use 'this' outside of a class.")
+                        continue
+                    self.resolveLocal(expr, keyword)
+
+                case Super(keyword, _):
+                    if not self.classes:
+                        self.error(keyword, "Can't use 'super' outside of a class.")
+                        continue
+                    if self.classes[-1] != "subclass":
+                        self.error(
+                            keyword, "Can't use 'super' in a class with no superclass."
+                        )
+                        continue
+                    self.resolveLocal(expr, keyword)
+
+                case Grouping(expression):
+                    work.append(expression)
+
+                case Unary(_, right):
+                    work.append(right)
+
+                case Ternary(left, _, middle, _, right):
+                    work.append(right)
+                    work.append(middle)
+                    work.append(left)
+
+    def function(self, stmt: Function, kind: str) -> None:
+        for enclosing in self.functions:
+            enclosing[0] = True
+        self.functions.append([False, kind])
+        self.scopes.append({})
+        if kind != "function":
+            self.scopes[-1]["this"] = [0, True]
+        for param in stmt.params:
+            self.declare(None, param)
+            self.define(param)
+        self.resolve(stmt.body)
+        size = len(self.scopes.pop())
+        captured, _ = self.functions.pop()
+        self.interpreter.resolveFunction(stmt, size, captured)
+
+    def declare(self, stmt: Var | Function | None, name: Token) -> None:
+        # stmt is None for a parameter, its slot is its position
+        if not self.scopes:
+            return
+        scope = self.scopes[-1]
+        if name.lexeme in scope:
+            self.error(name, "Already a variable with this name in this scope.")
+            return
+        scope[name.lexeme] = [len(scope), False]
+        if stmt is not None:
+            self.interpreter.resolveDeclaration(stmt, scope[name.lexeme][0])
+
+    def define(self, name: Token) -> None:
+        if self.scopes and name.lexeme in self.scopes[-1]:
+            self.scopes[-1][name.lexeme][1] = True
+
+    def resolveLocal(self, expr: Expr, name: Token) -> None:
+        for depth, scope in enumerate(reversed(self.scopes)):
+            local = scope.get(name.lexeme)
+            if local is not None:
+                self.interpreter.resolve(expr, depth, local[0])
+                return
+        self.interpreter.resolveGlobal(expr)
+
+    def error(self, token: Token, message: str) -> None:
+        # Same shape as the parser's errors
+        print(f"[line {token.line}] Error at '{token.lexeme}': {message}")
+        self.hadError = True
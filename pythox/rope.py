@@ -0,0 +1,69 @@
+from .interning import intern
+
+# Concatenations shorter than this are just copied, a Rope only pays off
+# once the pieces get long
+ROPE_MIN = 128
+
+
+class Rope:
+    """
+    A Lox string built by `+`, kept as the two halves it was made from.
+
+    Concatenating is O(1) whatever the lengths, so a loop appending to a
+    string no longer copies everything built so far on each pass. The
+    text is only joined when something needs it (stringify, ==, hashing),
+    and that flat str replaces the tree so it happens once.
+    """
+
+    __slots__ = ("left", "right", "length", "flat")
+
+    def __init__(self, left: "str | Rope", right: "str | Rope", length: int):
+        self.left = left
+        self.right = right
+        self.length = length
+        self.flat: str | None = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __str__(self) -> str:
+        if self.flat is None:
+            # Iterative, s = s + x builds trees as deep as the loop ran
+            parts: list[str] = []
+            stack: list[str | Rope] = [self]
+            while stack:
+                node = stack.pop()
+                if node.__class__ is not Rope:
+                    parts.append(node)
+                elif node.flat is not None:
+                    parts.append(node.flat)
+                else:
+                    stack.append(node.right)
+                    stack.append(node.left)
+            self.flat = intern("".join(parts))
+            # Let go of the pieces, the flat copy has everything
+            self.left = self.right = None
+        return self.flat
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is Rope:
+            other = str(other)
+        return str(self) == other
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __repr__(self) -> str:
+        return f"Rope({str(self)!r})"
+
+
+# Every class a Lox string value can have
+STRINGS = (str, Rope)
+
+
+def concat(left: str | Rope, right: str | Rope) -> str | Rope:
+    length = len(left) + len(right)
+    if length < ROPE_MIN:
+        # Both halves are short, so both are plain str
+        return intern(left + right)
+    return Rope(left, right, length)
@@ -1,43 +1,202 @@
+import re
 import sys
-
-from .ttoken import Token, TokenType
+from typing import Iterator
+
+from .interning import intern
+from .ttoken import Token, TokenBuffer, TokenType
+
+
+# Master pattern for the bulk scanner. Anything it can't handle in one go
+# (block comments, unterminated strings, junk characters) falls through to
+# the char-by-char scanToken so errors stay exactly the same.
+_BULK_PATTERN = re.compile(
+    r"""
+    [ \t\r]*
+    (?:
+      (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<op>!=|==|<=|>=|[(){},.\-+;*!=<>?:]|/(?![/*]))
+    | (?P<number>[0-9]+(?:\.[0-9]+)?)
+    | (?P<ws>\n[ \t\r\n]*)
+    | (?P<string>"[^"]*")
+    | (?P<comment>//[^\n]*)
+    )
+    """,
+    re.VERBOSE,
+)
+
+_PUNCTUATORS: dict[str, TokenType] = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMICOLON,
+    "/": TokenType.SLASH,
+    "*": TokenType.STAR,
+    "?": TokenType.QUESTION,
+    ":": TokenType.COLON,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+}
+
+
+# Shared by every Scanner, a REPL makes one per line
+_KEYWORDS: dict[str, TokenType] = {
+    "and": TokenType.AND,
+    "class": TokenType.CLASS,
+    "else": TokenType.ELSE,
+    "false": TokenType.FALSE,
+    "fun": TokenType.FUN,
+    "for": TokenType.FOR,
+    "if": TokenType.IF,
+    "nil": TokenType.NIL,
+    "or": TokenType.OR,
+    "print": TokenType.PRINT,
+    "return": TokenType.RETURN,
+    "super": TokenType.SUPER,
+    "this": TokenType.THIS,
+    "true": TokenType.TRUE,
+    "var": TokenType.VAR,
+    "while": TokenType.WHILE,
+}
 
 
 class Scanner:
-    def __init__(self, source: str):
-        self.tokens: list[Token] = []
+    def __init__(self, source: str, bulk: bool = False, compact: bool = False):
+        self.bulk: bool = bulk
+        self.compact: bool = compact
+        self.hadError: bool = False
         self.start: int = 0
         self.current: int = 0
         self.line: int = 1
         self.column: int = 1
         self.source: str = source.strip()
-        self._keywords: dict[str, TokenType] = {
-            "and": TokenType.AND,
-            "class": TokenType.CLASS,
-            "else": TokenType.ELSE,
-            "false": TokenType.FALSE,
-            "fun": TokenType.FUN,
-            "for": TokenType.FOR,
-            "if": TokenType.IF,
-            "nil": TokenType.NIL,
-            "or": TokenType.OR,
-            "print": TokenType.PRINT,
-            "return": TokenType.RETURN,
-            "super": TokenType.SUPER,
-            "this": TokenType.THIS,
-            "true": TokenType.TRUE,
-            "var": TokenType.VAR,
-            "while": TokenType.WHILE,
-        }
-
-    def scanTokens(self) -> list:
+        self.tokens: list[Token] | TokenBuffer = (
+            TokenBuffer(self.source) if compact else []
+        )
+
+    def scanTokens(self) -> list[Token] | TokenBuffer:
+        if self.bulk:
+            return self.scanTokensBulk()
+
         while not self.isAtEnd():
             self.start = self.current
             self.scanToken()
 
-        self.tokens.append(Token(TokenType.EOF, "", None, self.line))
+        self.start = self.current
+        self.addToken(TokenType.EOF)
         return self.tokens
 
+    def scanTokensBulk(self) -> list[Token] | TokenBuffer:
+        for _ in self.bulkSteps():
+            pass
+        return self.tokens
+
+    def iterTokens(self) -> Iterator[Token]:
+        # Streaming flavour of scanTokens: tokens are handed out as soon as
+        # they are scanned and none are kept around
+        if self.compact:
+            raise ValueError("A compact TokenBuffer can't be streamed")
+
+        tokens = self.tokens
+        if self.bulk:
+            for _ in self.bulkSteps():
+                if tokens:
+                    yield from tokens
+                    tokens.clear()
+        else:
+            while not self.isAtEnd():
+                self.start = self.current
+                self.scanToken()
+                if tokens:
+                    yield from tokens
+                    tokens.clear()
+            self.start = self.current
+            self.addToken(TokenType.EOF)
+        yield from tokens
+        tokens.clear()
+
+    def bulkSteps(self) -> Iterator[None]:
+        # The bulk engine, yields after every step so iterTokens can drain
+        # self.tokens as it goes
+        source = self.source
+        end = len(source)
+        tokens = self.tokens
+        if self.compact:
+            add = tokens.add
+        else:
+            append = tokens.append
+
+            def add(tType, start, end, literal, line):
+                append(Token(tType, intern(source[start:end]), literal, line))
+
+        keywords = _KEYWORDS
+        punctuators = _PUNCTUATORS
+        finditer = _BULK_PATTERN.finditer
+        IDENTIFIER = TokenType.IDENTIFIER
+        NUMBER = TokenType.NUMBER
+        STRING = TokenType.STRING
+
+        pos = 0
+        line = self.line
+        # Column is only needed for error reports, so it is rebuilt from the
+        # last sync point whenever we hand over to scanToken. match() doesn't
+        # bump the column, so two-char operators only count as one.
+        syncPos, syncColumn, twoChars = 0, self.column, 0
+
+        while pos < end:
+            for m in finditer(source, pos):
+                if m.start() != pos:
+                    # Gap in the match stream, let the slow path deal with it
+                    break
+                kind = m.lastgroup
+                text = m.group(kind)
+                pos = m.end()
+                if kind == "ws":
+                    line += text.count("\n")
+                    syncPos = pos - len(text) + text.rindex("\n") + 1
+                    syncColumn, twoChars = 1, 0
+                    continue
+                elif kind == "ident":
+                    tType = keywords.get(text, IDENTIFIER)
+                    add(tType, pos - len(text), pos, None, line)
+                elif kind == "op":
+                    add(punctuators[text], pos - len(text), pos, None, line)
+                    if len(text) == 2:
+                        twoChars += 1
+                elif kind == "number":
+                    add(NUMBER, pos - len(text), pos, float(text), line)
+                elif kind == "string":
+                    line += text.count("\n")
+                    add(STRING, pos - len(text), pos, intern(text[1:-1]), line)
+                # comments are simply skipped
+                yield
+
+            if pos >= end:
+                break
+
+            self.start = self.current = pos
+            self.line = line
+            self.column = syncColumn + (pos - syncPos) - twoChars
+            self.scanToken()
+            pos = self.current
+            line = self.line
+            syncPos, syncColumn, twoChars = pos, self.column, 0
+            yield
+
+        self.start = self.current = pos
+        self.line = line
+        add(TokenType.EOF, pos, pos, None, line)
+
     def scanToken(self) -> None:
         c: str = self.advance()
         match c:
@@ -104,7 +263,8 @@ class Scanner:
                 else:
                     print(f"Unexpected token {c} on line: {self.line}", file=sys.stderr)
 
-                    print(self.printScanError(), file=sys.stderr)  # FIXME: Set hadError
+                    print(self.printScanError(), file=sys.stderr)
+                    self.hadError = True
 
     def string(self) -> None:
         while self.peek() != '"' and not self.isAtEnd():
@@ -114,12 +274,13 @@ class Scanner:
 
         if self.isAtEnd():
             print("Unterminated String", file=sys.stderr)
+            self.hadError = True
             return
 
         # Consume closing "
         self.advance()
 
-        value: str = self.source[self.start + 1 : self.current - 1]
+        value: str = intern(self.source[self.start + 1 : self.current - 1])
         self.addToken(TokenType.STRING, value)
 
     def number(self) -> None:
@@ -139,7 +300,7 @@ class Scanner:
 
         text: str = self.source[self.start : self.current]
         try:
-            type: TokenType = self._keywords[text]
+            type: TokenType = _KEYWORDS[text]
             self.addToken(TokenType(type))
         except KeyError:
             self.addToken(TokenType.IDENTIFIER)
@@ -157,6 +318,7 @@ class Scanner:
                 sep="\n",
                 file=sys.stderr,
             )
+            self.hadError = True
 
             return None
 
@@ -171,6 +333,7 @@ class Scanner:
                     sep="\n",
                     file=sys.stderr,
                 )
+                self.hadError = True
         else:
             print(
                 f"Unterminated comment on line: {self.line}",
@@ -178,6 +341,7 @@ class Scanner:
                 sep="\n",
                 file=sys.stderr,
             )
+            self.hadError = True
 
     def advance(self) -> str:
         self.current += 1
@@ -185,7 +349,13 @@ class Scanner:
         return self.source[self.current - 1]
 
     def addToken(self, type: TokenType, literal: object = None):
-        text: str = self.source[self.start : self.current]
+        if self.compact:
+            self.tokens.add(
+                TokenType(type), self.start, self.current, literal, self.line
+            )
+            return
+        # Every `x` in the program shares one lexeme object
+        text: str = intern(self.source[self.start : self.current])
         self.tokens.append(Token(TokenType(type), text, literal, self.line))
 
     def isAtEnd(self) -> bool:
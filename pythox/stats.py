@@ -0,0 +1,167 @@
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import fields
+from typing import Iterable, Iterator
+
+from .closureCompiler import STATEMENT_CODES
+from .expr import Expr
+from .interpreter import Interpreter
+from .stmt import Stmt
+
+_RUN = Interpreter.run.__code__
+_EXECUTE = Interpreter.execute.__code__
+_STATEMENTS = (_RUN, _EXECUTE, *STATEMENT_CODES)
+# sys.monitoring tool IDs to count statements under, first free one wins.
+# 3 and 4 have no predefined owner, for when a profiler already holds its ID.
+_UNASSIGNED_TOOL_IDS = (3, 4)
+_TOOL_IDS = (sys.monitoring.PROFILER_ID, *_UNASSIGNED_TOOL_IDS)
+_TOOL_NAME = "pythox stats"
+
+
+def _claimTool() -> int | None:
+    for tool in _TOOL_IDS:
+        try:
+            sys.monitoring.use_tool_id(tool, _TOOL_NAME)
+        except ValueError:
+            # Already in use by another tool
+            continue
+        return tool
+    return None
+
+
+class Phase:
+    """Wall and CPU seconds one phase took, and the memory it peaked at."""
+
+    __slots__ = ("name", "wall", "cpu", "peakMemory")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall: float = 0.0
+        self.cpu: float = 0.0
+        # Bytes allocated on top of what was live when the phase started,
+        # None when memory wasn't traced
+        self.peakMemory: int | None = None
+
+
+class RunStats:
+    """
+    What one run of a script cost, phase by phase.
+
+    Phases are timed by phase() around the pipeline's own calls. With
+    traceMemory, tracemalloc runs during each phase and is stopped in
+    between; it slows the traced code down, the times include that.
+    Statements are counted by countStatements() through sys.monitoring,
+    so neither the interpreter nor the closures it compiles are touched.
+    """
+
+    def __init__(self, traceMemory: bool = True):
+        self.traceMemory = traceMemory
+        self.phases: list[Phase] = []
+        self.tokens: int = 0
+        # AST node class name -> count, as parsed
+        self.nodes: Counter[str] = Counter()
+        # AST nodes the optimizer removed, None when it didn't run
+        self.folded: int | None = None
+        # None when the backend doesn't run statements through execute()
+        self.statements: int | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Phase]:
+        phase = Phase(name)
+        self.phases.append(phase)
+        if self.traceMemory:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield phase
+        finally:
+            phase.wall = time.perf_counter() - wall
+            phase.cpu = time.process_time() - cpu
+            if self.traceMemory:
+                phase.peakMemory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    def countNodes(self, statements: Iterable[Stmt]) -> None:
+        pending = list(statements)
+        while pending:
+            item = pending.pop()
+            if isinstance(item, (Expr, Stmt)):
+                self.nodes[item.__class__.__name__] += 1
+                pending.extend(getattr(item, f.name) for f in fields(item))
+            elif item.__class__ is list:
+                pending.extend(item)
+
+    @contextmanager
+    def countStatements(self) -> Iterator[None]:
+        # Every top-level statement passes through run(), nested ones
+        # through execute() or, compiled, their closure. Either called
+        # straight from run() is the same statement again.
+        monitoring = sys.monitoring
+        tool = _claimTool()
+        if tool is None:
+            # Every tool slot is taken, e.g. by a debugger and a coverage
+            # run at once
+            yield
+            return
+        self.statements = 0
+        getframe = sys._getframe
+
+        def started(code, offset):
+            if code is _RUN or getframe(1).f_back.f_code is not _RUN:
+                self.statements += 1
+
+        monitoring.register_callback(tool, monitoring.events.PY_START, started)
+        for code in _STATEMENTS:
+            monitoring.set_local_events(tool, code, monitoring.events.PY_START)
+        try:
+            yield
+        finally:
+            for code in _STATEMENTS:
+                monitoring.set_local_events(tool, code, 0)
+            monitoring.register_callback(tool, monitoring.events.PY_START, None)
+            monitoring.free_tool_id(tool)
+
+    def asDict(self) -> dict:
+        return {
+            "phases": {
+                phase.name: {
+                    "wall": phase.wall,
+                    "cpu": phase.cpu,
+                    "peakMemory": phase.peakMemory,
+                }
+                for phase in self.phases
+            },
+            "tokens": self.tokens,
+            "nodes": dict(sorted(self.nodes.items())),
+            "folded": self.folded,
+            "statements": self.statements,
+        }
+
+    def json(self) -> str:
+        return json.dumps(self.asDict(), indent=2)
+
+    def text(self) -> str:
+        lines = [f"{'phase':<10} {'wall ms':>10} {'cpu ms':>10} {'peak kB':>10}"]
+        for phase in self.phases:
+            memory = "-"
+            if phase.peakMemory is not None:
+                memory = f"{phase.peakMemory / 1e3:.1f}"
+            lines.append(
+                f"{phase.name:<10} {phase.wall * 1000:>10.2f} "
+                f"{phase.cpu * 1000:>10.2f} {memory:>10}"
+            )
+        lines.append(f"tokens: {self.tokens}")
+        lines.append(f"AST nodes: {sum(self.nodes.values())}")
+        for name, count in self.nodes.most_common():
+            lines.append(f"  {name}: {count}")
+        folded = "-" if self.folded is None else self.folded
+        lines.append(f"AST nodes folded: {folded}")
+        statements = "-" if self.statements is None else self.statements
+        lines.append(f"statements executed: {statements}")
+        if self.traceMemory:
+            lines.append("(times include tracemalloc's overhead)")
+        return "\n".join(lines) + "\n"
@@ -1,17 +1,64 @@
 from dataclasses import dataclass
 
 from .expr import Expr
+from .ttoken import Token
 
 
 class Stmt:
     pass
 
 
+@dataclass(frozen=True, slots=True)
+class Block(Stmt):
+    statements: list[Stmt]
+    # The closing '}', None for the Blocks for loops desugar into
+    brace: Token | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Class(Stmt):
+    name: Token
+    superclass: Expr
+    methods: list[Stmt]
+
+
 @dataclass(frozen=True, slots=True)
 class Expression(Stmt):
     expression: Expr
 
 
+@dataclass(frozen=True, slots=True)
+class Function(Stmt):
+    name: Token
+    params: list[Token]
+    body: list[Stmt]
+
+
+@dataclass(frozen=True, slots=True)
+class If(Stmt):
+    condition: Expr
+    thenBranch: Stmt
+    elseBranch: Stmt
+
+
 @dataclass(frozen=True, slots=True)
 class Print(Stmt):
     expression: Expr
+
+
+@dataclass(frozen=True, slots=True)
+class Return(Stmt):
+    keyword: Token
+    value: Expr
+
+
+@dataclass(frozen=True, slots=True)
+class Var(Stmt):
+    name: Token
+    initializer: Expr
+
+
+@dataclass(frozen=True, slots=True)
+class While(Stmt):
+    condition: Expr
+    body: Stmt
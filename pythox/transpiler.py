@@ -0,0 +1,866 @@
+import math
+import sys
+from types import CodeType, FunctionType
+from typing import Iterable
+
+from .bytecode import CompileError, firstLine
+from .expr import *
+from .stmt import *
+from .ttoken import Token, TokenType
+from .interpreter import (
+    BoundMethod,
+    GlobalSite,
+    Interpreter,
+    LoxClass,
+    LoxInstance,
+    RuntimeError_,
+    SuperSite,
+)
+
+# Name of the function the whole program is compiled into, so temporaries
+# are fast locals instead of dict lookups
+MAIN = "__lox_main__"
+
+# Python frames a call can stack on top of the deepest Lox call: _call,
+# callValue, callNative and the native itself. Calling a class runs its
+# init from _call, so each constructor call takes one extra frame.
+HELPER_FRAMES = 4
+
+
+# Operator tokens are baked into the code as (type name, lexeme, line)
+# constants and only turned back into a Token when an error is raised
+def _token(token: tuple[str, str, int]) -> Token:
+    name, lexeme, line = token
+    return Token(TokenType[name], lexeme, None, line)
+
+
+def _add(a, b, token: tuple[str, str, int]):
+    # Only reached when the float + float fast path didn't apply
+    if isinstance(a, str) and isinstance(b, str):
+        return a + b
+    if isinstance(a, float) and isinstance(b, float):
+        return a + b
+    raise RuntimeError_(_token(token), "Operands must be two numbers or two strings")
+
+
+def _numbers(token: tuple[str, str, int]):
+    raise RuntimeError_(_token(token), "Operands must be numbers.")
+
+
+def _divide(a, b, token: tuple[str, str, int]):
+    if not (isinstance(a, float) and isinstance(b, float)):
+        raise RuntimeError_(_token(token), "Operands must be numbers.")
+    if b == 0.0:
+        raise RuntimeError_(_token(token), "Division by zero.")
+    return a / b
+
+
+def _undefined(error: NameError, lines: dict[str, int]):
+    # A statement read a global before it was defined. lines has the
+    # line of the first read of every global the statement reads.
+    line = lines.get(error.name)
+    if line is None:
+        return error
+    name = error.name[2:]
+    token = Token(TokenType.IDENTIFIER, name, None, line)
+    return RuntimeError_(token, f"Undefined variable '{name}'.")
+
+
+def _overflow(token: tuple[str, str, int]):
+    return RuntimeError_(_token(token), "Stack overflow.")
+
+
+def _superclass(token: tuple[str, str, int]):
+    return RuntimeError_(_token(token), "Superclass must be a class.")
+
+
+def _get(instance, name: str, token: tuple[str, str, int]):
+    # Only reached when the field fast path didn't apply
+    if instance.__class__ is not LoxInstance:
+        raise RuntimeError_(_token(token), "Only instances have properties.")
+    slot = instance.shape.fields.get(name)
+    if slot is not None:
+        return instance.values[slot]
+    method = instance.klass.methods.get(name)
+    if method is None:
+        raise RuntimeError_(_token(token), f"Undefined property '{name}'.")
+    return BoundMethod(instance, method)
+
+
+def _instance(instance, token: tuple[str, str, int]):
+    # A Set checks its object before the value is evaluated
+    if instance.__class__ is not LoxInstance:
+        raise RuntimeError_(_token(token), "Only instances have fields.")
+    return instance
+
+
+def _set(instance: LoxInstance, name: str, value):
+    slot = instance.shape.fields.get(name)
+    if slot is None:
+        instance.shape = instance.shape.adding(name)
+        instance.values.append(value)
+    else:
+        instance.values[slot] = value
+    return value
+
+
+def _super(superclass: LoxClass, receiver, name: str, token: tuple[str, str, int]):
+    method = superclass.methods.get(name)
+    if method is None:
+        raise RuntimeError_(_token(token), f"Undefined property '{name}'.")
+    return BoundMethod(receiver, method)
+
+
+# Arithmetic/comparison operators that only take two numbers
+_NUMERIC_OPS: dict[TokenType, str] = {
+    TokenType.MINUS: "-",
+    TokenType.STAR: "*",
+    TokenType.GREATER: ">",
+    TokenType.GREATER_EQUAL: ">=",
+    TokenType.LESS: "<",
+    TokenType.LESS_EQUAL: "<=",
+}
+
+_EQUALITY = frozenset((TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL))
+
+# Operators whose result is always a bool, so it needs no truthiness test
+_BOOLEAN = frozenset(
+    (
+        *_EQUALITY,
+        TokenType.GREATER,
+        TokenType.GREATER_EQUAL,
+        TokenType.LESS,
+        TokenType.LESS_EQUAL,
+    )
+)
+
+# Operator nesting past which a statement is lowered to one assignment per
+# operator, CPython refuses to compile more than 200 nested parentheses
+INLINE_DEPTH = 40
+
+
+def nesting(expr: Expr) -> int:
+    match expr:
+        case Grouping(expression):
+            return nesting(expression)
+        case Unary(_, right):
+            return 1 + nesting(right)
+        case Binary(left, _, right):
+            return 1 + max(nesting(left), nesting(right))
+        case Assign(_, value):
+            return 1 + nesting(value)
+        case Call(callee, _, arguments):
+            return 1 + max([nesting(callee), *map(nesting, arguments)])
+        case Get(object, _):
+            return 1 + nesting(object)
+        case Set(object, _, value):
+            return 1 + max(nesting(object), nesting(value))
+    return 0
+
+
+def isBoolean(expr: Expr) -> bool:
+    match expr:
+        case Grouping(expression):
+            return isBoolean(expression)
+        case Unary(operator, _):
+            return operator.tType is TokenType.BANG
+        case Binary(_, operator, _):
+            return operator.tType in _BOOLEAN
+        case Literal(value):
+            return value is True or value is False
+    return False
+
+
+def declaresFunction(statements: Iterable[Stmt]) -> bool:
+    pending = list(statements)
+    while pending:
+        match pending.pop():
+            case Function() | Class():
+                return True
+            case Block(statements):
+                pending.extend(statements)
+            case If(_, thenBranch, elseBranch):
+                pending.append(thenBranch)
+                if elseBranch is not None:
+                    pending.append(elseBranch)
+            case While(_, body):
+                pending.append(body)
+    return False
+
+
+class Transpiler:
+    """
+    Translates the Lox AST into Python source.
+
+    Every operator gets an inline float fast path and falls back to a
+    helper that reproduces the interpreter's checks and RuntimeError_
+    messages. Operand temporaries are named after the nesting depth, so a
+    nested expression can't clobber its parent's operands.
+
+    Variables come from the Resolver's tables. A global `x` is the Python
+    global `G_x`, every local declaration gets a local of its own named
+    `L_x_<n>`, and a Lox function is a def, so closures are Python
+    closures. A block inside a loop that declares a function is a def of
+    its own too, called once per iteration, so each closure keeps that
+    iteration's variables like a fresh Lox frame would. A statement that
+    reads a global or makes a call is wrapped in a try that turns
+    NameError and RecursionError into the interpreter's runtime errors.
+
+    Classes are the interpreter's LoxClass and instances its LoxInstance,
+    so fields live in shapes the same way. A method is a def that takes
+    `this` first, an init returns it, and a subclass's methods close over
+    a local holding the superclass for `super`.
+    """
+
+    def __init__(self, interpreter: Interpreter | None = None):
+        self.interpreter = interpreter
+        # (Lox line, indented Python line) for the body of MAIN
+        self.body: list[tuple[int, str]] = []
+        self.indent: str = "    "
+        # Line of the statement being compiled
+        self.line: int = 1
+        # Per enclosing def, innermost last: the globals it assigns and the
+        # locals of enclosing defs it assigns
+        self.defs: list[tuple[set[str], set[str]]] = []
+        # Per enclosing Lox scope, innermost last: the index of the def it
+        # lives in, and the Python name of each of its slots
+        self.scopes: list[tuple[int, list[str | None]]] = []
+        # Counter for unique local and def names
+        self.names: int = 0
+        # Whiles around the code being compiled, in the current def
+        self.loops: int = 0
+        # Block defs between the code being compiled and its function
+        self.blocks: int = 0
+        self.inFunction: bool = False
+        # Python name of `this` while compiling an init, which returns it
+        self.initializer: str | None = None
+        # The statement being compiled: the globals it reads, with the line
+        # of the first read, and its first call's token
+        self.reads: dict[str, int] = {}
+        self.call: str | None = None
+
+    def program(self, statements: Iterable[Stmt]) -> str:
+        self.defs.append((set(), set()))
+        for stmt in statements:
+            self.statement(stmt)
+        self.declarations(0)
+        body = [line for _, line in self.body] or ["    pass"]
+        return "\n".join([f"def {MAIN}():"] + body) + "\n"
+
+    def lineAt(self, lineno: int) -> int:
+        # Lox line of a line of program()'s source, MAIN's def is line 1
+        if 2 <= lineno < len(self.body) + 2:
+            return self.body[lineno - 2][0]
+        return self.line
+
+    def emit(self, code: str) -> None:
+        self.body.append((self.line, self.indent + code))
+
+    def resolved(self) -> Interpreter:
+        if self.interpreter is None:
+            raise CompileError(self.line, "Can't compile unresolved statements.")
+        return self.interpreter
+
+    def statement(self, stmt: Stmt) -> None:
+        line = firstLine(stmt)
+        if line is not None:
+            self.line = line
+        reads, call = self.reads, self.call
+        self.reads, self.call = {}, None
+        start = len(self.body)
+        try:
+            self.compile(stmt)
+            self.guard(start)
+        finally:
+            self.reads, self.call = reads, call
+
+    def compile(self, stmt: Stmt) -> None:
+        match stmt:
+            case Expression(expression):
+                self.emit(self.value(expression))
+            case Print(expression):
+                value = self.value(expression)
+                self.emit(f"_write(_stringify({value}) + '\\n')")
+            case Var(name, initializer):
+                value = "None"
+                if initializer is not None:
+                    value = self.value(initializer)
+                self.emit(f"{self.declare(stmt, name)} = {value}")
+            case Block(statements):
+                self.block(stmt, statements)
+            case If(condition, thenBranch, elseBranch):
+                self.emit(f"if {self.test(condition)}:")
+                self.suite(thenBranch)
+                if elseBranch is not None:
+                    self.emit("else:")
+                    self.suite(elseBranch)
+            case While(condition, body):
+                self.loops += 1
+                if nesting(condition) <= INLINE_DEPTH:
+                    self.emit(f"while {self.test(condition)}:")
+                    self.suite(body)
+                else:
+                    # The lowered condition has to run on every iteration
+                    self.emit("while True:")
+                    indent = self.indent
+                    self.indent += "    "
+                    self.emit(f"if not {self.test(condition)}:")
+                    self.emit("    break")
+                    self.statement(body)
+                    self.indent = indent
+                self.loops -= 1
+            case Return(_, value):
+                value = "None" if value is None else self.value(value)
+                if self.initializer is not None:
+                    value = self.initializer
+                # Out of a block def, the tuple tells its caller to return
+                self.emit(f"return ({value},)" if self.blocks else f"return {value}")
+            case Function():
+                self.closure(stmt, self.declare(stmt, stmt.name))
+            case Class():
+                self.klass(stmt)
+            case _:
+                raise CompileError(self.line, f"Can't compile {type(stmt).__name__}.")
+
+    def guard(self, start: int) -> None:
+        # Wraps what the statement emitted, the except clauses are only
+        # reached when something went wrong
+        if not self.reads and self.call is None:
+            return
+        self.body[start:] = [(line, "    " + code) for line, code in self.body[start:]]
+        self.body.insert(start, (self.line, self.indent + "try:"))
+        if self.reads:
+            self.emit("except NameError as e:")
+            self.emit(f"    raise _undefined(e, {self.reads!r})")
+        if self.call is not None:
+            self.emit("except RecursionError:")
+            self.emit(f"    raise _overflow({self.call})")
+
+    def suite(self, stmt: Stmt) -> None:
+        indent = self.indent
+        self.indent += "    "
+        start = len(self.body)
+        self.statement(stmt)
+        if len(self.body) == start:
+            self.emit("pass")
+        self.indent = indent
+
+    def scope(self, statements: list[Stmt], names: list[str | None]) -> None:
+        # The body of a def, which is also the Lox scope in `names`
+        self.defs.append((set(), set()))
+        self.scopes.append((len(self.defs) - 1, names))
+        indent = self.indent
+        self.indent += "    "
+        start = len(self.body)
+        for stmt in statements:
+            self.statement(stmt)
+        if len(self.body) == start:
+            self.emit("pass")
+        self.declarations(start)
+        self.indent = indent
+        self.scopes.pop()
+
+    def declarations(self, start: int) -> None:
+        # Sorted, so the same program always compiles to the same code
+        assigned, outer = self.defs.pop()
+        if outer:
+            names = ", ".join(sorted(outer))
+            self.body.insert(start, (self.line, f"{self.indent}nonlocal {names}"))
+        if assigned:
+            names = ", ".join(sorted(assigned))
+            self.body.insert(start, (self.line, f"{self.indent}global {names}"))
+
+    def declare(self, stmt: Var | Function | Class, name: Token) -> str:
+        local = self.resolved().slots.get(id(stmt))
+        if local is None:
+            python = f"G_{name.lexeme}"
+            self.defs[-1][0].add(python)
+            return python
+        self.names += 1
+        python = f"L_{name.lexeme}_{self.names}"
+        self.scopes[-1][1][local[1] - 1] = python
+        return python
+
+    def block(self, stmt: Block, statements: list[Stmt]) -> None:
+        names = [None] * (self.resolved().frames[id(stmt)][1] - 1)
+        if not (self.loops and names and declaresFunction(statements)):
+            self.scopes.append((len(self.defs) - 1, names))
+            for inner in statements:
+                self.statement(inner)
+            self.scopes.pop()
+            return
+
+        self.names += 1
+        block = f"_block{self.names}"
+        self.emit(f"def {block}():")
+        loops, self.loops = self.loops, 0
+        self.blocks += 1
+        self.scope(statements, names)
+        self.blocks -= 1
+        self.loops = loops
+        if not self.inFunction:
+            self.emit(f"{block}()")
+            return
+        self.emit(f"if (_returned := {block}()) is not None:")
+        self.emit("    return _returned" if self.blocks else "    return _returned[0]")
+
+    def closure(
+        self, stmt: Function, name: str, this: str | None = None, init: bool = False
+    ) -> None:
+        # Defs `name` for a function, or for a method when `this` names its
+        # receiver, the first parameter and slot 0
+        size = self.resolved().functions[id(stmt)][1]
+        params = [] if this is None else [this]
+        for param in stmt.params:
+            self.names += 1
+            params.append(f"L_{param.lexeme}_{self.names}")
+        names = params + [None] * (size - 1 - len(params))
+
+        self.emit(f"def {name}({', '.join(params)}):")
+        saved = self.loops, self.blocks, self.inFunction, self.initializer
+        self.loops, self.blocks, self.inFunction = 0, 0, True
+        self.initializer = this if init else None
+        self.scope(stmt.body, names)
+        if init:
+            # Falling off the end of init returns `this` too
+            self.emit(f"    return {this}")
+        self.loops, self.blocks, self.inFunction, self.initializer = saved
+        self.emit(f"{name}.__name__ = {stmt.name.lexeme!r}")
+
+    def klass(self, stmt: Class) -> None:
+        # Declared first, methods can refer to the class
+        name = self.declare(stmt, stmt.name)
+        superclass = "None"
+        if stmt.superclass is not None:
+            self.names += 1
+            superclass = f"L_super_{self.names}"
+            self.emit(f"{superclass} = {self.value(stmt.superclass)}")
+            self.emit(f"if {superclass}.__class__ is not _Class:")
+            self.emit(f"    raise _superclass({self.token(stmt.superclass.name)})")
+            # The scope the Resolver puts `super` in, around the methods
+            self.scopes.append((len(self.defs) - 1, [superclass]))
+        methods = []
+        for method in stmt.methods:
+            lexeme = method.name.lexeme
+            self.names += 1
+            python = f"L_{lexeme}_{self.names}"
+            self.names += 1
+            this = f"L_this_{self.names}"
+            self.closure(method, python, this, lexeme == "init")
+            methods.append(f"{lexeme!r}: {python}")
+        if stmt.superclass is not None:
+            self.scopes.pop()
+        table = "{" + ", ".join(methods) + "}"
+        self.emit(f"{name} = _Class({stmt.name.lexeme!r}, {superclass}, {table})")
+
+    def test(self, condition: Expr) -> str:
+        # isTruthy(condition)
+        value = self.value(condition)
+        if isBoolean(condition):
+            return value
+        return f"((_t := {value}) is not None and _t is not False)"
+
+    def value(self, expr: Expr) -> str:
+        if nesting(expr) <= INLINE_DEPTH:
+            return self.expression(expr, 0)
+        return self.flat(expr, 0)
+
+    def literal(self, value) -> str:
+        if isinstance(value, float) and not math.isfinite(value):
+            return f"float({str(value)!r})"
+        return repr(value)
+
+    def token(self, token: Token) -> str:
+        return repr((token.tType.name, token.lexeme, token.line))
+
+    def expression(self, expr: Expr, depth: int) -> str:
+        match expr:
+            case Literal(value):
+                return self.literal(value)
+
+            case Grouping(expression):
+                return self.expression(expression, depth)
+
+            case Unary(operator, right):
+                operand = self.expression(right, depth + 1)
+                if operator.tType is TokenType.MINUS:
+                    return self.unary(operator, operand, operand)
+                a = f"_a{depth}"
+                return self.unary(operator, f"({a} := {operand})", a)
+
+            case Binary(left, operator, right):
+                left = self.expression(left, depth + 1)
+                right = self.expression(right, depth + 1)
+                if operator.tType in _EQUALITY:
+                    return self.binary(operator, left, right, left, right)
+                a, b = f"_a{depth}", f"_b{depth}"
+                return self.binary(
+                    operator, f"({a} := {left})", f"({b} := {right})", a, b
+                )
+
+            case Variable(name):
+                return self.variable(expr, name)[0]
+
+            case Assign(name, value):
+                return self.assign(expr, name, self.expression(value, depth + 1), depth)
+
+            case Call(callee, paren, arguments):
+                # Callee and arguments go into temporaries first, in order,
+                # then the call checks them
+                names = [f"_c{depth}"]
+                names += [f"_p{depth}_{i}" for i in range(len(arguments))]
+                codes = [self.expression(callee, depth + 1)]
+                codes += [self.expression(item, depth + 1) for item in arguments]
+                evaluate = ", ".join(f"({n} := {c})" for n, c in zip(names, codes))
+                method = isinstance(callee, (Get, Super))
+                return self.invoke(
+                    paren, names[0], names[1:], f"({evaluate},)", method
+                )
+
+            case Get(object, name):
+                # A field of an instance is read inline, _get does the rest
+                instance = self.expression(object, depth + 1)
+                self.line = name.line
+                o, f = f"_o{depth}", f"_f{depth}"
+                check = f"({o} := {instance}).__class__ is _Instance"
+                check += f" and ({f} := {o}.shape.fields.get({name.lexeme!r}))"
+                get = f"_get({o}, {name.lexeme!r}, {self.token(name)})"
+                return f"({o}.values[{f}] if {check} is not None else {get})"
+
+            case Set(object, name, value):
+                instance = self.expression(object, depth + 1)
+                self.line = name.line
+                instance = f"_instance({instance}, {self.token(name)})"
+                value = self.expression(value, depth + 1)
+                return f"_set({instance}, {name.lexeme!r}, {value})"
+
+            case This(keyword):
+                return self.variable(expr, keyword)[0]
+
+            case Super(_, method):
+                return self.superMethod(expr, method)
+
+        raise CompileError(
+            firstLine(expr) or self.line, f"Can't compile {type(expr).__name__}."
+        )
+
+    def flat(self, expr: Expr, sp: int) -> str:
+        """
+        Emits one assignment per operator, in evaluation order, and returns
+        the name or literal holding the result. Registers are allocated
+        like a stack: the left operand lives in _r{sp}, the right in
+        _r{sp + 1}.
+        """
+        match expr:
+            case Literal(value):
+                return f"({self.literal(value)})"
+
+            case Grouping(expression):
+                return self.flat(expression, sp)
+
+            case Unary(operator, right):
+                operand = self.flat(right, sp)
+                if not operand.startswith("_r"):
+                    # `is` straight on a literal is a SyntaxWarning
+                    self.emit(f"_r{sp} = {operand}")
+                    operand = f"_r{sp}"
+                self.emit(f"_r{sp} = {self.unary(operator, operand, operand)}")
+                return f"_r{sp}"
+
+            case Binary(left, operator, right):
+                a = self.flat(left, sp)
+                b = self.flat(right, sp + 1)
+                self.emit(f"_r{sp} = {self.binary(operator, a, b, a, b)}")
+                return f"_r{sp}"
+
+            case Variable(name):
+                # Copied, a later operand could assign it
+                self.emit(f"_r{sp} = {self.variable(expr, name)[0]}")
+                return f"_r{sp}"
+
+            case Assign(name, value):
+                value = self.flat(value, sp)
+                self.emit(f"_r{sp} = {self.assign(expr, name, value, 0)}")
+                return f"_r{sp}"
+
+            case Call(callee, paren, arguments):
+                names = [self.flat(callee, sp)]
+                if not names[0].startswith("_r"):
+                    # So is calling a literal
+                    self.emit(f"_r{sp} = {names[0]}")
+                    names[0] = f"_r{sp}"
+                for index, argument in enumerate(arguments, 1):
+                    names.append(self.flat(argument, sp + index))
+                method = isinstance(callee, (Get, Super))
+                call = self.invoke(paren, names[0], names[1:], method=method)
+                self.emit(f"_r{sp} = {call}")
+                return f"_r{sp}"
+
+            case Get(object, name):
+                instance = self.flat(object, sp)
+                get = f"_get({instance}, {name.lexeme!r}, {self.token(name)})"
+                self.emit(f"_r{sp} = {get}")
+                return f"_r{sp}"
+
+            case Set(object, name, value):
+                instance = self.flat(object, sp)
+                self.emit(f"_r{sp} = _instance({instance}, {self.token(name)})")
+                value = self.flat(value, sp + 1)
+                self.emit(f"_r{sp} = _set(_r{sp}, {name.lexeme!r}, {value})")
+                return f"_r{sp}"
+
+            case This(keyword):
+                self.emit(f"_r{sp} = {self.variable(expr, keyword)[0]}")
+                return f"_r{sp}"
+
+            case Super(_, method):
+                self.emit(f"_r{sp} = {self.superMethod(expr, method)}")
+                return f"_r{sp}"
+
+        raise CompileError(
+            firstLine(expr) or self.line, f"Can't compile {type(expr).__name__}."
+        )
+
+    def variable(self, expr: Expr, name: Token) -> tuple[str, int | None]:
+        # The Python name `name` refers to, and the index of the def it's a
+        # local of, None for a global
+        site = self.resolved().sites.get(id(expr))
+        if site is None:
+            raise CompileError(name.line, "Can't compile unresolved statements.")
+        if site.__class__ is GlobalSite:
+            python = f"G_{name.lexeme}"
+            self.reads.setdefault(python, name.line)
+            return python, None
+        _, depth, slot = site
+        level, names = self.scopes[-1 - depth]
+        return names[slot - 1], level
+
+    def assign(self, expr: Assign, name: Token, value: str, depth: int) -> str:
+        python, level = self.variable(expr, name)
+        if level is None:
+            # The value first, then reading the global checks it's defined
+            self.defs[-1][0].add(python)
+            a = f"_a{depth}"
+            return f"(({a} := {value}), {python}, ({python} := {a}))[2]"
+        if level < len(self.defs) - 1:
+            self.defs[-1][1].add(python)
+        return f"({python} := {value})"
+
+    def superMethod(self, expr: Super, method: Token) -> str:
+        # `super` is the one slot of the scope around the method's, whose
+        # slot 0 is `this`
+        site = self.resolved().sites.get(id(expr))
+        if site.__class__ is not SuperSite:
+            raise CompileError(method.line, "Can't compile unresolved statements.")
+        superclass = self.scopes[-1 - site.depth][1][0]
+        this = self.scopes[-site.depth][1][0]
+        self.line = method.line
+        token = self.token(method)
+        return f"_super({superclass}, {this}, {method.lexeme!r}, {token})"
+
+    def invoke(
+        self,
+        paren: Token,
+        callee: str,
+        arguments: list[str],
+        evaluate: str = "",
+        method: bool = False,
+    ) -> str:
+        # A def of the right arity is called straight, or with method set,
+        # a bound method's def with its receiver. Anything else goes
+        # through _call and its checks. evaluate, when given, is what fills
+        # in the names first.
+        self.line = paren.line
+        token = self.token(paren)
+        if self.call is None:
+            self.call = token
+        args = ", ".join(arguments)
+        if method:
+            receiver = ", ".join([f"{callee}.receiver", *arguments])
+            call = f"{callee}.method({receiver})"
+            arity = len(arguments) + 1
+            check = f"{callee}.__class__ is _Bound"
+            check += f" and {callee}.method.__code__.co_argcount == {arity}"
+        else:
+            call = f"{callee}({args})"
+            check = f"{callee}.__class__ is _Function"
+            check += f" and {callee}.__code__.co_argcount == {len(arguments)}"
+        if evaluate:
+            check = f"{evaluate} and {check}"
+        packed = f"({args},)" if arguments else "()"
+        return f"({call} if {check} else _call({callee}, {packed}, {token}))"
+
+    def unary(self, operator: Token, operand: str, a: str) -> str:
+        self.line = operator.line
+        # operand is the one place the value gets computed, a names it after
+        if operator.tType is TokenType.MINUS:
+            return f"(-float({operand}))"
+        # not isTruthy(x)
+        return f"({operand} is None or {a} is False)"
+
+    def binary(self, operator: Token, left: str, right: str, a: str, b: str) -> str:
+        self.line = operator.line
+        tType = operator.tType
+        # isEqual is plain == for nil, booleans, numbers and strings
+        if tType is TokenType.EQUAL_EQUAL:
+            return f"({left} == {right})"
+        if tType is TokenType.BANG_EQUAL:
+            return f"({left} != {right})"
+
+        # Both operands are evaluated, left first, before any check
+        both = f"{left}.__class__ is {right}.__class__ is float"
+        token = self.token(operator)
+        if tType is TokenType.PLUS:
+            return f"({a} + {b} if {both} else _add({a}, {b}, {token}))"
+        if tType is TokenType.SLASH:
+            divide = f"_divide({a}, {b}, {token})"
+            return f"({a} / {b} if {both} and {b} != 0.0 else {divide})"
+        return f"({a} {_NUMERIC_OPS[tType]} {b} if {both} else _numbers({token}))"
+
+
+def compile_program(
+    statements: Iterable[Stmt],
+    filename: str = "<lox>",
+    interpreter: Interpreter | None = None,
+) -> CodeType:
+    # interpreter holds the Resolver's tables, only a program without
+    # variables compiles without one
+    transpiler = Transpiler(interpreter)
+    source = transpiler.program(statements)
+    try:
+        return compile(source, filename, "exec")
+    except SyntaxError as e:
+        # Python's own limits, like how deeply loops can nest
+        message = e.msg[:1].upper() + e.msg[1:]
+        raise CompileError(transpiler.lineAt(e.lineno), f"{message}.") from None
+
+
+class PythonInterpreter(Interpreter):
+    """
+    Backend that runs the program as CPython bytecode.
+
+    Same output_writer contract and error printing as Interpreter. The
+    statements are resolved first, like for every other backend, and the
+    code's globals are kept across run() calls so statements compiled one
+    at a time see each other's definitions.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.namespace = {
+            "_stringify": self.stringify,
+            "_add": _add,
+            "_numbers": _numbers,
+            "_divide": _divide,
+            "_undefined": _undefined,
+            "_overflow": _overflow,
+            "_call": self.callFunction,
+            "_Function": FunctionType,
+            "_get": _get,
+            "_instance": _instance,
+            "_set": _set,
+            "_super": _super,
+            "_superclass": _superclass,
+            "_Bound": BoundMethod,
+            "_Class": LoxClass,
+            "_Instance": LoxInstance,
+        }
+        for name, cell in self.globals.items():
+            self.namespace[f"G_{name}"] = cell.value
+
+    def interpretStatements(self, statements: Iterable[Stmt]):
+        try:
+            if isinstance(statements, list):
+                if not self.resolveAll(statements):
+                    return
+                self.run(compile_program(statements, interpreter=self))
+                return
+            # Streaming, one code object per statement
+            failed = False
+            for stmt in statements:
+                if not self.resolveAll([stmt]):
+                    failed = True
+                elif not failed:
+                    if not self.run(compile_program([stmt], interpreter=self)):
+                        return
+        except CompileError as e:
+            self.hadError = True
+            self.flushOutput()
+            print(e)
+        finally:
+            self.flushOutput()
+
+    def run(self, code: CodeType) -> bool:
+        namespace = self.namespace
+        namespace["_write"] = self.output_writer
+        # One Python frame per Lox call, so Python's limit is the Lox one
+        depth = 0
+        frame = sys._getframe()
+        while frame is not None:
+            depth += 1
+            frame = frame.f_back
+        recursionLimit = sys.getrecursionlimit()
+        sys.setrecursionlimit(depth + 1 + self.maxDepth + HELPER_FRAMES)
+        try:
+            exec(code, namespace)
+            namespace[MAIN]()
+        except RuntimeError_ as e:
+            self.flushOutput()
+            print(e)
+            return False
+        finally:
+            sys.setrecursionlimit(recursionLimit)
+            self.flushOutput()
+        return True
+
+    def callFunction(self, callee, arguments: tuple, token: tuple[str, str, int]):
+        # Slow path of a call, anything the call site didn't call straight.
+        # Methods are defs taking the receiver first.
+        paren = _token(token)
+        match callee:
+            case FunctionType():
+                arity = callee.__code__.co_argcount
+                if arity == len(arguments):
+                    return callee(*arguments)
+                raise self.arityError(paren, arity, arguments)
+            case BoundMethod():
+                arity = callee.method.__code__.co_argcount - 1
+                if arity == len(arguments):
+                    return callee.method(callee.receiver, *arguments)
+                raise self.arityError(paren, arity, arguments)
+            case LoxClass():
+                instance = LoxInstance(callee)
+                initializer = callee.methods.get("init")
+                if initializer is not None:
+                    arity = initializer.__code__.co_argcount - 1
+                    if arity != len(arguments):
+                        raise self.arityError(paren, arity, arguments)
+                    initializer(instance, *arguments)
+                elif arguments:
+                    raise self.arityError(paren, 0, arguments)
+                return instance
+        return self.callValue(callee, list(arguments), paren)
+
+    def stringify(self, objecta) -> str:
+        if objecta.__class__ is FunctionType:
+            return f"<fn {objecta.__name__}>"
+        if objecta.__class__ is BoundMethod:
+            return f"<fn {objecta.method.__name__}>"
+        return super().stringify(objecta)
+
+
+if __name__ in ("__main__"):
+    from .scanner import Scanner
+    from .parser import Parser
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m pythox.transpiler <file.lox>", file=sys.stderr)
+        sys.exit(64)
+
+    with open(sys.argv[1], "r") as f:
+        source = f.read()
+
+    statements = Parser(Scanner(source).scanTokens()).parse()
+    interpreter = PythonInterpreter()
+    if statements is not None and interpreter.resolveAll(statements):
+        print(Transpiler(interpreter).program(statements))
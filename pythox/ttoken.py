@@ -1,5 +1,7 @@
+from array import array
 from enum import StrEnum
 from dataclasses import dataclass
+from typing import Iterable
 
 
 class TokenType(StrEnum):
@@ -50,6 +52,128 @@ class TokenType(StrEnum):
     EOF = "EOF"
 
 
+# Lookup tables below are generated by tools/generateTokenType.py
+TOKEN_TYPES: tuple[TokenType, ...] = (
+    TokenType.LEFT_PAREN,
+    TokenType.RIGHT_PAREN,
+    TokenType.LEFT_BRACE,
+    TokenType.RIGHT_BRACE,
+    TokenType.COMMA,
+    TokenType.DOT,
+    TokenType.MINUS,
+    TokenType.PLUS,
+    TokenType.SEMICOLON,
+    TokenType.SLASH,
+    TokenType.STAR,
+    TokenType.QUESTION,
+    TokenType.COLON,
+    TokenType.BANG,
+    TokenType.BANG_EQUAL,
+    TokenType.EQUAL,
+    TokenType.EQUAL_EQUAL,
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.IDENTIFIER,
+    TokenType.STRING,
+    TokenType.NUMBER,
+    TokenType.AND,
+    TokenType.CLASS,
+    TokenType.ELSE,
+    TokenType.FALSE,
+    TokenType.FUN,
+    TokenType.FOR,
+    TokenType.IF,
+    TokenType.NIL,
+    TokenType.OR,
+    TokenType.PRINT,
+    TokenType.RETURN,
+    TokenType.SUPER,
+    TokenType.THIS,
+    TokenType.TRUE,
+    TokenType.VAR,
+    TokenType.WHILE,
+    TokenType.EOF,
+)
+TOKEN_CODES: dict[TokenType, int] = {
+    TokenType.LEFT_PAREN: 0,
+    TokenType.RIGHT_PAREN: 1,
+    TokenType.LEFT_BRACE: 2,
+    TokenType.RIGHT_BRACE: 3,
+    TokenType.COMMA: 4,
+    TokenType.DOT: 5,
+    TokenType.MINUS: 6,
+    TokenType.PLUS: 7,
+    TokenType.SEMICOLON: 8,
+    TokenType.SLASH: 9,
+    TokenType.STAR: 10,
+    TokenType.QUESTION: 11,
+    TokenType.COLON: 12,
+    TokenType.BANG: 13,
+    TokenType.BANG_EQUAL: 14,
+    TokenType.EQUAL: 15,
+    TokenType.EQUAL_EQUAL: 16,
+    TokenType.GREATER: 17,
+    TokenType.GREATER_EQUAL: 18,
+    TokenType.LESS: 19,
+    TokenType.LESS_EQUAL: 20,
+    TokenType.IDENTIFIER: 21,
+    TokenType.STRING: 22,
+    TokenType.NUMBER: 23,
+    TokenType.AND: 24,
+    TokenType.CLASS: 25,
+    TokenType.ELSE: 26,
+    TokenType.FALSE: 27,
+    TokenType.FUN: 28,
+    TokenType.FOR: 29,
+    TokenType.IF: 30,
+    TokenType.NIL: 31,
+    TokenType.OR: 32,
+    TokenType.PRINT: 33,
+    TokenType.RETURN: 34,
+    TokenType.SUPER: 35,
+    TokenType.THIS: 36,
+    TokenType.TRUE: 37,
+    TokenType.VAR: 38,
+    TokenType.WHILE: 39,
+    TokenType.EOF: 40,
+}
+
+BINARY_PRECEDENCE: dict[TokenType, int] = {
+    TokenType.BANG_EQUAL: 1,
+    TokenType.EQUAL_EQUAL: 1,
+    TokenType.GREATER: 2,
+    TokenType.GREATER_EQUAL: 2,
+    TokenType.LESS: 2,
+    TokenType.LESS_EQUAL: 2,
+    TokenType.MINUS: 3,
+    TokenType.PLUS: 3,
+    TokenType.SLASH: 4,
+    TokenType.STAR: 4,
+}
+
+UNARY_OPERATORS: frozenset[TokenType] = frozenset(
+    (
+        TokenType.BANG,
+        TokenType.MINUS,
+    )
+)
+
+STATEMENT_START: frozenset[TokenType] = frozenset(
+    (
+        TokenType.CLASS,
+        TokenType.FUN,
+        TokenType.VAR,
+        TokenType.FOR,
+        TokenType.IF,
+        TokenType.WHILE,
+        TokenType.PRINT,
+        TokenType.RETURN,
+    )
+)
+
+
 @dataclass(frozen=True, slots=True)
 class Token:
     tType: TokenType
@@ -64,6 +188,127 @@ class Token:
         return f"Type: {self.tType}\nLexeme: {self.lexeme}\nLiteral: {self.literal}"
 
 
+class TokenBuffer:
+    """
+    Struct-of-arrays token storage over the scanned source.
+
+    Each token is a row across parallel `array` columns (kind code,
+    start/end offsets, line, literal index) so a token costs a handful of
+    bytes instead of a Token object plus its own lexeme string. Indexing
+    materializes a Token on demand; the last couple are kept around because
+    the parser keeps asking for peek()/previous().
+    """
+
+    __slots__ = (
+        "source",
+        "kinds",
+        "starts",
+        "ends",
+        "lines",
+        "literalIndices",
+        "literals",
+        "_literalSlots",
+        "_cache",
+    )
+
+    def __init__(self, source: str):
+        self.source: str = source
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.lines = array("I")
+        self.literalIndices = array("i")
+        # Literal values are deduplicated, the same `1` all over a script
+        # only lives here once
+        self.literals: list[float | str | bool] = []
+        self._literalSlots: dict[float | str | bool, int] = {}
+        self._cache: dict[int, Token] = {}
+
+    def add(
+        self,
+        tType: TokenType,
+        start: int,
+        end: int,
+        literal: float | str | bool | None,
+        line: int,
+    ) -> None:
+        self.kinds.append(TOKEN_CODES[tType])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        if literal is None:
+            self.literalIndices.append(-1)
+            return
+        slot = self._literalSlots.get(literal)
+        if slot is None:
+            slot = self._literalSlots[literal] = len(self.literals)
+            self.literals.append(literal)
+        self.literalIndices.append(slot)
+
+    def tType(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def lexeme(self, index: int) -> str:
+        return self.source[self.starts[index] : self.ends[index]]
+
+    def literal(self, index: int) -> float | str | bool | None:
+        slot = self.literalIndices[index]
+        return None if slot < 0 else self.literals[slot]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += len(self.kinds)
+        cache = self._cache
+        token = cache.get(index)
+        if token is None:
+            if not 0 <= index < len(self.kinds):
+                raise IndexError("token index out of range")
+            token = Token(
+                TOKEN_TYPES[self.kinds[index]],
+                self.lexeme(index),
+                self.literal(index),
+                self.lines[index],
+            )
+            if len(cache) >= 2:
+                cache.clear()
+            cache[index] = token
+        return token
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+
+class TokenStream:
+    """
+    Just enough of a sequence for the parser to pull tokens from an iterator.
+
+    The parser only ever looks at the current and the previous token, so
+    that is all the window keeps.
+    """
+
+    __slots__ = ("_tokens", "_base", "_window")
+
+    def __init__(self, tokens: Iterable[Token]):
+        self._tokens = iter(tokens)
+        self._base: int = 0
+        self._window: list[Token] = []
+
+    def __getitem__(self, index: int) -> Token:
+        window = self._window
+        while index >= self._base + len(window):
+            window.append(next(self._tokens))
+            if len(window) > 2:
+                del window[0]
+                self._base += 1
+        if index < self._base:
+            raise IndexError("token already dropped from the stream window")
+        return window[index - self._base]
+
+
 if __name__ == "__main__":
     # Tests!
     token: TokenType = TokenType.SLASH
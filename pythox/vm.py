@@ -0,0 +1,427 @@
+import sys
+from typing import Iterable
+
+from .bytecode import (
+    MAX_LONG_CONSTANTS,
+    Chunk,
+    CompileError,
+    Compiler,
+    FunctionTemplate,
+    OpCode,
+)
+from .interpreter import (
+    BoundMethod,
+    Interpreter,
+    LoxClass,
+    LoxFunction,
+    LoxInstance,
+    NativeFunction,
+    RuntimeError_,
+)
+from .stmt import Stmt
+from .ttoken import Token, TokenType
+
+# Same as clox: FRAMES_MAX * UINT8_COUNT slots
+STACK_MAX = 64 * 256
+
+# Plain ints, comparing against IntEnum members is noticeably slower
+_CONSTANT = int(OpCode.CONSTANT)
+_CONSTANT_LONG = int(OpCode.CONSTANT_LONG)
+_NIL = int(OpCode.NIL)
+_TRUE = int(OpCode.TRUE)
+_FALSE = int(OpCode.FALSE)
+_POP = int(OpCode.POP)
+_EQUAL = int(OpCode.EQUAL)
+_NOT_EQUAL = int(OpCode.NOT_EQUAL)
+_GREATER = int(OpCode.GREATER)
+_GREATER_EQUAL = int(OpCode.GREATER_EQUAL)
+_LESS = int(OpCode.LESS)
+_LESS_EQUAL = int(OpCode.LESS_EQUAL)
+_ADD = int(OpCode.ADD)
+_SUBTRACT = int(OpCode.SUBTRACT)
+_MULTIPLY = int(OpCode.MULTIPLY)
+_DIVIDE = int(OpCode.DIVIDE)
+_NOT = int(OpCode.NOT)
+_NEGATE = int(OpCode.NEGATE)
+_PRINT = int(OpCode.PRINT)
+_GET_LOCAL = int(OpCode.GET_LOCAL)
+_SET_LOCAL = int(OpCode.SET_LOCAL)
+_GET_OUTER = int(OpCode.GET_OUTER)
+_SET_OUTER = int(OpCode.SET_OUTER)
+_GET_GLOBAL = int(OpCode.GET_GLOBAL)
+_SET_GLOBAL = int(OpCode.SET_GLOBAL)
+_DEFINE_GLOBAL = int(OpCode.DEFINE_GLOBAL)
+_BEGIN_BLOCK = int(OpCode.BEGIN_BLOCK)
+_END_BLOCK = int(OpCode.END_BLOCK)
+_JUMP = int(OpCode.JUMP)
+_JUMP_IF_FALSE = int(OpCode.JUMP_IF_FALSE)
+_LOOP = int(OpCode.LOOP)
+_CALL = int(OpCode.CALL)
+_RETURN = int(OpCode.RETURN)
+_CLOSURE = int(OpCode.CLOSURE)
+_CLASS = int(OpCode.CLASS)
+_GET_PROPERTY = int(OpCode.GET_PROPERTY)
+_SET_PROPERTY = int(OpCode.SET_PROPERTY)
+_SUPER = int(OpCode.SUPER)
+
+
+class VM(Interpreter):
+    """
+    Stack-based bytecode backend, a drop-in for Interpreter.
+
+    Statements are resolved, compiled to a Chunk and run by a single
+    dispatch loop over an explicit value stack. Variables live in the same
+    array frames the tree walker uses, so closures just keep their frame.
+    Lox calls switch the loop to the callee's Chunk instead of recursing
+    in Python. Output goes through output_writer and errors print the
+    same way Interpreter.interpret does.
+    """
+
+    def __init__(self, output_writer=sys.stdout.write):
+        super().__init__(output_writer)
+        self.stack: list = []
+
+    def interpretStatements(self, statements: Iterable[Stmt]):
+        try:
+            if isinstance(statements, list):
+                # Whole script in one chunk, resolution and compile errors
+                # stop everything
+                if not self.resolveAll(statements):
+                    return
+                compiler = Compiler(maxConstants=MAX_LONG_CONSTANTS, interpreter=self)
+                self.run(compiler.compile(statements))
+                return
+            # Streaming: one small chunk per statement keeps memory flat
+            failed = False
+            for stmt in statements:
+                if not self.resolveAll([stmt]):
+                    failed = True
+                elif not failed:
+                    compiler = Compiler(
+                        maxConstants=MAX_LONG_CONSTANTS, interpreter=self
+                    )
+                    compiler.statement(stmt)
+                    self.run(compiler.chunk)
+                self.flushOutput()
+        except CompileError as e:
+            self.hadError = True
+            self.flushOutput()
+            print(e)
+        except RuntimeError_ as e:
+            self.flushOutput()
+            print(e)
+        finally:
+            # An error can leave a call or block half done
+            self.stack.clear()
+            self.environment = None
+            self.depth = 0
+            self.flushOutput()
+
+    def run(self, chunk: Chunk) -> None:
+        if chunk.maxStack > STACK_MAX:
+            raise self.error(chunk, 0, "Stack overflow.")
+
+        code = chunk.code
+        constants = chunk.constants
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        isTruthy = self.isTruthy
+        isEqual = self.isEqual
+        stringify = self.stringify
+        # Callers of the running function, as (chunk, ip, function, frame
+        # it was called with, innermost frame when it made the call), and
+        # the running function with the frame it was called with. The
+        # innermost block's frame is `environment`.
+        calls = []
+        function = None
+        callFrame = None
+        environment = self.environment
+
+        ip = 0
+        end = len(code)
+        while ip < end:
+            op = code[ip]
+            ip += 1
+            if op == _GET_LOCAL:
+                push(environment[code[ip]])
+                ip += 1
+            elif op == _CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == _GET_GLOBAL:
+                index = code[ip] | code[ip + 1] << 8 | code[ip + 2] << 16
+                ip += 3
+                site = constants[index]
+                cell = site.cell
+                if cell is None:
+                    cell = self.globalCell(site, site.node.name)
+                push(cell.value)
+            elif op == _POP:
+                pop()
+            elif op == _JUMP_IF_FALSE:
+                value = pop()
+                if value is None or value is False:
+                    ip += code[ip] | code[ip + 1] << 8
+                ip += 2
+            elif op == _CALL:
+                argc = code[ip]
+                ip += 1
+                base = len(stack) - argc
+                callee = stack[base - 1]
+                cls = callee.__class__
+                if cls is LoxFunction:
+                    receiver = None
+                elif cls is BoundMethod:
+                    receiver = callee.receiver
+                    callee = callee.method
+                elif cls is LoxClass:
+                    receiver = LoxInstance(callee)
+                    initializer = callee.methods.get("init")
+                    if initializer is None:
+                        if argc:
+                            raise self.arityError(
+                                self.token(chunk, ip - 2), 0, stack[base:]
+                            )
+                        del stack[base - 1 :]
+                        push(receiver)
+                        continue
+                    callee = initializer
+                elif cls is NativeFunction:
+                    arguments = stack[base:]
+                    del stack[base - 1 :]
+                    paren = self.token(chunk, ip - 2)
+                    if argc != callee.arity:
+                        raise self.arityError(paren, callee.arity, arguments)
+                    push(self.callNative(callee, arguments, paren))
+                    continue
+                else:
+                    raise self.error(
+                        chunk, ip - 2, "Can only call functions and classes."
+                    )
+                if argc != callee.arity:
+                    raise self.arityError(
+                        self.token(chunk, ip - 2), callee.arity, stack[base:]
+                    )
+                if self.depth >= self.maxDepth:
+                    raise self.error(chunk, ip - 2, "Stack overflow.")
+                pool = callee.pool
+                frame = pool.pop() if pool else callee.frame()
+                if receiver is None:
+                    frame[1 : argc + 1] = stack[base:]
+                else:
+                    # `this` takes slot 0, the arguments follow
+                    frame[1] = receiver
+                    frame[2 : argc + 2] = stack[base:]
+                del stack[base - 1 :]
+                calls.append((chunk, ip, function, callFrame, environment))
+                self.depth += 1
+                function = callee
+                callFrame = environment = self.environment = frame
+                chunk = callee.compiled
+                code = chunk.code
+                constants = chunk.constants
+                end = len(code)
+                ip = 0
+            elif op == _RETURN:
+                result = pop()
+                if function.isInitializer:
+                    result = callFrame[1]
+                if function.pool is not None:
+                    function.pool.append(callFrame)
+                chunk, ip, function, callFrame, environment = calls.pop()
+                self.environment = environment
+                code = chunk.code
+                constants = chunk.constants
+                end = len(code)
+                self.depth -= 1
+                push(result)
+            elif op == _ADD:
+                b = pop()
+                a = stack[-1]
+                if isinstance(a, float) and isinstance(b, float):
+                    stack[-1] = a + b
+                elif isinstance(a, str) and isinstance(b, str):
+                    stack[-1] = a + b
+                else:
+                    raise self.error(
+                        chunk, ip - 1, "Operands must be two numbers or two strings"
+                    )
+            elif op == _SET_LOCAL:
+                environment[code[ip]] = stack[-1]
+                ip += 1
+            elif op == _LOOP:
+                # Offsets count from after the operand
+                ip -= (code[ip] | code[ip + 1] << 8) - 2
+            elif op == _JUMP:
+                ip += 2 + (code[ip] | code[ip + 1] << 8)
+            elif op == _GET_OUTER:
+                frame = environment
+                for _ in range(code[ip] | code[ip + 1] << 8):
+                    frame = frame[0]
+                push(frame[code[ip + 2] | code[ip + 3] << 8])
+                ip += 4
+            elif op == _SET_OUTER:
+                frame = environment
+                for _ in range(code[ip] | code[ip + 1] << 8):
+                    frame = frame[0]
+                frame[code[ip + 2] | code[ip + 3] << 8] = stack[-1]
+                ip += 4
+            elif op == _SET_GLOBAL:
+                index = code[ip] | code[ip + 1] << 8 | code[ip + 2] << 16
+                ip += 3
+                site = constants[index]
+                cell = site.cell
+                if cell is None:
+                    cell = self.globalCell(site, site.node.name)
+                cell.value = stack[-1]
+            elif op == _GET_PROPERTY:
+                index = code[ip] | code[ip + 1] << 8 | code[ip + 2] << 16
+                ip += 3
+                site = constants[index]
+                instance = stack[-1]
+                if (
+                    instance.__class__ is LoxInstance
+                    and instance.shape is site.shape
+                ):
+                    if site.method is None:
+                        stack[-1] = instance.values[site.slot]
+                    else:
+                        stack[-1] = BoundMethod(instance, site.method)
+                else:
+                    stack[-1] = self.getProperty(site.node, instance)
+            elif op == _SET_PROPERTY:
+                index = code[ip] | code[ip + 1] << 8 | code[ip + 2] << 16
+                ip += 3
+                site = constants[index]
+                value = pop()
+                instance = stack[-1]
+                if instance.__class__ is not LoxInstance:
+                    raise RuntimeError_(
+                        site.node.name, "Only instances have fields."
+                    )
+                if instance.shape is site.shape:
+                    if site.next is None:
+                        instance.values[site.slot] = value
+                    else:
+                        instance.shape = site.next
+                        instance.values.append(value)
+                else:
+                    self.setProperty(site.node, instance, value)
+                stack[-1] = value
+            elif op == _BEGIN_BLOCK:
+                frame = [None] * (code[ip] | code[ip + 1] << 8)
+                ip += 2
+                frame[0] = environment
+                environment = self.environment = frame
+            elif op == _END_BLOCK:
+                environment = self.environment = environment[0]
+            elif op == _PRINT:
+                self.output_writer(stringify(pop()) + "\n")
+            elif op == _SUBTRACT:
+                b = pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    raise self.error(chunk, ip - 1, "Operands must be numbers.")
+                stack[-1] = a - b
+            elif op == _MULTIPLY:
+                b = pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    raise self.error(chunk, ip - 1, "Operands must be numbers.")
+                stack[-1] = a * b
+            elif op == _DIVIDE:
+                b = pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    raise self.error(chunk, ip - 1, "Operands must be numbers.")
+                if b == 0.0:
+                    raise self.error(chunk, ip - 1, "Division by zero.")
+                stack[-1] = a / b
+            elif op == _NIL:
+                push(None)
+            elif op == _TRUE:
+                push(True)
+            elif op == _FALSE:
+                push(False)
+            elif op == _NEGATE:
+                stack[-1] = -float(stack[-1])
+            elif op == _NOT:
+                stack[-1] = not isTruthy(stack[-1])
+            elif op == _EQUAL:
+                b = pop()
+                stack[-1] = isEqual(stack[-1], b)
+            elif op == _NOT_EQUAL:
+                b = pop()
+                stack[-1] = not isEqual(stack[-1], b)
+            elif op == _DEFINE_GLOBAL:
+                index = code[ip] | code[ip + 1] << 8 | code[ip + 2] << 16
+                ip += 3
+                self.defineGlobal(constants[index], pop())
+            elif op == _CLOSURE:
+                index = code[ip] | code[ip + 1] << 8 | code[ip + 2] << 16
+                ip += 3
+                template = constants[index]
+                push(self.closure(template, environment))
+            elif op == _CLASS:
+                index = code[ip] | code[ip + 1] << 8 | code[ip + 2] << 16
+                ip += 3
+                template = constants[index]
+                superclass = None
+                closure = environment
+                if template.superclass is not None:
+                    superclass = pop()
+                    if superclass.__class__ is not LoxClass:
+                        raise RuntimeError_(
+                            template.superclass, "Superclass must be a class."
+                        )
+                    closure = [closure, superclass]
+                methods = {
+                    method.declaration.name.lexeme: self.closure(method, closure)
+                    for method in template.methods
+                }
+                push(LoxClass(template.name, superclass, methods))
+            elif op == _SUPER:
+                index = code[ip] | code[ip + 1] << 8 | code[ip + 2] << 16
+                ip += 3
+                expr = constants[index]
+                push(BoundMethod(*self.superMethod(expr)))
+            elif op == _CONSTANT_LONG:
+                push(constants[code[ip] | code[ip + 1] << 8 | code[ip + 2] << 16])
+                ip += 3
+            else:
+                # Comparisons share the number check
+                b = pop()
+                a = stack[-1]
+                if not (isinstance(a, float) and isinstance(b, float)):
+                    raise self.error(chunk, ip - 1, "Operands must be numbers.")
+                if op == _GREATER:
+                    stack[-1] = a > b
+                elif op == _GREATER_EQUAL:
+                    stack[-1] = a >= b
+                elif op == _LESS:
+                    stack[-1] = a < b
+                elif op == _LESS_EQUAL:
+                    stack[-1] = a <= b
+                else:
+                    raise AssertionError(f"Unknown opcode {op}")
+
+    def closure(self, template: FunctionTemplate, frame: list | None) -> LoxFunction:
+        return LoxFunction(
+            template.declaration,
+            frame,
+            template.size,
+            None if template.captured else [],
+            template.isInitializer,
+            template.chunk,
+        )
+
+    def error(self, chunk: Chunk, offset: int, message: str) -> RuntimeError_:
+        # A statement can't resume after an error, drop its leftovers
+        self.stack.clear()
+        return RuntimeError_(self.token(chunk, offset), message)
+
+    def token(self, chunk: Chunk, offset: int) -> Token:
+        # RuntimeError_ only reports the token's line
+        line = chunk.lines[offset] if offset < len(chunk.lines) else 1
+        return Token(TokenType.EOF, "", None, line)
@@ -0,0 +1,94 @@
+import io
+import timeit
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from pythox import astCache
+from pythox.pythox import Pythox
+from tests.test_helper import LOX_ROOT, parse
+
+
+def test_round_trip(tmp_path: Path):
+    script = tmp_path / "precedence.lox"
+    source = (LOX_ROOT / "precedence" / "precedence.lox").read_text()
+    script.write_text(source)
+    statements = parse(source)
+
+    assert astCache.load(str(script), source) is None
+    assert astCache.store(str(script), source, statements)
+    assert astCache.load(str(script), source) == statements
+
+
+def test_invalidates_on_mismatch(tmp_path: Path, monkeypatch):
+    script = tmp_path / "a.lox"
+    astCache.store(str(script), "print 1;", parse("print 1;"))
+
+    # Different source
+    assert astCache.load(str(script), "print 2;") is None
+
+    # Different pythox version. The file name has the version in it too,
+    # so put the stored entry where the other version looks for it
+    stored = Path(astCache.cache_path(str(script))).read_bytes()
+    assert astCache.load(str(script), "print 1;") == parse("print 1;")
+    monkeypatch.setattr(astCache, "__version__", "0.0.0-other")
+    Path(astCache.cache_path(str(script))).write_bytes(stored)
+    assert astCache.load(str(script), "print 1;") is None
+
+
+def test_corrupt_cache_is_a_miss(tmp_path: Path):
+    script = tmp_path / "a.lox"
+    astCache.store(str(script), "print 1;", parse("print 1;"))
+    path = Path(astCache.cache_path(str(script)))
+    path.write_bytes(path.read_bytes()[:-5])
+
+    assert astCache.load(str(script), "print 1;") is None
+
+
+def test_run_file_uses_cache(tmp_path: Path, monkeypatch):
+    script = tmp_path / "a.lox"
+    script.write_text('print 1 + 2;\nprint "a" + "b";')
+    parses = []
+    original = Pythox.parse
+
+    def counting_parse(self, *args):
+        parses.append(args)
+        return original(self, *args)
+
+    monkeypatch.setattr(Pythox, "parse", counting_parse)
+    for _ in range(2):
+        Pythox().runFile(str(script))
+    assert len(parses) == 1
+    assert Path(astCache.cache_path(str(script))).exists()
+
+    Pythox(cache=False).runFile(str(script))
+    assert len(parses) == 2
+
+
+def test_cold_vs_warm_start(tmp_path: Path, capsys):
+    """Reports scan+parse time against a cache load for large scripts."""
+    scripts = {
+        path.name: path.read_text()
+        for path in sorted((LOX_ROOT / "benchmark").glob("*.lox"))
+    }
+    expressions = (LOX_ROOT / "precedence" / "precedence.lox").read_text()
+    scripts["synthetic (precedence x 500)"] = expressions * 500
+
+    lines = []
+    for name, source in scripts.items():
+        with redirect_stdout(io.StringIO()):
+            statements = parse(source)
+        if statements is None:
+            lines.append(f"  {name}: skipped, doesn't parse yet")
+            continue
+
+        script = str(tmp_path / "script.lox")
+        astCache.store(script, source, statements)
+        cold = min(timeit.repeat(lambda: parse(source), number=1, repeat=3))
+        warm = min(
+            timeit.repeat(lambda: astCache.load(script, source), number=1, repeat=3)
+        )
+        assert astCache.load(script, source) == statements
+        lines.append(f"  {name}: cold {cold * 1000:.1f} ms, warm {warm * 1000:.1f} ms")
+
+    with capsys.disabled():
+        print("\nparse cache, cold vs warm start:", *lines, sep="\n")
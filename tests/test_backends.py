@@ -0,0 +1,43 @@
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from pythox.interpreter import QUICKEN_AFTER, Interpreter
+from pythox.transpiler import PythonInterpreter
+from pythox.vm import VM
+from tests.test_helper import (
+    LIMIT_FILES,
+    SCRIPT_FILES,
+    parse,
+    run_engine,
+    script_id,
+)
+
+# name: (engine, rounds). Quickened sites need a few rounds to get past
+# their warmup before they specialize
+BACKENDS = {
+    "quickened": (partial(Interpreter, quicken=True), QUICKEN_AFTER + 1),
+    "closures": (partial(Interpreter, closures=True), 1),
+    "vm": (VM, 1),
+    "python": (PythonInterpreter, 1),
+}
+
+
+@pytest.mark.parametrize("stream", [False, True], ids=["list", "stream"])
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("script", SCRIPT_FILES, ids=script_id)
+def test_backend_matches_tree_walker(script: Path, backend: str, stream, capsys):
+    statements = parse(script.read_text())
+    capsys.readouterr()
+    if statements is None:
+        pytest.skip("doesn't parse yet")
+
+    if backend == "vm" and script in LIMIT_FILES:
+        pytest.skip("past clox's limits, test_vm checks the errors")
+
+    engine, rounds = BACKENDS[backend]
+    expected = run_engine(Interpreter, statements, capsys, rounds)
+    # Streaming compiles one chunk or code object per statement
+    result = run_engine(engine, statements, capsys, rounds, stream)
+    assert result == expected
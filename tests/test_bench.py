@@ -0,0 +1,125 @@
+import io
+import json
+
+import pytest
+
+from pythox.bench import compare, main, significant, synthetic
+from pythox.interpreter import Interpreter
+from pythox.parser import Parser
+from pythox.pythox import Pythox
+from pythox.scanner import Scanner
+
+
+def ok(*totals: float) -> dict:
+    return {"status": "ok", "total": list(totals)}
+
+
+def test_synthetic_programs_run():
+    source = synthetic(2_200)
+    assert 2_000 < source.count("\n") <= 2_202
+    out = io.StringIO()
+    Interpreter(output_writer=out.write).interpret(
+        Parser(Scanner(source).scanTokens(), pratt=True).parse()
+    )
+    assert float(out.getvalue())
+
+
+def test_significance():
+    baseline = [1.00, 1.02, 0.98, 1.01, 0.99]
+    assert significant(baseline, [1.50, 1.52, 1.48, 1.51, 1.49])
+    assert not significant(baseline, [1.01, 0.99, 1.03, 0.97, 1.00])
+    # Too noisy to tell
+    assert not significant(baseline, [0.5, 2.5, 1.0, 1.9, 0.7])
+    assert significant([1.0, 1.0], [2.0, 2.0])
+    assert not significant([1.0], [2.0])
+
+
+def test_compare():
+    baseline = {
+        "benchmarks": {
+            "regressed": ok(1.0, 1.01, 0.99),
+            "slower": ok(1.0, 1.01, 0.99),
+            "faster": ok(1.0, 1.01, 0.99),
+            "noisy": ok(1.0, 1.01, 0.99),
+            "skipped": {"status": "skipped", "reason": "no clock"},
+        }
+    }
+    current = {
+        "benchmarks": {
+            "regressed": ok(1.3, 1.31, 1.29),
+            "slower": ok(1.05, 1.06, 1.04),
+            "faster": ok(0.5, 0.51, 0.49),
+            "noisy": ok(0.6, 1.4, 1.1),
+            "skipped": ok(1.0, 1.0),
+            "new": ok(1.0, 1.0),
+        }
+    }
+    assert compare(baseline, current, threshold=0.10) == {
+        "regressed": "REGRESSED",
+        "slower": "slower",
+        "faster": "faster",
+        "noisy": "same",
+        "skipped": "-",
+        "new": "-",
+    }
+
+
+def test_runs_saves_and_compares(tmp_path, monkeypatch, capsys):
+    (tmp_path / "sum.lox").write_text(
+        "var a = 0; for (var i = 0; i < 100; i = i + 1) a = a + i; print a;"
+    )
+    (tmp_path / "unsupported.lox").write_text("print readLine();")
+    (tmp_path / "unparsable.lox").write_text("print 1 +;")
+    names = ("sum.lox", "unsupported.lox", "unparsable.lox")
+    scripts = [str(tmp_path / name) for name in names]
+    saved = tmp_path / "baseline.json"
+    options = ["--repeat", "2", "--warmup", "0", "--synthetic", "0"]
+
+    assert main([*scripts, *options, "--save", str(saved)]) == 0
+    out = capsys.readouterr().out
+    assert (
+        "unsupported              skipped: "
+        "[line 1] RuntimeError: Undefined variable 'readLine'.\n"
+    ) in out
+    assert "unparsable               skipped: [line 1] Expect expression.\n" in out
+
+    results = json.loads(saved.read_text())
+    assert results["backend"] == "tree"
+    run = results["benchmarks"]["sum"]
+    assert run["status"] == "ok" and run["nodes"] > 0 and run["bytes"] > 0
+    assert len(run["total"]) == len(run["scan"]) == 2
+    assert results["benchmarks"]["unsupported"]["status"] == "skipped"
+
+    # Timings that are 20% slower, without a noisy machine in the way
+    run["total"] = [0.100, 0.101]
+    saved.write_text(json.dumps(results))
+    samples = iter([0.120, 0.121])
+    monkeypatch.setattr(
+        "pythox.bench.measure",
+        lambda path, **options: {
+            "error": None,
+            **{key: run[key] for key in ("bytes", "tokens", "nodes")},
+            **{phase: 0.01 for phase in ("scan", "parse", "interpret")},
+            "total": next(samples),
+        },
+    )
+    assert main([scripts[0], *options, "--compare", str(saved)]) == 1
+    captured = capsys.readouterr()
+    assert "REGRESSED" in captured.out
+    assert "1 regressed more than 10%: sum" in captured.err
+
+
+def test_bench_command(monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["pythox", "bench", "--help"])
+    with pytest.raises(SystemExit) as exit:
+        Pythox().main()
+    assert exit.value.code == 0
+    assert "usage: pythox bench" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("repeat", ["0", "-2"])
+def test_repeat_must_be_positive(repeat, capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(["--repeat", repeat])
+    assert exit.value.code == 2
+    assert "--repeat: must be at least 1" in capsys.readouterr().err
@@ -0,0 +1,170 @@
+import io
+import timeit
+from pathlib import Path
+
+import pytest
+
+from pythox.expr import Call
+from pythox.interpreter import Interpreter, LoxFunction, RuntimeError_
+from pythox.stmt import Return
+from tests.test_helper import (
+    parse,
+    run_script_test,
+    run_source,
+    script_files,
+    script_id,
+)
+
+CALL_FILES = script_files("function", "return", "call", "if", "closure")
+
+FIB = """
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+print fib(%d);
+"""
+
+
+@pytest.mark.parametrize("lox_file", CALL_FILES, ids=script_id)
+def test_call_scripts(lox_file: Path, capsys):
+    run_script_test(lox_file, capsys)
+
+
+def test_frames_are_pooled(capsys):
+    interpreter = Interpreter()
+    assert run_source(FIB % 10, capsys, interpreter) == ("55\n", "")
+
+    fib = interpreter.globals["fib"].value
+    assert isinstance(fib, LoxFunction)
+    assert str(fib) == "<fn fib>"
+    # One frame per level of recursion, reused by every call at that level
+    assert len(fib.pool) == 10
+    assert all(frame[0] is None and len(frame) == 2 for frame in fib.pool)
+    assert len({id(frame) for frame in fib.pool}) == 10
+
+
+def test_captured_frames_are_not_pooled(capsys):
+    source = """
+    fun counter() {
+      var i = 0;
+      fun count() { i = i + 1; return i; }
+      return count;
+    }
+    var a = counter();
+    var b = counter();
+    print a(); print a(); print b();
+    """
+    interpreter = Interpreter()
+    assert run_source(source, capsys, interpreter) == ("1\n2\n1\n", "")
+    assert interpreter.globals["counter"].value.pool is None
+    # count's own frame never escapes, so it is pooled
+    assert interpreter.globals["a"].value.pool is not None
+
+
+def test_returns_unwind_blocks_and_loops(capsys):
+    source = """
+    fun find(limit) {
+      var i = 0;
+      while (true) {
+        { var j = i * i; if (j > limit) return i; }
+        i = i + 1;
+      }
+    }
+    print find(50);
+    print find(0);
+    """
+    interpreter = Interpreter()
+    assert run_source(source, capsys, interpreter) == ("8\n1\n", "")
+    assert interpreter.environment is None
+
+
+def test_call_errors(capsys):
+    assert run_source("fun f(a) {} f(1, 2);", capsys) == (
+        "",
+        "[line 1] RuntimeError: Expected 1 arguments but got 2.\n",
+    )
+    # Arguments are evaluated before the callee is checked
+    assert run_source('"str"(1 + nil);', capsys) == (
+        "",
+        "[line 1] RuntimeError: Operands must be two numbers or two strings\n",
+    )
+    assert run_source('"str"();', capsys)[1] == (
+        "[line 1] RuntimeError: Can only call functions and classes.\n"
+    )
+    interpreter = Interpreter()
+    run_source("fun f(a) { { print a + nil; } }", capsys, interpreter)
+    assert "Operands" in run_source("f(1);", capsys, interpreter)[1]
+    assert interpreter.environment is None
+
+
+class ReturnException(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+class TextbookInterpreter(Interpreter):
+    """Baseline: a fresh frame and argument list per call, exception returns."""
+
+    def execute(self, stmt):
+        if stmt.__class__ is Return:
+            value = None if stmt.value is None else self.evaluate(stmt.value)
+            raise ReturnException(value)
+        return super().execute(stmt)
+
+    def evaluate(self, expr):
+        if expr.__class__ is not Call:
+            return super().evaluate(expr)
+        callee = self.evaluate(expr.callee)
+        arguments = [self.evaluate(argument) for argument in expr.arguments]
+        if not isinstance(callee, LoxFunction):
+            raise RuntimeError_(expr.paren, "Can only call functions and classes.")
+        if len(arguments) != callee.arity:
+            raise RuntimeError_(
+                expr.paren,
+                f"Expected {callee.arity} arguments but got {len(arguments)}.",
+            )
+        frame = [None] * callee.size
+        frame[0] = callee.closure
+        frame[1 : len(arguments) + 1] = arguments
+        previous = self.environment
+        self.environment = frame
+        try:
+            for stmt in callee.body:
+                self.execute(stmt)
+        except ReturnException as signal:
+            return signal.value
+        finally:
+            self.environment = previous
+        return None
+
+
+def test_call_speed(capsys):
+    """Reports calls/second on fib(20) for both call paths."""
+    n = 20
+    # fib(n) makes 2 * fib(n + 1) - 1 calls
+    a, b = 0, 1
+    for _ in range(n + 1):
+        a, b = b, a + b
+    calls = 2 * a - 1
+    statements = parse(FIB % n)
+
+    results = {}
+    for engine in (TextbookInterpreter, Interpreter):
+        out = io.StringIO()
+        results[engine] = min(
+            timeit.repeat(
+                lambda: engine(output_writer=out.write).interpret(statements),
+                number=1,
+                repeat=3,
+            )
+        )
+        assert out.getvalue() == "6765\n" * 3
+
+    textbook, pooled = results.values()
+    with capsys.disabled():
+        print(
+            f"\nfib({n}), {calls} calls: textbook {calls / textbook:,.0f} calls/s, "
+            f"pooled frames + sentinel returns {calls / pooled:,.0f} calls/s "
+            f"({textbook / pooled:.2f}x)"
+        )
@@ -0,0 +1,88 @@
+import io
+import timeit
+
+from pythox.interpreter import Interpreter, LoxFunction
+from tests.test_helper import EXPRESSION_FILES, parse, parse_expectations
+
+
+def test_closures_pass_expression_suite():
+    for script in EXPRESSION_FILES:
+        expected, _, _ = parse_expectations(script.read_text())
+        out = io.StringIO()
+        Interpreter(output_writer=out.write, closures=True).interpret(
+            parse(script.read_text())
+        )
+        assert out.getvalue().splitlines() == expected
+
+
+def test_closure_speedup(capsys):
+    """Reports tree walking vs compiled closures on the expression suite."""
+    source = "\n".join(p.read_text() for p in EXPRESSION_FILES) * 20
+    statements = parse(source)
+    sink = []
+
+    walker = Interpreter(output_writer=sink.append)
+    compiled = Interpreter(output_writer=sink.append, closures=True)
+    closures = [compiled.compiler.statement(stmt) for stmt in statements]
+
+    def walk():
+        for stmt in statements:
+            walker.execute(stmt)
+
+    def call():
+        for closure in closures:
+            closure()
+
+    def compile_and_call():
+        fresh = Interpreter(output_writer=sink.append, closures=True)
+        fresh.interpret(statements)
+
+    tree = min(timeit.repeat(walk, number=20, repeat=5))
+    hot = min(timeit.repeat(call, number=20, repeat=5))
+    cold = min(timeit.repeat(compile_and_call, number=20, repeat=5))
+
+    with capsys.disabled():
+        print(
+            f"\nexpression suite x20, 20 runs: tree {tree * 1000:.1f} ms, "
+            f"closures {hot * 1000:.1f} ms precompiled "
+            f"({tree / hot:.1f}x), {cold * 1000:.1f} ms compiling every run"
+        )
+
+
+def test_function_bodies_are_compiled():
+    interpreter = Interpreter(output_writer=io.StringIO().write, closures=True)
+    interpreter.interpret(
+        parse(
+            """
+            fun outer() { fun inner() { return 1; } return inner; }
+            class A { m() { return outer(); } }
+            var inner = A().m();
+            """
+        )
+    )
+    functions = [interpreter.globals[name].value for name in ("outer", "inner")]
+    functions.append(interpreter.globals["A"].value.methods["m"])
+    for function in functions:
+        assert function.__class__ is LoxFunction
+        assert function.compiled is not None
+
+
+def test_call_speedup(capsys):
+    """Reports tree walking vs compiled closures on recursive calls."""
+    statements = parse(
+        "fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }"
+        "var i = 0; while (i < 3) { fib(15); i = i + 1; }"
+    )
+
+    def run(closures: bool):
+        Interpreter(output_writer=io.StringIO().write, closures=closures).interpret(
+            statements
+        )
+
+    tree = min(timeit.repeat(lambda: run(False), number=1, repeat=3))
+    closures = min(timeit.repeat(lambda: run(True), number=1, repeat=3))
+    with capsys.disabled():
+        print(
+            f"\nfib(15) x3: tree {tree * 1000:.1f} ms, "
+            f"closures {closures * 1000:.1f} ms ({tree / closures:.1f}x)"
+        )
@@ -0,0 +1,125 @@
+import io
+import timeit
+
+from pythox.expr import Variable
+from pythox.interpreter import GlobalSite, Interpreter
+from tests.test_helper import parse
+
+
+def run(source: str, capsys, interpreter: Interpreter | None = None):
+    out = io.StringIO()
+    if interpreter is None:
+        interpreter = Interpreter()
+    interpreter.output_writer = out.write
+    interpreter.interpret(parse(source))
+    return out.getvalue(), capsys.readouterr().out
+
+
+def test_undefined_errors_unchanged(capsys):
+    assert run("print a;", capsys) == (
+        "",
+        "[line 1] RuntimeError: Undefined variable 'a'.\n",
+    )
+    assert run("var b = 1;\n{ a = 2; }", capsys) == (
+        "",
+        "[line 2] RuntimeError: Undefined variable 'a'.\n",
+    )
+    # Assignment never defines
+    interpreter = Interpreter()
+    run("a = 1;", capsys, interpreter)
+    assert "a" not in interpreter.globals
+
+
+def test_sites_cache_their_cell(capsys):
+    interpreter = Interpreter()
+    statements = parse("var a = 1; print a; a = 2; print a;")
+    interpreter.output_writer = io.StringIO().write
+    interpreter.interpret(statements)
+
+    sites = [
+        site for site in interpreter.sites.values() if isinstance(site, GlobalSite)
+    ]
+    assert len(sites) == 3
+    assert all(site.cell is interpreter.globals["a"] for site in sites)
+
+    # Redefining keeps the cell, so cached sites see the new value
+    assert run("var a = 3; print a;", capsys, interpreter) == ("3\n", "")
+    assert all(site.cell is interpreter.globals["a"] for site in sites)
+
+
+def test_missing_global_is_reprobed_after_a_define(capsys):
+    interpreter = Interpreter()
+    [read] = parse("print later;")
+    site_node = read.expression
+    assert isinstance(site_node, Variable)
+
+    # Same statement object twice, so the site and its stamp carry over
+    assert run_statements([read], interpreter, capsys) == (
+        "",
+        "[line 1] RuntimeError: Undefined variable 'later'.\n",
+    )
+    site = interpreter.sites[id(site_node)]
+    assert site.cell is None
+    assert site.version == interpreter.globalsVersion
+
+    run("var unrelated = 0;", capsys, interpreter)
+    assert run_statements([read], interpreter, capsys)[1] != ""
+
+    run('var later = "now";', capsys, interpreter)
+    assert run_statements([read], interpreter, capsys) == ("now\n", "")
+    assert site.cell is interpreter.globals["later"]
+
+
+def run_statements(statements, interpreter, capsys):
+    out = io.StringIO()
+    interpreter.output_writer = out.write
+    interpreter.interpret(statements)
+    return out.getvalue(), capsys.readouterr().out
+
+
+class ByNameInterpreter(Interpreter):
+    """Baseline: every global access is a dict probe by name."""
+
+    def resolveGlobal(self, expr):
+        pass
+
+
+def test_global_cache_speed(capsys):
+    """Reports cached global cells vs by-name lookups."""
+    # The loop from benchmark/string_equality.lox, minus clock() which
+    # isn't defined yet
+    source = """
+        var a1 = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa1";
+        var a2 = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa2";
+        var i = 0;
+        while (i < 2000) {
+          i = i + 1;
+          a1; a1; a1; a2; a2; a1; a2; a2;
+          a1 == a1; a1 == a2; a2 == a1; a2 == a2;
+        }
+        print i;
+    """
+    statements = parse(source)
+    read = statements[-2].body.statements[1].expression
+    assert isinstance(read, Variable)
+
+    results = {}
+    for engine in (ByNameInterpreter, Interpreter):
+        out = io.StringIO()
+        interpreter = engine(output_writer=out.write)
+        loop = min(
+            timeit.repeat(lambda: interpreter.interpret(statements), number=1, repeat=5)
+        )
+        reads = min(
+            timeit.repeat(lambda: interpreter.evaluate(read), number=100_000, repeat=5)
+        )
+        assert out.getvalue() == "2000\n" * 5
+        results[engine] = loop, reads
+
+    (loop, reads), (cachedLoop, cachedReads) = results.values()
+    with capsys.disabled():
+        print(
+            f"\nglobal reads, 100k: by name {reads * 1000:.1f} ms, cached cells "
+            f"{cachedReads * 1000:.1f} ms ({reads / cachedReads:.2f}x); "
+            f"whole loop {loop * 1000:.1f} ms vs {cachedLoop * 1000:.1f} ms"
+        )
@@ -0,0 +1,159 @@
+import io
+import sys
+import timeit
+from pathlib import Path
+
+import pytest
+
+from pythox.interning import (
+    INTERN_MIN,
+    STRING_TABLE,
+    TABLE_ONLY,
+    InternTable,
+    _refcounts,
+)
+from pythox.interpreter import Interpreter
+from pythox.rope import ROPE_MIN
+from pythox.scanner import Scanner
+from pythox.ttoken import TokenType
+from tests.test_helper import parse
+
+BENCHMARKS = Path(__file__).parent / "loxscripts" / "benchmark"
+
+
+def run(source: str) -> Interpreter:
+    interpreter = Interpreter(output_writer=io.StringIO().write)
+    interpreter.interpret(parse(source))
+    return interpreter
+
+
+@pytest.mark.parametrize("bulk", [False, True], ids=["scanToken", "bulk"])
+def test_scanner_interns_lexemes_and_literals(bulk):
+    # Built at runtime so the source's own constants can't be shared
+    name = "".join(["co", "unter"])
+    text = "".join(["he", "llo"])
+    tokens = Scanner(
+        f'var {name} = "{text}"; {name} = "{text}" + {name};', bulk=bulk
+    ).scanTokens()
+
+    names = [t.lexeme for t in tokens if t.tType is TokenType.IDENTIFIER]
+    literals = [t.literal for t in tokens if t.tType is TokenType.STRING]
+    assert len(names) == 3 and len(literals) == 2
+    assert names[0] is names[1] is names[2]
+    assert literals[0] is literals[1] == text
+
+
+def test_runtime_strings_are_interned():
+    long = "x" * ROPE_MIN
+    interpreter = run(
+        f"""
+        var built = "ab" + "c";
+        var literal = "abc";
+        var rope = "{long}" + "!";
+        var flat = "{long}!";
+        print rope == flat;
+        """
+    )
+    value = lambda name: interpreter.globals[name].value  # noqa: E731
+    assert value("built") is value("literal")
+    # A rope is interned when it's flattened, here by the ==
+    assert str(value("rope")) is value("flat")
+
+
+def test_sweep_drops_unreferenced_strings():
+    table = InternTable()
+    keep = [table.intern("".join(["keep", str(i)])) for i in range(10)]
+    for i in range(INTERN_MIN - len(keep)):
+        table.intern("".join(["drop", str(i)]))
+    assert len(table) == INTERN_MIN
+    # Reaching the limit swept everything but the strings still in use
+    table.intern("last")
+    assert set(table.strings) == {*keep, "last"}
+    assert table.limit == INTERN_MIN
+    assert table.intern("".join(["keep", "3"])) is keep[3]
+
+
+def test_sweep_threshold_matches_this_python():
+    # If CPython's reference counting changes, the calibrated threshold has
+    # to move with it or a sweep drops live strings / keeps dead ones
+    table = InternTable()
+    table.intern("".join(["only", "table"]))
+    held = table.intern("".join(["held", "outside"]))
+    counts = _refcounts(table.strings)
+    assert counts == {"onlytable": TABLE_ONLY, "heldoutside": TABLE_ONLY + 1}
+    # Its keys are references too
+    del counts
+    table.sweep()
+    assert list(table.strings) == [held]
+
+
+def test_equality_semantics():
+    interpreter = Interpreter()
+    nan = float("nan")
+    assert interpreter.isEqual(None, None)
+    assert not interpreter.isEqual(None, False)
+    assert not interpreter.isEqual(nan, nan)
+    assert interpreter.isEqual(1.0, 1.0)
+    # Equal but not interned still compares by value
+    a, b = "".join(["s", "tr"]), "".join(["st", "r"])
+    assert a is not b and interpreter.isEqual(a, b)
+
+    out = io.StringIO()
+    Interpreter(output_writer=out.write, quicken=True).interpret(
+        parse('var a = "str"; var b = "s" + "tr"; print a == b; print a != b;')
+    )
+    assert out.getvalue() == "true\nfalse\n"
+
+
+class ValueEqualityInterpreter(Interpreter):
+    """Baseline: isEqual as it was, always comparing by value."""
+
+    def isEqual(self, objecta, objectb) -> bool:
+        if objecta is None and objectb is None:
+            return True
+        if objecta is None:
+            return False
+        return objecta == objectb
+
+
+def test_string_equality_speed(capsys):
+    """Reports string_equality.lox time and what interning saves in tokens."""
+    source = (
+        (BENCHMARKS / "string_equality.lox")
+        .read_text()
+        .replace("clock()", "0")
+        .replace("i < 100000", "i < 50")
+    )
+    statements = parse(source)
+
+    results = {}
+    for engine in (ValueEqualityInterpreter, Interpreter):
+        out = io.StringIO()
+        results[engine] = min(
+            timeit.repeat(
+                lambda: engine(output_writer=out.write).interpret(statements),
+                number=1,
+                repeat=5,
+            )
+        )
+        assert out.getvalue() == "loop\n0\nelapsed\n0\nequals\n0\n" * 5
+
+    # Lexemes of the scanned script: one object per token before, one per
+    # distinct string now
+    tokens = Scanner(source).scanTokens()
+    perToken = sum(sys.getsizeof(t.lexeme) for t in tokens)
+    distinct = {id(t.lexeme): t.lexeme for t in tokens}
+    shared = sum(sys.getsizeof(s) for s in distinct.values())
+    table = sys.getsizeof(STRING_TABLE.strings)
+
+    values, interned = results.values()
+    with capsys.disabled():
+        print(
+            f"\nstring_equality.lox, 50 iterations: by value {values * 1000:.1f} ms, "
+            f"interned {interned * 1000:.1f} ms ({values / interned:.2f}x)"
+        )
+        print(
+            f"  {len(tokens)} tokens: lexemes {perToken / 1e3:.0f} kB one per token, "
+            f"{shared / 1e3:.1f} kB interned, table {table / 1e3:.0f} kB "
+            f"for {len(STRING_TABLE)} strings"
+        )
@@ -0,0 +1,206 @@
+import io
+import timeit
+from collections import ChainMap
+from pathlib import Path
+
+import pytest
+
+from pythox import interpreter as interpreterModule
+from pythox.expr import Call, Super
+from pythox.interpreter import BoundMethod, Interpreter, LoxClass, SuperSite
+from pythox.stmt import Class
+from tests.test_helper import (
+    LOX_ROOT,
+    parse,
+    run_script_test,
+    run_source,
+    script_files,
+    script_id,
+)
+
+INHERITANCE_FILES = script_files("inheritance", "super", "for")
+BENCHMARKS = LOX_ROOT / "benchmark"
+
+
+@pytest.mark.parametrize("lox_file", INHERITANCE_FILES, ids=script_id)
+def test_inheritance_scripts(lox_file: Path, capsys):
+    run_script_test(lox_file, capsys)
+
+
+def test_method_tables_are_flattened(capsys):
+    source = """
+    class A { a() { return "A.a"; } b() { return "A.b"; } }
+    class B < A { b() { return "B.b"; } c() { return "B.c"; } }
+    class C < B { c() { return "C.c"; } }
+    """
+    interpreter = Interpreter()
+    run_source(source, capsys, interpreter)
+    a, b, c = (interpreter.globals[name].value for name in "ABC")
+
+    assert c.superclass is b and b.superclass is a
+    assert set(c.methods) == {"a", "b", "c"}
+    assert c.methods["a"] is a.methods["a"]
+    assert c.methods["b"] is b.methods["b"]
+    assert c.methods["c"] is not b.methods["c"]
+    # The superclass's table is left alone
+    assert set(a.methods) == {"a", "b"}
+
+
+def test_super_sites_resolve_once(capsys):
+    source = """
+    class A { name() { return "A"; } }
+    class B < A { name() { return "B" + super.name(); } }
+    var b = B();
+    print b.name(); print b.name();
+    """
+    interpreter = Interpreter()
+    assert run_source(source, capsys, interpreter) == ("BA\nBA\n", "")
+    [site] = [s for s in interpreter.sites.values() if isinstance(s, SuperSite)]
+    a = interpreter.globals["A"].value
+    assert site.superclass is a
+    assert site.method is a.methods["name"]
+
+
+def test_super_sites_follow_the_defined_superclass(capsys):
+    # One Super node, two classes defined from it with different superclasses
+    source = """
+    class A { m() { return "A"; } }
+    class B { m() { return "B"; } }
+    fun make(base) {
+      class C < base { m() { return "C" + super.m(); } }
+      return C();
+    }
+    var fromA = make(A);
+    var fromB = make(B);
+    print fromA.m(); print fromB.m(); print fromA.m();
+    """
+    assert run_source(source, capsys) == ("CA\nCB\nCA\n", "")
+
+
+def test_immediate_calls_dont_bind(capsys, monkeypatch):
+    created = []
+
+    class CountingBoundMethod(BoundMethod):
+        __slots__ = ()
+
+        def __init__(self, receiver, method):
+            created.append(method)
+            super().__init__(receiver, method)
+
+    monkeypatch.setattr(interpreterModule, "BoundMethod", CountingBoundMethod)
+    source = """
+    class Counter {
+      init() { this.n = 0; }
+      bump() { this.n = this.n + 1; return this; }
+    }
+    class Twice < Counter {
+      bump() { super.bump(); return super.bump(); }
+    }
+    var c = Twice();
+    for (var i = 0; i < 100; i = i + 1) c.bump().bump();
+    print c.n;
+    var m = c.bump;
+    m();
+    print c.n;
+    """
+    assert run_source(source, capsys) == ("400\n402\n", "")
+    # Only the first call at each site binds, before its cache is filled,
+    # plus the one read as a value
+    assert len(created) == 3
+
+
+def test_class_errors(capsys):
+    assert run_source("var x = 1; class A < x {}", capsys)[1] == (
+        "[line 1] RuntimeError: Superclass must be a class.\n"
+    )
+    source = "class A {} class B < A { m() { super.nope(); } } B().m();"
+    assert run_source(source, capsys)[1] == (
+        "[line 1] RuntimeError: Undefined property 'nope'.\n"
+    )
+    assert run_source("class A { m(a) {} } A().m();", capsys)[1] == (
+        "[line 1] RuntimeError: Expected 1 arguments but got 0.\n"
+    )
+
+
+class JloxMethodsInterpreter(Interpreter):
+    """
+    Baseline: method lookups walk the superclass chain, every method call
+    allocates a BoundMethod and `super` is looked up on every use.
+    """
+
+    def define(self, stmt, name, value):
+        if value.__class__ is LoxClass:
+            own = {
+                method.name.lexeme: value.methods[method.name.lexeme]
+                for method in stmt.methods
+            }
+            value.methods = own
+            if value.superclass is not None:
+                value.methods = ChainMap(own, value.superclass.methods)
+        super().define(stmt, name, value)
+
+    def getProperty(self, expr, instance):
+        value = super().getProperty(expr, instance)
+        if value.__class__ is BoundMethod:
+            # Forget the method, only fields stay cached
+            self.sites[id(expr)].shape = None
+        return value
+
+    def superMethod(self, expr):
+        receiver, method = super().superMethod(expr)
+        self.sites[id(expr)].superclass = None
+        return receiver, method
+
+    def evaluate(self, expr):
+        if expr.__class__ is Call and expr.callee.__class__ is Super:
+            bound = BoundMethod(*self.superMethod(expr.callee))
+            return self.callSlow(bound, expr)
+        return super().evaluate(expr)
+
+
+class FlattenedInterpreter(Interpreter):
+    """Flattened tables and call-site caches, behind the same extra dispatch."""
+
+    def evaluate(self, expr):
+        if expr.__class__ is Call and expr.callee.__class__ is Super:
+            return super().evaluate(expr)
+        return super().evaluate(expr)
+
+
+def without_clock(script: str) -> str:
+    source = (BENCHMARKS / script).read_text()
+    return (
+        source.replace("var start = clock();\n", "")
+        .replace("print clock() - start;", "")
+        .replace("while (clock() - start < 10)", "while (batch < 2)")
+        .replace("var n = 100000;", "var n = 300;")
+        .replace("i < 10000;", "i < 300;")
+    )
+
+
+def test_method_call_speed(capsys):
+    """Reports chain walking + binding vs flattened tables on two benchmarks."""
+    lines = []
+    for script in ("method_call.lox", "zoo_batch.lox"):
+        statements = parse(without_clock(script))
+        assert any(isinstance(stmt, Class) for stmt in statements)
+        outputs = []
+
+        def run(engine):
+            out = io.StringIO()
+            engine(output_writer=out.write).interpret(statements)
+            outputs.append(out.getvalue())
+
+        jlox = min(
+            timeit.repeat(lambda: run(JloxMethodsInterpreter), number=1, repeat=5)
+        )
+        flat = min(timeit.repeat(lambda: run(FlattenedInterpreter), number=1, repeat=5))
+        assert len(set(outputs)) == 1 and outputs[0] != ""
+        lines.append(
+            f"  {script}: chain walk + bind {jlox * 1000:.1f} ms, "
+            f"flattened + call-site caches {flat * 1000:.1f} ms ({jlox / flat:.2f}x)"
+        )
+
+    with capsys.disabled():
+        print("\nmethod calls:")
+        print("\n".join(lines))
@@ -0,0 +1,122 @@
+import io
+import timeit
+
+import pytest
+
+from pythox.interpreter import NATIVES, Interpreter, NativeFunction
+from pythox.rope import ROPE_MIN
+from tests.test_helper import parse
+
+ENGINES = [{}, {"closures": True}, {"quicken": True}, {"explicitStack": True}]
+IDS = ["tree", "closures", "quicken", "explicit"]
+
+
+def run(source: str, capsys, **options) -> tuple[str, str]:
+    out = io.StringIO()
+    Interpreter(output_writer=out.write, **options).interpret(parse(source))
+    return out.getvalue(), capsys.readouterr().out
+
+
+@pytest.mark.parametrize("options", ENGINES, ids=IDS)
+def test_clock(options, capsys):
+    source = """
+    var start = clock();
+    var i = 0;
+    while (i < 100) i = i + 1;
+    print clock() >= start;
+    print clock;
+    var alias = clock;
+    print alias() > 0;
+    """
+    assert run(source, capsys, **options) == ("true\n<native fn>\ntrue\n", "")
+    assert [native.name for native in NATIVES] == ["clock"]
+
+
+@pytest.mark.parametrize("options", ENGINES, ids=IDS)
+def test_embedder_natives(options, capsys):
+    natives = [
+        NativeFunction("upper", 1, str.upper),
+        NativeFunction("length", 1, len),
+        NativeFunction("both", 2, lambda a, b: f"{a}{b}"),
+    ]
+    source = f"""
+    print upper("abc");
+    print length("abcd") + 1;
+    var long = "{"x" * ROPE_MIN}" + "y";
+    print length(long);
+    print both(1, nil);
+    """
+    out, errors = run(source, capsys, natives=natives, **options)
+    assert errors == ""
+    assert out == f"ABC\n5\n{ROPE_MIN + 1}\n1.0None\n"
+
+
+@pytest.mark.parametrize("options", ENGINES, ids=IDS)
+def test_native_errors(options, capsys):
+    natives = [NativeFunction("inverse", 1, lambda x: 1 / x)]
+    assert run("print clock(1);", capsys, natives=natives, **options) == (
+        "",
+        "[line 1] RuntimeError: Expected 0 arguments but got 1.\n",
+    )
+    assert run("print inverse(0);", capsys, natives=natives, **options) == (
+        "",
+        "[line 1] RuntimeError: inverse: float division by zero\n",
+    )
+
+
+def test_natives_can_be_replaced_and_added_later(capsys):
+    interpreter = Interpreter(
+        output_writer=io.StringIO().write,
+        natives=[NativeFunction("clock", 0, lambda: 42)],
+    )
+    interpreter.defineNative("twice", 1, lambda x: x * 2)
+    out = io.StringIO()
+    interpreter.output_writer = out.write
+    interpreter.interpret(parse("print clock(); print twice(4);"))
+    assert out.getvalue() == "42\n8\n"
+    # Other interpreters still have the built-in one
+    assert Interpreter().globals["clock"].value is NATIVES[0]
+
+
+def test_benchmarks_run_with_clock(capsys):
+    source = """
+    fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+    var start = clock();
+    print fib(10) == 55;
+    print clock() - start >= 0;
+    """
+    assert run(source, capsys) == ("true\ntrue\n", "")
+
+
+CALLS = """
+fun lox(x) { return x; }
+var i = 0;
+while (i < %d) {
+  %s;
+  i = i + 1;
+}
+"""
+
+
+def test_call_overhead(capsys):
+    """Reports the cost of one call to a native vs a Lox function."""
+    count = 50_000
+    natives = [NativeFunction("native", 1, lambda x: x)]
+    results = {}
+    for name, call in (("loop", "i"), ("native", "native(i)"), ("Lox", "lox(i)")):
+        statements = parse(CALLS % (count, call))
+        results[name] = min(
+            timeit.repeat(
+                lambda: Interpreter(
+                    output_writer=io.StringIO().write, natives=natives
+                ).interpret(statements),
+                number=1,
+                repeat=5,
+            )
+        )
+
+    loop = results.pop("loop")
+    with capsys.disabled():
+        print("\nper call, over an empty loop:")
+        for name, seconds in results.items():
+            print(f"  {name}: {(seconds - loop) / count * 1e9:.0f} ns")
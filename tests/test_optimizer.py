@@ -0,0 +1,66 @@
+import io
+
+from pythox.astPrinter import print_ast
+from pythox.interpreter import Interpreter
+from pythox.optimizer import Optimizer
+from tests.test_helper import LOX_ROOT, parse
+
+
+def run(statements, capsys) -> tuple[str, str]:
+    out = io.StringIO()
+    Interpreter(output_writer=out.write).interpret(statements)
+    return out.getvalue(), capsys.readouterr().out
+
+
+def test_folds_literals_and_groupings():
+    optimizer = Optimizer()
+    statements = list(optimizer.optimize(parse('(1 + 2) * 3;\n!(("a" + "b") == "ab");')))
+
+    assert [print_ast(s.expression) for s in statements] == ["9.0", "False"]
+    # 6 nodes -> 1 and 8 nodes -> 1
+    assert optimizer.removed == 5 + 7
+
+
+def test_runtime_errors_are_not_folded(capsys):
+    source = "print 1;\nprint (2 + 3) / (1 - 1);"
+    optimizer = Optimizer()
+    statements = list(optimizer.optimize(parse(source)))
+
+    # (2 + 3) and (1 - 1) fold, the division stays
+    assert print_ast(statements[1].expression) == "(/ 5.0 0.0)"
+    assert run(statements, capsys) == (
+        "1\n",
+        "[line 2] RuntimeError: Division by zero.\n",
+    )
+
+
+def test_same_behaviour_on_corpus(capsys):
+    """Every script that parses prints and fails the same way once folded."""
+    checked = 0
+    for path in sorted(LOX_ROOT.rglob("*.lox")):
+        if "benchmark" in path.parts:
+            continue
+        statements = parse(path.read_text())
+        capsys.readouterr()
+        if not statements:
+            continue
+        try:
+            expected = run(statements, capsys)
+        except Exception as e:
+            expected = repr(e)
+        try:
+            actual = run(Optimizer().optimize(statements), capsys)
+        except Exception as e:
+            actual = repr(e)
+        assert actual == expected, path.name
+        checked += 1
+    assert checked > 0
+
+
+def test_parser_output_is_untouched():
+    statements = parse("(5 - (3 - 1)) + -1;")
+    list(Optimizer().optimize(statements))
+
+    assert print_ast(statements[0].expression) == (
+        "(+ (group (- 5.0 (group (- 3.0 1.0)))) (- 1.0))"
+    )
@@ -0,0 +1,172 @@
+import io
+import os
+import sys
+import timeit
+from pathlib import Path
+
+import pytest
+
+from pythox.interpreter import Interpreter
+from pythox.output import OutputSink
+from pythox.transpiler import PythonInterpreter
+from pythox.vm import VM
+from tests.test_helper import parse
+
+BENCHMARKS = Path(__file__).parent / "loxscripts" / "benchmark"
+
+
+def test_sink_flushes_when_full():
+    chunks = []
+    sink = OutputSink(chunks.append, limit=10, interval=60)
+    sink.write("abc\n")
+    sink.write("def\n")
+    assert chunks == []
+    sink.write("ghi\n")
+    assert chunks == ["abc\ndef\nghi\n"]
+    sink.write("jkl\n")
+    sink.flush()
+    sink.flush()
+    assert chunks == ["abc\ndef\nghi\n", "jkl\n"]
+
+
+def test_sink_flushes_after_interval():
+    chunks = []
+    sink = OutputSink(chunks.append, interval=0)
+    sink.write("a\n")
+    sink.write("b\n")
+    assert chunks == ["a\n", "b\n"]
+
+
+def test_sink_writes_to_a_file_descriptor():
+    read, write = os.pipe()
+    order = []
+
+    class Stream:
+        encoding = "utf-8"
+
+        def flush(self):
+            order.append("stream")
+
+    try:
+        sink = OutputSink(fd=write, stream=Stream(), interval=60)
+        sink.write("héllo\n")
+        sink.write("wörld\n")
+        order.append("pending")
+        sink.flush()
+        assert os.read(read, 100).decode() == "héllo\nwörld\n"
+        # The text stream sharing the fd goes first
+        assert order == ["pending", "stream"]
+    finally:
+        os.close(read)
+        os.close(write)
+
+    with pytest.raises(ValueError):
+        OutputSink()
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [Interpreter, lambda out: Interpreter(out, closures=True), VM, PythonInterpreter],
+    ids=["tree", "closures", "vm", "python"],
+)
+def test_interpreters_flush_before_errors(engine, capsys):
+    sink = OutputSink(sys.stdout.write, interval=60)
+    engine(sink.write).interpret(parse('print 1; print "a"; print nil + 1;'))
+    assert capsys.readouterr().out == (
+        "1\na\n[line 1] RuntimeError: Operands must be two numbers or two strings\n"
+    )
+
+    engine(sink.write).interpret(parse("print 2;"))
+    assert capsys.readouterr().out == "2\n"
+
+
+def test_streamed_statements_flush_as_they_finish(capsys):
+    sink = OutputSink(sys.stdout.write, interval=60)
+    statements = parse("print 1; return 2; print 3;")
+    Interpreter(sink.write).interpret(iter(statements))
+    assert capsys.readouterr().out == (
+        "1\n[line 1] Error at 'return': Can't return from top-level code.\n"
+    )
+
+
+def test_stringify():
+    interpreter = Interpreter()
+    for value, text in (
+        (0.0, "0"),
+        (-0.0, "-0"),
+        (7.0, "7"),
+        (-1024.0, "-1024"),
+        (1025.0, "1025"),
+        (1.5, "1.5"),
+        (1e20, "1e+20"),
+        (None, "nil"),
+        (True, "true"),
+        (False, "false"),
+        ("str", "str"),
+    ):
+        assert interpreter.stringify(value) == text
+
+
+class TextStreamInterpreter(Interpreter):
+    """Baseline: stringify without the number cache."""
+
+    def stringify(self, objecta) -> str:
+        if objecta is None:
+            return "nil"
+        if isinstance(objecta, float):
+            text = str(objecta)
+            if text.endswith(".0"):
+                text = text[0:-2]
+            return text
+        if isinstance(objecta, bool):
+            return "true" if objecta else "false"
+        return str(objecta)
+
+
+def test_print_loop_speed(capsys):
+    """Reports print_loop.lox through text streams vs an OutputSink."""
+    lines = 50_000
+    source = (
+        (BENCHMARKS / "print_loop.lox")
+        .read_text()
+        .replace("var start = clock();\n", "")
+        .replace("print clock() - start;", "")
+        .replace("1000000", str(lines))
+    )
+    statements = parse(source)
+
+    def line_buffered():
+        with open(os.devnull, "w", buffering=1) as stream:
+            TextStreamInterpreter(stream.write).interpret(statements)
+
+    def block_buffered():
+        with open(os.devnull, "w") as stream:
+            TextStreamInterpreter(stream.write).interpret(statements)
+
+    def sink():
+        fd = os.open(os.devnull, os.O_WRONLY)
+        try:
+            Interpreter(OutputSink(fd=fd).write).interpret(statements)
+        finally:
+            os.close(fd)
+
+    out = io.StringIO()
+    Interpreter(OutputSink(out.write).write).interpret(statements)
+    assert out.getvalue() == "".join(f"{i}\n" for i in range(lines))
+
+    results = {
+        name: min(timeit.repeat(run, number=1, repeat=3))
+        for name, run in (
+            ("line-buffered stream", line_buffered),
+            ("block-buffered stream", block_buffered),
+            ("sink on the fd", sink),
+        )
+    }
+    sinkTime = results["sink on the fd"]
+    with capsys.disabled():
+        print(f"\nprint_loop.lox, {lines} lines:")
+        for name, seconds in results.items():
+            print(
+                f"  {name}: {seconds * 1000:.1f} ms "
+                f"({seconds / sinkTime:.2f}x the sink's time)"
+            )
@@ -0,0 +1,86 @@
+import random
+import timeit
+from pathlib import Path
+
+import pytest
+
+from pythox.astPrinter import print_ast
+from pythox.expr import Binary, Grouping, Unary
+from pythox.parser import Parser
+from pythox.scanner import Scanner
+from tests.test_helper import LOX_ROOT, parse, run_interpreter_test, run_parser_test
+
+PARSER_FILES = [
+    p for p in (LOX_ROOT / "parser").rglob("*.lox") if p.read_text().strip()
+]
+SCRIPT_FILES = [
+    p
+    for folder in ("expressions", "precedence")
+    for p in (LOX_ROOT / folder).rglob("*.lox")
+    if p.read_text().strip()
+]
+
+
+@pytest.mark.parametrize("script", PARSER_FILES, ids=lambda f: f.name)
+def test_pratt_parser_outputs(script: Path):
+    run_parser_test(script, pratt=True)
+
+
+@pytest.mark.parametrize("script", SCRIPT_FILES, ids=lambda f: f.name)
+def test_pratt_scripts(script: Path):
+    run_interpreter_test(script, pratt=True)
+
+
+def random_expression(rng: random.Random, depth: int) -> str:
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(["1", "2.5", '"s"', "true", "false", "nil"])
+    roll = rng.random()
+    if roll < 0.15:
+        return f"({random_expression(rng, depth - 1)})"
+    if roll < 0.3:
+        return rng.choice(["-", "!"]) + random_expression(rng, depth - 1)
+    operator = rng.choice(["==", "!=", "<", "<=", ">", ">=", "+", "-", "*", "/"])
+    left = random_expression(rng, depth - 1)
+    right = random_expression(rng, depth - 1)
+    return f"{left} {operator} {right}"
+
+
+def test_pratt_builds_identical_trees():
+    rng = random.Random(1234)
+    source = "\n".join(f"{random_expression(rng, 6)};" for _ in range(300))
+
+    assert parse(source, pratt=True) == parse(source, pratt=False)
+
+
+def count_nodes(expr) -> int:
+    match expr:
+        case Binary(left, _, right):
+            return 1 + count_nodes(left) + count_nodes(right)
+        case Grouping(expression) | Unary(_, expression):
+            return 1 + count_nodes(expression)
+        case _:
+            return 1
+
+
+def test_pratt_parse_rate(capsys):
+    """Reports parse rate in AST nodes/second for both expression parsers."""
+    rng = random.Random(42)
+    tokens = Scanner(
+        "\n".join(f"{random_expression(rng, 8)};" for _ in range(500))
+    ).scanTokens()
+    nodes = sum(count_nodes(s.expression) for s in Parser(tokens).parse())
+
+    rates = {}
+    for pratt in (False, True):
+        best = min(
+            timeit.repeat(
+                lambda: Parser(tokens, pratt=pratt).parse(), number=1, repeat=5
+            )
+        )
+        rates[pratt] = nodes / best
+
+    with capsys.disabled():
+        print(
+            f"\nparse rate over {nodes} nodes: {rates[False]:,.0f} nodes/s "
+            f"recursive descent, {rates[True]:,.0f} nodes/s precedence climbing"
+        )
@@ -0,0 +1,138 @@
+import io
+import signal
+import timeit
+
+import pytest
+
+from pythox.expr import Binary, Literal
+from pythox.interpreter import Interpreter
+from pythox.profiler import OUTSIDE, Profiler
+from pythox.pythox import Pythox
+from pythox.ttoken import Token, TokenType
+from tests.test_helper import parse
+
+# hot() takes most of the time, on lines 8 and 9
+SCRIPT = """fun cold(n) {
+  var t = 0;
+  for (var i = 0; i < n; i = i + 1) t = t + i;
+  return t;
+}
+fun hot(n) {
+  var t = 0;
+  for (var i = 0; i < n; i = i + 1) {
+    t = t + i * 2;
+  }
+  return t;
+}
+fun main() {
+  print cold(%d);
+  print hot(%d);
+}
+main();
+"""
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"closures": True}, {"quicken": True}, {"explicitStack": True}],
+    ids=["tree", "closures", "quicken", "explicit"],
+)
+def test_samples_lox_call_stacks(options):
+    statements = parse(SCRIPT % (5_000, 50_000))
+    interpreter = Interpreter(output_writer=io.StringIO().write, **options)
+    with Profiler(interval=0.0005) as profiler:
+        interpreter.interpret(statements)
+
+    stacks = [stack for stack in profiler.samples if stack != (OUTSIDE,)]
+    assert stacks
+    for stack in stacks:
+        assert stack[0].startswith("<script>:")
+        assert stack[1:2] in ((), ("main:14",), ("main:15",))
+    hot = sum(
+        count for stack, count in profiler.samples.items() if stack[-1][:4] == "hot:"
+    )
+    assert hot > sum(profiler.samples.values()) / 2
+
+
+def test_stops_and_restores_the_handler():
+    previous = signal.getsignal(signal.SIGPROF)
+    with Profiler():
+        pass
+    assert signal.getsignal(signal.SIGPROF) == previous
+    assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+
+
+def test_line_of_a_node():
+    profiler = Profiler()
+    plus = Token(TokenType.PLUS, "+", None, 7)
+    assert profiler.line(Binary(Literal(1.0), plus, Literal(2.0))) == 7
+    assert profiler.line(Literal(1.0)) is None
+    assert profiler.line(None) is None
+
+
+def test_collapsed_and_summary():
+    profiler = Profiler()
+    profiler.samples.update(
+        {
+            ("<script>:9", "fib:3", "fib:3"): 6,
+            ("<script>:9", "fib:2"): 3,
+            (OUTSIDE,): 1,
+        }
+    )
+    assert profiler.collapsed() == (
+        "<pythox> 1\n<script>:9;fib:2 3\n<script>:9;fib:3;fib:3 6\n"
+    )
+    assert profiler.summary(top=2) == (
+        "10 samples, 1 ms of CPU time apart\n"
+        "   self   total  line\n"
+        "  60.0%   60.0%  fib:3\n"
+        "  30.0%   30.0%  fib:2\n"
+        "          total  function\n"
+        "          90.0%  <script>\n"
+        "          90.0%  fib\n"
+    )
+    assert "No samples" in Profiler().summary()
+
+
+def test_profile_option(tmp_path, monkeypatch, capsys):
+    script = tmp_path / "hot.lox"
+    script.write_text(SCRIPT % (500, 5_000))
+    folded = tmp_path / "hot.folded"
+    monkeypatch.setattr(
+        "sys.argv", ["pythox", "--no-cache", f"--profile={folded}", str(script)]
+    )
+    Pythox().main()
+
+    captured = capsys.readouterr()
+    assert captured.out == "124750\n24995000\n"
+    assert "samples" in captured.err and str(folded) in captured.err
+    for line in folded.read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        assert stack == OUTSIDE or stack.startswith("<script>:")
+
+    # Lox stacks only come from the tree-walking backends
+    monkeypatch.setattr("sys.argv", ["pythox", "--profile", "--backend=vm", "x.lox"])
+    with pytest.raises(SystemExit) as exit:
+        Pythox().main()
+    assert exit.value.code == 64
+
+
+def test_profiling_overhead(capsys):
+    """Reports the same script with and without the sampler running."""
+    statements = parse(SCRIPT % (5_000, 50_000))
+
+    def run():
+        Interpreter(output_writer=io.StringIO().write).interpret(statements)
+
+    def profiled():
+        with Profiler():
+            run()
+
+    plain = min(timeit.repeat(run, number=1, repeat=3))
+    sampled = min(timeit.repeat(profiled, number=1, repeat=3))
+    with capsys.disabled():
+        print(
+            f"\nprofiler, 1 ms interval: off {plain * 1000:.1f} ms, "
+            f"on {sampled * 1000:.1f} ms ({sampled / plain:.2f}x)"
+        )
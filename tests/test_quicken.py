@@ -0,0 +1,130 @@
+import timeit
+
+import pytest
+
+from pythox.expr import Binary, Literal
+from pythox.interpreter import (
+    MAX_DEOPTS,
+    QUICKEN_AFTER,
+    BinarySite,
+    Interpreter,
+    RuntimeError_,
+    quicken,
+)
+from pythox.ttoken import Token, TokenType
+from tests.test_helper import parse
+
+MINUS = Token(TokenType.MINUS, "-", None, 7)
+
+
+def test_quicken_rewrites_binary_sites():
+    [stmt] = parse("print -(1 + 2) * 3;")
+    quick = quicken(stmt)
+
+    assert isinstance(quick.expression, BinarySite)
+    assert quick.expression.operator is stmt.expression.operator
+    assert isinstance(quick.expression.left.right.expression, BinarySite)
+    # The original tree is left alone, it may be cached or shared
+    assert type(stmt.expression) is Binary
+
+
+def retype(site: BinarySite, value) -> None:
+    # Stands in for a variable whose type changes, the tree has no
+    # variables yet
+    object.__setattr__(site, "left", Literal(value))
+
+
+def test_specialize_and_deoptimize():
+    interpreter = Interpreter(quicken=True)
+    site = BinarySite(Literal(3.0), MINUS, Literal(1.0))
+
+    for _ in range(QUICKEN_AFTER - 1):
+        assert interpreter.evaluate(site) == 2.0
+    assert site.fast is None
+    assert interpreter.evaluate(site) == 2.0
+    assert site.fast is not None
+    assert interpreter.specialized == 1
+
+    # Guard fails, the generic path reports the usual error
+    retype(site, "a")
+    with pytest.raises(RuntimeError_) as e:
+        interpreter.evaluate(site)
+    assert str(e.value) == "[line 7] RuntimeError: Operands must be numbers."
+    assert site.fast is None
+    assert interpreter.deoptimized == 1
+
+    # And it can specialize again
+    retype(site, 3.0)
+    for _ in range(QUICKEN_AFTER):
+        assert interpreter.evaluate(site) == 2.0
+    assert interpreter.specialized == 2
+
+
+def test_str_sites_and_megamorphic_sites():
+    interpreter = Interpreter(quicken=True)
+    plus = Token(TokenType.PLUS, "+", None, 1)
+    concat = BinarySite(Literal("a"), plus, Literal("b"))
+    equal = BinarySite(
+        Literal(True), Token(TokenType.EQUAL_EQUAL, "==", None, 1), Literal(True)
+    )
+    for _ in range(QUICKEN_AFTER):
+        assert interpreter.evaluate(concat) == "ab"
+        assert interpreter.evaluate(equal) is True
+
+    assert interpreter.specialized == 1
+    # No bool handler, the site settles on the generic one
+    assert equal.fast is not None
+    assert interpreter.evaluate(equal) is True
+    assert interpreter.specialized == 1
+
+
+def test_sites_give_up_after_max_deopts():
+    interpreter = Interpreter(quicken=True)
+    site = BinarySite(Literal(3.0), MINUS, Literal(1.0))
+
+    for _ in range(MAX_DEOPTS):
+        retype(site, 3.0)
+        for _ in range(QUICKEN_AFTER):
+            interpreter.evaluate(site)
+        retype(site, True)
+        with pytest.raises(RuntimeError_):
+            interpreter.evaluate(site)
+
+    retype(site, 3.0)
+    for _ in range(QUICKEN_AFTER):
+        assert interpreter.evaluate(site) == 2.0
+    assert interpreter.specialized == MAX_DEOPTS
+    assert interpreter.deoptimized == MAX_DEOPTS
+    # Generic for good, errors still come out the same
+    retype(site, True)
+    with pytest.raises(RuntimeError_, match="Operands must be numbers."):
+        interpreter.evaluate(site)
+    assert interpreter.deoptimized == MAX_DEOPTS
+
+
+def test_quicken_speed(capsys):
+    """Reports the plain tree walker vs quickened sites on hot statements."""
+    source = "print 1 + 2 * 3 - 4 / 2 + (5 - 6) * 7 > 3 == true;\n" * 500
+    statements = parse(source)
+    sink = []
+
+    plain = Interpreter(output_writer=sink.append)
+    quick = Interpreter(output_writer=sink.append, quicken=True)
+    quickened = [quick.quickened(stmt) for stmt in statements]
+
+    def walk(interpreter, statements):
+        for stmt in statements:
+            interpreter.execute(stmt)
+
+    tree = min(timeit.repeat(lambda: walk(plain, statements), number=20, repeat=5))
+    hot = min(timeit.repeat(lambda: walk(quick, quickened), number=20, repeat=5))
+
+    assert quick.specialized == 8 * 500
+    assert quick.deoptimized == 0
+    with capsys.disabled():
+        print(
+            f"\n500 statements, 20 runs: tree {tree * 1000:.1f} ms, "
+            f"quickened {hot * 1000:.1f} ms ({tree / hot:.2f}x), "
+            f"{quick.specialized} sites specialized, "
+            f"{quick.deoptimized} deoptimized"
+        )
@@ -0,0 +1,145 @@
+import time
+from statistics import median
+
+import pytest
+
+from pythox.output import OutputSink
+from pythox.pythox import BACKENDS, TREE_BACKENDS, Pythox
+
+LINES = 10_000
+
+
+def repl(monkeypatch, lines, **options) -> tuple[Pythox, list[str], list[float]]:
+    """Feed lines to runPrompt, return what it printed and when each line was read."""
+    pending = iter(lines)
+    read: list[float] = []
+
+    def prompt(_: str) -> str:
+        read.append(time.perf_counter())
+        line = next(pending, None)
+        if line is None:
+            # EOF only reprompts, ^C leaves the loop
+            raise KeyboardInterrupt
+        return line
+
+    monkeypatch.setattr("builtins.input", prompt)
+    printed: list[str] = []
+    pythox = Pythox(**options)
+    pythox.output = OutputSink(printed.append)
+    pythox.runPrompt()
+    pythox.output.flush()
+    return pythox, "".join(printed).splitlines(), read
+
+
+@pytest.mark.parametrize("backend", TREE_BACKENDS)
+def test_state_survives_lines(backend, monkeypatch, capsys):
+    lines = [
+        "var a = 1;",
+        "fun add(x) { return x + a; }",
+        "class Counter { init() { this.n = 0; } bump() { this.n = this.n + add(0); return this; } }",
+        "var c = Counter();",
+        "print c.bump().bump().n;",
+        "a = 10;",
+        "print add(5);",
+        "{ var a = 2; print a; }",
+        "print c.n;",
+    ]
+    pythox, printed, _ = repl(monkeypatch, lines, backend=backend)
+    assert printed == ["2", "15", "2", "2"]
+    assert not pythox.hadError
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.parametrize("backend", TREE_BACKENDS)
+def test_errors_dont_end_the_session(backend, monkeypatch, capsys):
+    lines = [
+        "fun broken() { { var z = 1; return z + nil; } }",
+        "print broken();",
+        "print missing;",
+        "return 1;",
+        "print 1 +;",
+        "var ok = 3;",
+        "print ok;",
+    ]
+    pythox, printed, _ = repl(monkeypatch, lines, backend=backend)
+    assert printed == ["3"]
+    assert not pythox.hadError
+    errors = capsys.readouterr().out.splitlines()
+    assert len(errors) == 4
+    assert errors[0].endswith("Operands must be two numbers or two strings")
+    assert errors[1].endswith("Undefined variable 'missing'.")
+    assert pythox.session.environment is None
+    assert pythox.session.depth == 0
+
+
+def test_session_folds_constants(monkeypatch):
+    pythox, printed, _ = repl(monkeypatch, ["print (1 + 2);", "print (3 * 4);"])
+    assert printed == ["3", "12"]
+    assert pythox.foldedNodes == pythox.sessionOptimizer.removed > 0
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_session_forgets_finished_lines(backend, monkeypatch, capsys):
+    def tables(repeats: int) -> list[int]:
+        lines = ["var n = 0;", "fun get() { if (n > 0) { var m = n; return m; } }"]
+        lines += ["{ var a = n; n = a + 1; }", "print get();"] * repeats
+        pythox, printed, _ = repl(monkeypatch, lines, backend=backend)
+        assert printed[-1] == str(repeats)
+        session = pythox.session
+        compiled = getattr(session, "_compiled", {})
+        return [
+            len(table)
+            for table in (
+                session.sites,
+                session.slots,
+                session.frames,
+                session.functions,
+                session._quickened,
+                compiled,
+            )
+        ]
+
+    # Only get()'s body is left, however many lines ran after it
+    assert tables(10) == tables(1000)
+    assert capsys.readouterr().out == ""
+
+
+def session(lines: int) -> tuple[list[str], list[str]]:
+    # Every line defines something or calls what was defined before it,
+    # so the session keeps growing. Returns the lines and what they print.
+    source = ["var v0 = 0;", "fun f0(x) { return x; }"]
+    expected = []
+    # v{i} ends up as i + v{i - 1}
+    values = [0]
+    for i in range(1, (lines - 2) // 4 + 1):
+        source += [
+            f"var v{i} = {i};",
+            f"fun f{i}(x) {{ return x + v{i - 1}; }}",
+            f"print f{i - 1}({i});",
+            f"v{i} = f{i}(v{i});",
+        ]
+        expected.append(str(i + (values[i - 2] if i > 1 else 0)))
+        values.append(i + values[i - 1])
+    return source, expected
+
+
+@pytest.mark.parametrize("backend", TREE_BACKENDS)
+def test_latency_stays_flat(backend, monkeypatch, capsys):
+    """Reports per-line latency at the start and the end of a 10k line session."""
+    lines, expected = session(LINES)
+    _, printed, read = repl(monkeypatch, lines, backend=backend)
+    assert printed == expected
+    assert capsys.readouterr().out == ""
+
+    latency = [b - a for a, b in zip(read, read[1:])]
+    first = median(latency[:1000])
+    last = median(latency[-1000:])
+    with capsys.disabled():
+        print(
+            f"\nREPL {backend}, {LINES} lines: first 1k {first * 1e6:.0f} µs/line, "
+            f"last 1k {last * 1e6:.0f} µs/line ({last / first:.2f}x)"
+        )
+    # Rebuilding per line, or holding on to every line's AST, would grow
+    # with everything run so far. Flat is 1x, the rest is a noisy machine;
+    # test_session_forgets_finished_lines checks the tables exactly.
+    assert last < first * 2
@@ -0,0 +1,233 @@
+import io
+import timeit
+from pathlib import Path
+
+import pytest
+
+from pythox.expr import Assign, Variable
+from pythox.interpreter import NATIVES, Interpreter, RuntimeError_
+from pythox.stmt import Block, Var
+from tests.test_helper import LOX_ROOT, parse, run_script_test
+
+VARIABLE_FILES = sorted((LOX_ROOT / "variable").glob("*.lox")) + [
+    LOX_ROOT / "block" / "scope.lox"
+]
+BENCH_DIRS = ("closure", "block", "while")
+
+
+@pytest.mark.parametrize("lox_file", VARIABLE_FILES, ids=lambda f: f.name)
+def test_variable_scripts(lox_file: Path, capsys):
+    run_script_test(lox_file, capsys)
+
+
+def test_resolves_depth_and_slot():
+    source = """
+    var g = 1;
+    {
+      var a = 2;
+      var b = 3;
+      {
+        var c = a;
+        print b + c + g;
+        b = c;
+      }
+    }
+    """
+    statements = parse(source)
+    interpreter = Interpreter(output_writer=io.StringIO().write)
+    interpreter.interpret(statements)
+
+    resolved = {
+        (node.name.lexeme, type(node).__name__): (depth, index)
+        for node, depth, index in filter(
+            lambda site: isinstance(site, tuple), interpreter.sites.values()
+        )
+    }
+    # Frame index 0 is the enclosing frame, slots start at 1
+    assert resolved == {
+        ("a", "Variable"): (1, 1),
+        ("b", "Variable"): (1, 2),
+        ("c", "Variable"): (0, 1),
+        ("b", "Assign"): (1, 2),
+    }
+    outer = statements[1]
+    assert interpreter.frames[id(outer)][1] == 3
+    assert interpreter.frames[id(outer.statements[2])][1] == 2
+    # The global is looked up by name
+    assert {name: cell.value for name, cell in interpreter.globals.items()} == {
+        "clock": NATIVES[0],
+        "g": 1.0,
+    }
+    assert id(statements[0]) not in interpreter.slots
+
+
+def test_resolution_errors_stop_everything(capsys):
+    out = io.StringIO()
+    interpreter = Interpreter(output_writer=out.write)
+    interpreter.interpret(parse('print "first"; { var a = 1; var a = 2; }'))
+
+    assert out.getvalue() == ""
+    assert interpreter.hadError
+    assert capsys.readouterr().out == (
+        "[line 1] Error at 'a': Already a variable with this name in this scope.\n"
+    )
+
+
+def test_frames_unwind_after_runtime_errors(capsys):
+    interpreter = Interpreter(output_writer=io.StringIO().write)
+    interpreter.interpret(parse("{ var a = 1; { print a + nil; } }"))
+    assert "Operands must be two numbers or two strings" in capsys.readouterr().out
+    assert interpreter.environment is None
+
+
+class Environment:
+    """The jlox scope: a dict of names and a link to the enclosing one."""
+
+    __slots__ = ("values", "enclosing")
+
+    def __init__(self, enclosing: "Environment | None" = None):
+        self.values: dict[str, object] = {}
+        self.enclosing = enclosing
+
+    def get(self, name):
+        environment = self
+        while environment is not None:
+            if name.lexeme in environment.values:
+                return environment.values[name.lexeme]
+            environment = environment.enclosing
+        raise RuntimeError_(name, f"Undefined variable '{name.lexeme}'.")
+
+    def assign(self, name, value):
+        environment = self
+        while environment is not None:
+            if name.lexeme in environment.values:
+                environment.values[name.lexeme] = value
+                return
+            environment = environment.enclosing
+        raise RuntimeError_(name, f"Undefined variable '{name.lexeme}'.")
+
+
+class DictChainInterpreter(Interpreter):
+    """Baseline with unresolved, name-based lookups through dict scopes."""
+
+    def __init__(self, output_writer):
+        super().__init__(output_writer)
+        self.scope = Environment()
+
+    def resolveAll(self, statements) -> bool:
+        return True
+
+    def execute(self, stmt):
+        match stmt:
+            case Var(name, initializer):
+                value = None if initializer is None else self.evaluate(initializer)
+                self.scope.values[name.lexeme] = value
+            case Block(statements):
+                previous = self.scope
+                self.scope = Environment(previous)
+                try:
+                    for inner in statements:
+                        self.execute(inner)
+                finally:
+                    self.scope = previous
+            case _:
+                super().execute(stmt)
+
+    def evaluate(self, expr):
+        match expr:
+            case Variable(name):
+                return self.scope.get(name)
+            case Assign(name, value):
+                value = self.evaluate(value)
+                self.scope.assign(name, value)
+                return value
+        return super().evaluate(expr)
+
+
+class ArrayFrameInterpreter(Interpreter):
+    """Resolved lookups, behind the same extra dispatch as the baseline."""
+
+    def execute(self, stmt):
+        super().execute(stmt)
+
+    def evaluate(self, expr):
+        return super().evaluate(expr)
+
+
+# Same shapes as the closure/block/while scripts, which mostly need
+# functions the baseline doesn't have
+SYNTHETIC = {
+    "while": """
+        var i = 0;
+        var total = 0;
+        while (i < 3000) {
+          var step = i * 2;
+          total = total + step;
+          i = i + 1;
+        }
+        print total;
+    """,
+    "block": """
+        var i = 0;
+        while (i < 1000) {
+          var a = "outer";
+          { var a = "middle"; { var a = "inner"; var b = a; } }
+          i = i + 1;
+        }
+        print i;
+    """,
+    "closure": """
+        var n = 0;
+        {
+          var captured = 1;
+          { { { { var i = 0;
+            while (i < 2000) { n = n + captured; i = i + 1; }
+          } } } }
+        }
+        print n;
+    """,
+}
+
+
+def test_resolver_speed(capsys):
+    """Reports array frames vs a dict chain on scoped variable workloads."""
+    workloads = dict(SYNTHETIC)
+    skipped = []
+    for directory in BENCH_DIRS:
+        for script in sorted((LOX_ROOT / directory).glob("*.lox")):
+            statements = parse(script.read_text())
+            # The dict chain baseline has no functions
+            if statements is None or "fun " in script.read_text():
+                skipped.append(f"{directory}/{script.name}")
+            else:
+                workloads[f"{directory}/{script.name} x200"] = (
+                    script.read_text() * 200
+                )
+    capsys.readouterr()
+
+    lines = []
+    for name, source in workloads.items():
+        statements = parse(source)
+        outputs = []
+
+        def run(engine):
+            out = io.StringIO()
+            engine(output_writer=out.write).interpret(statements)
+            outputs.append(out.getvalue())
+
+        chain = min(
+            timeit.repeat(lambda: run(DictChainInterpreter), number=1, repeat=3)
+        )
+        frames = min(
+            timeit.repeat(lambda: run(ArrayFrameInterpreter), number=1, repeat=3)
+        )
+        assert len(set(outputs)) == 1
+        lines.append(
+            f"  {name}: dict chain {chain * 1000:.1f} ms, "
+            f"array frames {frames * 1000:.1f} ms ({chain / frames:.2f}x)"
+        )
+
+    with capsys.disabled():
+        print("\nresolved variables vs dict chain:")
+        print("\n".join(lines))
+        print(f"  skipped, don't parse or need functions: {len(skipped)} scripts")
@@ -0,0 +1,157 @@
+import io
+import timeit
+
+import pytest
+
+from pythox.expr import Binary
+from pythox.interpreter import Interpreter
+from pythox.rope import ROPE_MIN, Rope, concat
+from pythox.ttoken import TokenType
+from tests.test_helper import parse
+
+BUILD = """
+var s = "";
+var i = 0;
+while (i < %d) {
+  s = s + "fragment" + "-";
+  i = i + 1;
+}
+print s == %s;
+print s;
+"""
+# A report: one row at a time, appended to the text built so far
+REPORT = """
+var report = "";
+var row = 0;
+while (row < %d) {
+  report = report + "%s" + ";";
+  row = row + 1;
+}
+print report;
+"""
+LINE = "row | " + "-" * 66
+
+
+def run(source: str, capsys, **options):
+    out = io.StringIO()
+    Interpreter(output_writer=out.write, **options).interpret(parse(source))
+    return out.getvalue(), capsys.readouterr().out
+
+
+def test_short_concatenations_stay_str():
+    assert concat("a", "b") == "ab"
+    assert concat("a", "b").__class__ is str
+    long = "x" * ROPE_MIN
+    assert concat(long, "y").__class__ is Rope
+    assert concat("", long).__class__ is Rope
+
+
+def test_flattens_once_and_drops_the_tree():
+    rope = concat(concat("a" * ROPE_MIN, "b"), concat("c", "d" * ROPE_MIN))
+    assert len(rope) == 2 * ROPE_MIN + 2
+    assert rope.flat is None
+
+    text = str(rope)
+    assert text == "a" * ROPE_MIN + "bc" + "d" * ROPE_MIN
+    assert rope.flat is text and rope.left is None and rope.right is None
+    assert str(rope) is text
+
+
+def test_deep_ropes_flatten_without_recursion():
+    rope = "s" * ROPE_MIN
+    for _ in range(200_000):
+        rope = concat(rope, "x")
+    assert str(rope) == "s" * ROPE_MIN + "x" * 200_000
+
+
+def test_equality_and_hashing_match_str():
+    text = "z" * (ROPE_MIN + 5)
+    rope = concat(text[:ROPE_MIN], text[ROPE_MIN:])
+    other = concat(text[:3], text[3:])
+
+    assert rope == text and text == rope
+    assert rope == other
+    assert rope != text + "!" and text + "!" != rope
+    assert rope != 1.0 and rope != None  # noqa: E711
+    assert hash(rope) == hash(text)
+    assert {text: 1}[rope] == 1
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"quicken": True}, {"closures": True}], ids=["tree", "quicken", "closures"]
+)
+def test_lox_strings_behave_the_same(options, capsys):
+    count = 50
+    expected = "fragment-" * count
+    out, errors = run(BUILD % (count, f'"{expected}"'), capsys, **options)
+    assert errors == ""
+    assert out == f"true\n{expected}\n"
+
+    # Comparing with a string that only differs at the end
+    out, _ = run(BUILD % (count, f'"{expected[:-1]}!"'), capsys, **options)
+    assert out.startswith("false\n")
+
+
+def test_rope_operand_errors(capsys):
+    source = 'var s = "%s"; s = s + "!"; print s + 1;' % ("x" * ROPE_MIN)
+    assert run(source, capsys) == (
+        "",
+        "[line 1] RuntimeError: Operands must be two numbers or two strings\n",
+    )
+    source = 'var s = "%s"; s = s + "!"; print s < "z";' % ("x" * ROPE_MIN)
+    assert run(source, capsys) == (
+        "",
+        "[line 1] RuntimeError: Operands must be numbers.\n",
+    )
+
+
+class CopyingInterpreter(Interpreter):
+    """Baseline: every + copies both operands into a new str."""
+
+    def evaluate(self, expr):
+        if expr.__class__ is Binary and expr.operator.tType is TokenType.PLUS:
+            left, right = self.evaluate(expr.left), self.evaluate(expr.right)
+            if left.__class__ is str:
+                return left + right
+            return self.add(expr.operator, left, right)
+        return super().evaluate(expr)
+
+
+class RopeInterpreter(Interpreter):
+    """Interpreter's own concatenation, behind the same extra dispatch."""
+
+    def evaluate(self, expr):
+        if expr.__class__ is Binary and expr.operator.tType is TokenType.PLUS:
+            left, right = self.evaluate(expr.left), self.evaluate(expr.right)
+            if left.__class__ is not float:
+                return concat(left, right)
+            return self.add(expr.operator, left, right)
+        return super().evaluate(expr)
+
+
+def test_concatenation_speed(capsys):
+    """Reports n-way concatenation in a Lox loop, copying vs ropes."""
+    lines = []
+    for count in (1_000, 4_000, 16_000):
+        statements = parse(REPORT % (count, LINE))
+        results = {}
+        for engine in (CopyingInterpreter, RopeInterpreter):
+            out = io.StringIO()
+            results[engine] = min(
+                timeit.repeat(
+                    lambda: engine(output_writer=out.write).interpret(statements),
+                    number=1,
+                    repeat=3,
+                )
+            )
+            assert out.getvalue() == (f"{LINE};" * count + "\n") * 3
+
+        copying, ropes = results.values()
+        lines.append(
+            f"  {count} lines: copying {copying * 1000:.1f} ms, "
+            f"ropes {ropes * 1000:.1f} ms ({copying / ropes:.2f}x)"
+        )
+
+    with capsys.disabled():
+        print("\nstring building:")
+        print("\n".join(lines))
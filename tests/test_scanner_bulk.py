@@ -0,0 +1,67 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from pythox.scanner import Scanner
+
+LOX_ROOT = Path(__file__).parent / "loxscripts"
+CORPUS = sorted(LOX_ROOT.rglob("*.lox"))
+
+
+def scan(source: str, bulk: bool) -> list[tuple]:
+    tokens = Scanner(source, bulk=bulk).scanTokens()
+    return [(t.tType, t.lexeme, t.literal, t.line) for t in tokens]
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "a /* x\n y */ b",
+        "/*\nfoo",
+        "x == y @ z",
+        '"abc\ndef" ^',
+        "a <= b\n  $ /* * / c",
+        '"unterminated\n',
+        "12.5.3 .7 a_b9 !",
+        "// comment\n#",
+    ],
+)
+def test_bulk_matches_scanner_on_edge_cases(source: str, capsys):
+    """Same tokens and the same stderr output for error-ish inputs."""
+    expected = scan(source, bulk=False)
+    expected_err = capsys.readouterr().err
+
+    assert scan(source, bulk=True) == expected
+    assert capsys.readouterr().err == expected_err
+
+
+def test_bulk_matches_scanner_on_corpus(capsys):
+    """Every script under loxscripts scans identically in both modes."""
+    for path in CORPUS:
+        source = path.read_text()
+        expected = scan(source, bulk=False)
+        expected_err = capsys.readouterr().err
+
+        assert scan(source, bulk=True) == expected, path.name
+        assert capsys.readouterr().err == expected_err, path.name
+
+
+def test_bulk_throughput(capsys):
+    """Reports scanner MB/s on the loxscripts corpus; bulk must not be slower."""
+    source = "\n".join(path.read_text() for path in CORPUS) * 3
+    size = len(source) / 1_000_000
+
+    rates = {}
+    for bulk in (False, True):
+        start = time.perf_counter()
+        Scanner(source, bulk=bulk).scanTokens()
+        rates[bulk] = size / (time.perf_counter() - start)
+    capsys.readouterr()
+
+    with capsys.disabled():
+        print(
+            f"\nscanner throughput: {rates[False]:.2f} MB/s char-by-char, "
+            f"{rates[True]:.2f} MB/s bulk"
+        )
+    assert rates[True] > rates[False]
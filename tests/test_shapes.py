@@ -0,0 +1,290 @@
+import io
+import timeit
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from pythox.expr import Call, Get, Set
+from pythox.interpreter import (
+    BoundMethod,
+    Interpreter,
+    LoxClass,
+    LoxInstance,
+    PropertySite,
+)
+from tests.test_helper import (
+    LOX_ROOT,
+    parse,
+    run_script_test,
+    run_source,
+    script_files,
+    script_id,
+)
+
+CLASS_FILES = script_files("class", "field", "method", "this", "constructor")
+BENCHMARKS = LOX_ROOT / "benchmark"
+
+
+@pytest.mark.parametrize("lox_file", CLASS_FILES, ids=script_id)
+def test_class_scripts(lox_file: Path, capsys):
+    run_script_test(lox_file, capsys)
+
+
+def test_instances_share_shapes(capsys):
+    source = """
+    class Point {
+      init(x, y) { this.x = x; this.y = y; }
+    }
+    var a = Point(1, 2);
+    var b = Point(3, 4);
+    var c = Point(5, 6);
+    c.z = 7;
+    var d = Point(0, 0);
+    d.y = 8;
+    """
+    interpreter = Interpreter()
+    run_source(source, capsys, interpreter)
+    a, b, c, d = (interpreter.globals[name].value for name in "abcd")
+
+    assert a.shape is b.shape is d.shape
+    assert a.shape.fields == {"x": 0, "y": 1}
+    assert a.values == [1.0, 2.0] and d.values == [0.0, 8.0]
+    # Adding a field moves c onto a child shape, the others stay put
+    assert c.shape is a.shape.transitions["z"]
+    assert c.values == [5.0, 6.0, 7.0]
+    # One chain of transitions from the class's root shape
+    root = a.klass.shape
+    assert root.transitions["x"].transitions["y"] is a.shape
+
+
+def test_sites_cache_the_shape_they_see(capsys):
+    source = """
+    class Box { init(v) { this.v = v; } get() { return this.v; } }
+    var box = Box(1);
+    var total = 0;
+    var i = 0;
+    while (i < 10) { total = total + box.get(); box.v = box.v + 1; i = i + 1; }
+    print total;
+    """
+    interpreter = Interpreter()
+    assert run_source(source, capsys, interpreter) == ("55\n", "")
+    box = interpreter.globals["box"].value
+
+    sites = {
+        (type(site.node).__name__, site.node.name.lexeme, site.node.name.line): site
+        for site in interpreter.sites.values()
+        if isinstance(site, PropertySite)
+    }
+    # The initializer's Set caches the transition it made
+    # Lines count from "class Box", the scanner strips leading whitespace
+    store = sites["Set", "v", 1]
+    assert store.shape is box.klass.shape and store.next is box.shape
+    # Reads and plain stores cache the instance's current shape
+    assert sites["Get", "v", 1].shape is box.shape
+    assert sites["Set", "v", 5].shape is box.shape
+    assert sites["Set", "v", 5].next is None
+    # A method is cached the same way, keyed on the shape
+    assert sites["Get", "get", 5].shape is box.shape
+    assert sites["Get", "get", 5].method is box.klass.methods["get"]
+
+
+def test_polymorphic_sites_stay_correct(capsys):
+    source = """
+    class A { init() { this.a = "a"; this.v = "A"; } }
+    class B { init() { this.v = "B"; } }
+    fun read(o) { return o.v; }
+    fun write(o, v) { o.v = v; }
+    var a = A();
+    var b = B();
+    var i = 0;
+    while (i < 3) {
+      print read(a) + read(b);
+      write(a, "x"); write(b, "y");
+      i = i + 1;
+    }
+    print read(a) + read(b);
+    print b.a;
+    """
+    assert run_source(source, capsys) == (
+        "AB\nxy\nxy\nxy\n",
+        "[line 14] RuntimeError: Undefined property 'a'.\n",
+    )
+
+
+def test_property_errors(capsys):
+    assert run_source("var x = 1; print x.y;", capsys)[1] == (
+        "[line 1] RuntimeError: Only instances have properties.\n"
+    )
+    assert run_source("var x = 1; x.y = 2;", capsys)[1] == (
+        "[line 1] RuntimeError: Only instances have fields.\n"
+    )
+    assert run_source("class C {} print C().nope;", capsys)[1] == (
+        "[line 1] RuntimeError: Undefined property 'nope'.\n"
+    )
+    assert run_source("class C {} C(1);", capsys)[1] == (
+        "[line 1] RuntimeError: Expected 0 arguments but got 1.\n"
+    )
+
+
+def bound_call(interpreter: Interpreter, expr: Call):
+    # obj.method(args) through a BoundMethod for both layouts, so only the
+    # field storage differs
+    return interpreter.callSlow(interpreter.evaluate(expr.callee), expr)
+
+
+class DictInstance:
+    __slots__ = ("klass", "fields")
+
+    def __init__(self, klass: LoxClass):
+        self.klass = klass
+        self.fields: dict[str, object] = {}
+
+
+class DictFieldsInterpreter(Interpreter):
+    """Baseline: a dict of fields per instance, one name lookup per Get/Set."""
+
+    def resolveProperty(self, expr):
+        pass
+
+    def evaluate(self, expr):
+        kind = expr.__class__
+        if kind is Call and expr.callee.__class__ is Get:
+            return bound_call(self, expr)
+        if kind is Get:
+            instance = self.evaluate(expr.object)
+            name = expr.name.lexeme
+            if name in instance.fields:
+                return instance.fields[name]
+            return BoundMethod(instance, instance.klass.methods[name])
+        if kind is Set:
+            instance = self.evaluate(expr.object)
+            value = self.evaluate(expr.value)
+            instance.fields[expr.name.lexeme] = value
+            return value
+        return super().evaluate(expr)
+
+    def callSlow(self, callee, expr):
+        if callee.__class__ is not LoxClass:
+            return super().callSlow(callee, expr)
+        arguments = [self.evaluate(argument) for argument in expr.arguments]
+        instance = DictInstance(callee)
+        initializer = callee.methods.get("init")
+        if initializer is not None:
+            self.callMethod(instance, initializer, arguments, expr.paren)
+        return instance
+
+
+class ShapeInterpreter(Interpreter):
+    """
+    Interpreter's own Get/Set hit paths, lifted to where the baseline
+    handles them so both skip the same part of evaluate()'s match.
+    """
+
+    def evaluate(self, expr):
+        kind = expr.__class__
+        if kind is Call and expr.callee.__class__ is Get:
+            return bound_call(self, expr)
+        if kind is Get:
+            instance = self.evaluate(expr.object)
+            site = self.sites.get(id(expr))
+            if (
+                site is not None
+                and instance.__class__ is LoxInstance
+                and instance.shape is site.shape
+            ):
+                if site.method is None:
+                    return instance.values[site.slot]
+                return BoundMethod(instance, site.method)
+            return self.getProperty(expr, instance)
+        if kind is Set:
+            instance = self.evaluate(expr.object)
+            value = self.evaluate(expr.value)
+            site = self.sites.get(id(expr))
+            if site is not None and instance.shape is site.shape:
+                if site.next is None:
+                    instance.values[site.slot] = value
+                else:
+                    instance.shape = site.next
+                    instance.values.append(value)
+                return value
+            self.setProperty(expr, instance, value)
+            return value
+        return super().evaluate(expr)
+
+
+def without_clock(script: str, iterations: int) -> str:
+    source = (BENCHMARKS / script).read_text()
+    return (
+        source.replace("var start = clock();\n", "")
+        .replace("print clock() - start;", "print i;")
+        .replace("500000", str(iterations))
+    )
+
+
+def class_source(script: str) -> str:
+    # The class declarations only, the driver code needs clock()
+    source = (BENCHMARKS / script).read_text()
+    return source[: source.index("\nvar ")]
+
+
+def per_instance(engine, script: str, make: str, count: int, repeat: int) -> float:
+    interpreter = engine(output_writer=io.StringIO().write)
+    statements = parse(class_source(script) + f"\nvar keep = {make};")
+    # Also warms up shapes, sites and frame pools before measuring
+    interpreter.interpret(statements)
+    call = statements[-1].initializer
+
+    keep = [None] * repeat
+    tracemalloc.start()
+    for i in range(repeat):
+        keep[i] = interpreter.evaluate(call)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / (repeat * count)
+
+
+def test_memory_per_instance(capsys):
+    """Reports bytes per instance for the benchmark scripts' classes."""
+    lines = []
+    for script, make, count, repeat in (
+        ("instantiation.lox", "Foo()", 1, 5000),
+        ("binary_trees.lox", "Tree(0, 8)", 511, 10),
+        ("properties.lox", "Foo()", 1, 1000),
+    ):
+        dicts = per_instance(DictFieldsInterpreter, script, make, count, repeat)
+        shapes = per_instance(ShapeInterpreter, script, make, count, repeat)
+        lines.append(
+            f"  {script}: dict fields {dicts:.0f} B, shapes {shapes:.0f} B "
+            f"({dicts / shapes:.2f}x)"
+        )
+        assert shapes <= dicts * 1.05
+
+    with capsys.disabled():
+        print("\nmemory per instance:")
+        print("\n".join(lines))
+
+
+def test_property_speed(capsys):
+    """Reports dict fields vs shapes with inline caches on properties.lox."""
+    statements = parse(without_clock("properties.lox", 200))
+    assert isinstance(statements[0].methods[0].body[0].expression, Set)
+
+    results = {}
+    for engine in (DictFieldsInterpreter, ShapeInterpreter):
+        out = io.StringIO()
+        results[engine] = min(
+            timeit.repeat(
+                lambda: engine(output_writer=out.write).interpret(statements),
+                number=1,
+                repeat=5,
+            )
+        )
+        assert out.getvalue() == "200\n" * 5
+
+    dicts, shapes = results.values()
+    with capsys.disabled():
+        print(
+            f"\nproperties.lox, 200 iterations: dict fields {dicts * 1000:.1f} ms, "
+            f"shapes + inline caches {shapes * 1000:.1f} ms ({dicts / shapes:.2f}x)"
+        )
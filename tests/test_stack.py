@@ -0,0 +1,131 @@
+import io
+
+import pytest
+
+from pythox.interpreter import Interpreter
+from pythox.optimizer import Optimizer
+from tests.test_helper import LOX_ROOT, parse
+
+# Deeper than any recursion limit Python would let us set
+DEPTH = 100_000
+
+
+def run(statements, explicitStack: bool = True, **options) -> str:
+    out = io.StringIO()
+    Interpreter(
+        output_writer=out.write, explicitStack=explicitStack, **options
+    ).interpret(statements)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        ("print " + "(" * DEPTH + "1" + ")" * DEPTH + ";", "1\n"),
+        ("print " + "-" * DEPTH + "2;", "2\n"),
+        ("print " + "!" * (DEPTH + 1) + "nil;", "true\n"),
+        ("print " + "(1 + " * DEPTH + "1" + ")" * DEPTH + ";", f"{DEPTH + 1}\n"),
+        ("var a; var b; print " + "a = b = " * (DEPTH // 2) + "3;", "3\n"),
+    ],
+    ids=["groupings", "negations", "nots", "sums", "assignments"],
+)
+def test_deep_nesting(source, expected, capsys):
+    statements = parse(source, explicitStack=True)
+    assert statements is not None
+    assert run(statements) == expected
+    assert capsys.readouterr().out == ""
+
+
+def test_deep_nesting_with_calls_and_properties(capsys):
+    source = (
+        "class Box { init(v) { this.v = v; } get() { return this.v; } }"
+        "fun id(x) { return x; }"
+        "var box = Box(0);"
+        "print " + "id(Box(" * 10_000 + "box" + ")).get()" * 10_000 + ".v;"
+        "box.v = " + "-(box.v = " * 10_000 + "4" + ")" * 10_000 + ";"
+        "print box.get();"
+    )
+    assert run(parse(source, explicitStack=True)) == "0\n4\n"
+    assert capsys.readouterr().out == ""
+
+
+def test_optimizer_leaves_deep_statements_alone():
+    source = "print " + "(" * DEPTH + "1 + 2" + ")" * DEPTH + "; print (3 + 4);"
+    optimizer = Optimizer()
+    statements = list(optimizer.optimize(parse(source, explicitStack=True)))
+    # The second statement still folds, only the nodes it drops count
+    shallow = Optimizer()
+    list(shallow.optimize(parse("print (3 + 4);", explicitStack=True)))
+    assert optimizer.removed == shallow.removed > 0
+    assert run(statements) == "3\n7\n"
+
+
+@pytest.mark.parametrize(
+    "script",
+    sorted(p for p in LOX_ROOT.rglob("*.lox") if p.parent.name != "benchmark"),
+    ids=lambda p: f"{p.parent.name}/{p.name}",
+)
+def test_explicit_parser_matches_recursive(script, capsys):
+    source = script.read_text()
+    recursive = parse(source, explicitStack=False)
+    recursiveErrors = capsys.readouterr().out
+    assert parse(source, explicitStack=True) == recursive
+    assert capsys.readouterr().out == recursiveErrors
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "print a + b * -c - (d) / e;",
+        "a.b.c = d.e(f, g)(h).i = !j;",
+        "print 1 < 2 == 3 >= 4 != 5 > -6;",
+        "print ((a));",
+    ],
+)
+def test_explicit_parser_expressions(source, capsys):
+    assert parse(source, explicitStack=True) == parse(source, explicitStack=False)
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.parametrize(
+    "source",
+    ["print 1 +;", "print (1;", "print f(1, 2;", "a + b = c;", "print );"],
+)
+def test_explicit_parser_errors(source, capsys):
+    assert parse(source, explicitStack=False) is None
+    recursiveErrors = capsys.readouterr().out
+    assert parse(source, explicitStack=True) is None
+    assert capsys.readouterr().out == recursiveErrors
+
+
+def test_recursive_parser_reports_stack_overflow(capsys):
+    source = "print " + "(" * DEPTH + "1" + ")" * DEPTH + ";"
+    assert parse(source, explicitStack=False) is None
+    assert "Stack overflow." in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("explicitStack", [False, True], ids=["recursive", "explicit"])
+def test_lox_stack_overflow(explicitStack, capsys):
+    source = (LOX_ROOT / "limit" / "stack_overflow.lox").read_text()
+    statements = parse(source, explicitStack=True)
+    out = io.StringIO()
+    Interpreter(output_writer=out.write, explicitStack=explicitStack).interpret(
+        statements
+    )
+    assert capsys.readouterr().out == "[line 18] RuntimeError: Stack overflow.\n"
+
+
+@pytest.mark.parametrize("explicitStack", [False, True], ids=["recursive", "explicit"])
+def test_max_depth(explicitStack, capsys):
+    source = """
+    fun count(n) { if (n == 0) return 0; return 1 + count(n - 1); }
+    print count(%d);
+    """
+    statements = parse(source % 50, explicitStack=True)
+    assert run(statements, explicitStack, maxDepth=51) == "50\n"
+    assert run(statements, explicitStack, maxDepth=50) == ""
+    assert capsys.readouterr().out == "[line 1] RuntimeError: Stack overflow.\n"
+
+    # Well past the default
+    statements = parse(source % 5000, explicitStack=True)
+    assert run(statements, explicitStack, maxDepth=5001) == "5000\n"
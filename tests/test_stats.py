@@ -0,0 +1,130 @@
+import json
+import sys
+
+import pytest
+
+from pythox.pythox import Pythox
+from pythox.scanner import Scanner
+from pythox.stats import _TOOL_IDS
+
+SOURCE = """var i = 0;
+while (i < 3) i = i + 1;
+fun twice(x) { return x * 2; }
+print twice(i);
+"""
+
+
+@pytest.mark.parametrize("backend", ["tree", "closures", "quicken"])
+def test_measure_reports_every_phase(backend, capsys):
+    stats = Pythox(backend=backend).measure(SOURCE)
+    assert capsys.readouterr().out == "6\n"
+
+    assert [phase.name for phase in stats.phases] == [
+        "scan",
+        "parse",
+        "optimize",
+        "interpret",
+    ]
+    for phase in stats.phases:
+        assert phase.wall >= 0 and phase.cpu >= 0 and phase.peakMemory >= 0
+    assert stats.tokens == len(Scanner(SOURCE).scanTokens())
+    assert stats.nodes == {
+        "Var": 1,
+        "While": 1,
+        "Function": 1,
+        "Print": 1,
+        "Expression": 1,
+        "Return": 1,
+        "Assign": 1,
+        "Binary": 3,
+        "Call": 1,
+        "Literal": 4,
+        "Variable": 5,
+    }
+    # 4 top-level statements, the loop body 3 times and one return
+    assert stats.statements == 8
+
+
+def test_statements_of_other_backends_are_not_counted(capsys):
+    stats = Pythox(backend="vm", optimize=False).measure("print 1 + 2;")
+    assert capsys.readouterr().out == "3\n"
+    assert [phase.name for phase in stats.phases] == ["scan", "parse", "interpret"]
+    assert stats.statements is None
+
+
+@pytest.mark.parametrize("held", [1, len(_TOOL_IDS)], ids=["one", "all"])
+def test_tool_ids_held_by_another_tool(held, capsys):
+    claimed = []
+    try:
+        for tool in _TOOL_IDS[:held]:
+            if sys.monitoring.get_tool(tool) is None:
+                sys.monitoring.use_tool_id(tool, "someone else")
+                claimed.append(tool)
+        stats = Pythox().measure("print 1;", traceMemory=False)
+        assert capsys.readouterr().out == "1\n"
+        # Counted under the next free ID, or not at all
+        assert stats.statements == (1 if held < len(_TOOL_IDS) else None)
+        for tool in claimed:
+            assert sys.monitoring.get_tool(tool) == "someone else"
+    finally:
+        for tool in claimed:
+            sys.monitoring.free_tool_id(tool)
+
+
+def test_parse_errors_stop_after_parsing(capsys):
+    pythox = Pythox()
+    stats = pythox.measure("print 1 +;", traceMemory=False)
+    assert pythox.hadError
+    assert [phase.name for phase in stats.phases] == ["scan", "parse"]
+    assert stats.phases[0].peakMemory is None
+    assert "Expect expression" in capsys.readouterr().out
+
+
+def test_reports(capsys):
+    stats = Pythox().measure(SOURCE)
+    capsys.readouterr()
+    report = json.loads(stats.json())
+    assert report == stats.asDict()
+    assert list(report) == ["phases", "tokens", "nodes", "folded", "statements"]
+    assert report["phases"]["parse"]["peakMemory"] == stats.phases[1].peakMemory
+
+    text = stats.text().splitlines()
+    assert text[0].split() == ["phase", "wall", "ms", "cpu", "ms", "peak", "kB"]
+    assert [line.split()[0] for line in text[1:5]] == [
+        "scan",
+        "parse",
+        "optimize",
+        "interpret",
+    ]
+    assert f"tokens: {stats.tokens}" in text
+    assert "AST nodes: 20" in text and "  Variable: 5" in text
+    assert "AST nodes folded: 0" in text
+    assert "statements executed: 8" in text
+
+
+def test_folded_nodes(capsys):
+    # (1 + 2) * 3 folds to 9: a Grouping, two Binarys and three Literals
+    # become one Literal
+    stats = Pythox().measure("print (1 + 2) * 3;", traceMemory=False)
+    assert capsys.readouterr().out == "9\n"
+    assert stats.folded == stats.asDict()["folded"] == 5
+    assert "AST nodes folded: 5" in stats.text().splitlines()
+
+    stats = Pythox(optimize=False).measure("print 1;", traceMemory=False)
+    assert stats.folded is None
+    assert "AST nodes folded: -" in stats.text().splitlines()
+
+
+def test_stats_option(tmp_path, monkeypatch, capsys):
+    script = tmp_path / "script.lox"
+    script.write_text(SOURCE)
+    monkeypatch.setattr("sys.argv", ["pythox", "--stats=json", str(script)])
+    Pythox().main()
+    captured = capsys.readouterr()
+    assert captured.out == "6\n"
+    assert json.loads(captured.err)["statements"] == 8
+
+    monkeypatch.setattr("sys.argv", ["pythox", "--stats"])
+    with pytest.raises(SystemExit) as exit:
+        Pythox().main()
+    assert exit.value.code == 64
@@ -0,0 +1,69 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from pythox.interpreter import Interpreter
+from pythox.parser import Parser
+from pythox.scanner import Scanner
+
+LOX_ROOT = Path(__file__).parent / "loxscripts"
+SCRIPTS = [
+    LOX_ROOT / "precedence" / "precedence.lox",
+    LOX_ROOT / "expressions" / "evaluate.lox",
+]
+
+
+def run_batch(source: str) -> str:
+    out = io.StringIO()
+    statements = Parser(Scanner(source).scanTokens()).parse()
+    if statements is not None:
+        Interpreter(output_writer=out.write).interpret(statements)
+    return out.getvalue()
+
+
+def run_stream(source: str, bulk: bool = True) -> str:
+    out = io.StringIO()
+    parser = Parser(Scanner(source, bulk=bulk).iterTokens())
+    Interpreter(output_writer=out.write).interpret(parser.parseStream())
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+@pytest.mark.parametrize("path", SCRIPTS, ids=lambda p: p.name)
+def test_stream_matches_batch(path: Path, bulk: bool):
+    source = path.read_text()
+    assert run_stream(source, bulk=bulk) == run_batch(source)
+
+
+def test_parse_error_stops_stream(capsys):
+    """Statements before the bad one run, nothing after it does."""
+    parser = Parser(Scanner("print 1;\nprint 2 +;\nprint 3;").iterTokens())
+    out = io.StringIO()
+    Interpreter(output_writer=out.write).interpret(parser.parseStream())
+
+    assert out.getvalue() == "1\n"
+    assert parser.hadError
+    assert "[line 2] Expect expression." in capsys.readouterr().out
+
+
+def test_first_output_before_scan_finishes():
+    """The first print runs long before the scanner reaches the end."""
+    source = "print 1 + 2;\n" * 10_000
+    scanned = 0
+    seen_at: list[int] = []
+
+    def tokens():
+        nonlocal scanned
+        for token in Scanner(source, bulk=True).iterTokens():
+            scanned += 1
+            yield token
+
+    def writer(text: str):
+        seen_at.append(scanned)
+
+    Interpreter(output_writer=writer).interpret(Parser(tokens()).parseStream())
+
+    assert len(seen_at) == 10_000
+    assert seen_at[0] <= 6
+    assert scanned == 5 * 10_000 + 1
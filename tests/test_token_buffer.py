@@ -0,0 +1,62 @@
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from pythox.astPrinter import print_ast
+from pythox.parser import Parser
+from pythox.scanner import Scanner
+from pythox.ttoken import TokenBuffer
+
+LOX_ROOT = Path(__file__).parent / "loxscripts"
+PARSEABLE = [
+    LOX_ROOT / "parser" / "parse.lox",
+    LOX_ROOT / "precedence" / "precedence.lox",
+    LOX_ROOT / "expressions" / "evaluate.lox",
+]
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_buffer_matches_token_list(bulk: bool):
+    source = (LOX_ROOT / "scanning" / "strings.lox").read_text()
+    source += (LOX_ROOT / "precedence" / "precedence.lox").read_text()
+
+    tokens = Scanner(source, bulk=bulk).scanTokens()
+    buffer = Scanner(source, bulk=bulk, compact=True).scanTokens()
+
+    assert isinstance(buffer, TokenBuffer)
+    assert len(buffer) == len(tokens)
+    assert list(buffer) == tokens
+    assert buffer[-1] == tokens[-1]
+
+
+@pytest.mark.parametrize("path", PARSEABLE, ids=lambda p: p.name)
+def test_parser_consumes_buffer(path: Path):
+    source = path.read_text()
+    expected = Parser(Scanner(source).scanTokens()).parse()
+    statements = Parser(Scanner(source, compact=True).scanTokens()).parse()
+
+    assert [print_ast(s.expression) for s in statements] == [
+        print_ast(s.expression) for s in expected
+    ]
+
+
+def test_buffer_peak_memory(capsys):
+    """Scanning into a TokenBuffer should need a fraction of the token list."""
+    source = (LOX_ROOT / "benchmark" / "zoo.lox").read_text() * 200
+
+    peaks = {}
+    for compact in (False, True):
+        tracemalloc.start()
+        tokens = Scanner(source, bulk=True, compact=compact).scanTokens()
+        peaks[compact] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del tokens
+
+    with capsys.disabled():
+        print(
+            f"\nscan peak memory: {peaks[False] / 1e6:.1f} MB token list, "
+            f"{peaks[True] / 1e6:.1f} MB TokenBuffer"
+        )
+    # Interned lexemes already shrink the token list, the buffer still wins
+    assert peaks[True] * 3 < peaks[False]
@@ -0,0 +1,240 @@
+import io
+import timeit
+from pathlib import Path
+
+import pytest
+
+from pythox import astCache
+from pythox.expr import (
+    Assign,
+    Binary,
+    Call,
+    Grouping,
+    Literal,
+    Logical,
+    Unary,
+    Variable,
+)
+from pythox.interpreter import Interpreter
+from pythox.pythox import Pythox
+from pythox.stmt import Expression, Print
+from pythox.transpiler import INLINE_DEPTH, PythonInterpreter, compile_program
+from pythox.ttoken import Token, TokenType
+from tests.test_helper import EXPRESSION_FILES, LOX_ROOT, parse, run_engine
+
+
+def test_runtime_errors_keep_their_line(capsys):
+    source = 'print 1;\nprint 2 +\n "a";\nprint 3;'
+    assert run_engine(PythonInterpreter, parse(source), capsys) == (
+        "1\n",
+        "[line 2] RuntimeError: Operands must be two numbers or two strings\n",
+    )
+    assert run_engine(PythonInterpreter, parse("print 1 / 0;"), capsys) == (
+        "",
+        "[line 1] RuntimeError: Division by zero.\n",
+    )
+    # Left operand is checked first, like the tree walker
+    assert run_engine(PythonInterpreter, parse('print ("a" < 1) / 0;'), capsys) == (
+        "",
+        "[line 1] RuntimeError: Operands must be numbers.\n",
+    )
+
+
+def test_compile_errors_report_their_line(capsys):
+    # The parser never makes a Logical
+    a = Variable(Token(TokenType.IDENTIFIER, "a", None, 3))
+    operator = Token(TokenType.OR, "or", None, 3)
+    interpreter = PythonInterpreter(output_writer=io.StringIO().write)
+    statements = parse("var a = 1;\nprint a;")
+    interpreter.interpret(statements + [Expression(Logical(a, operator, a))])
+    # Nothing ran, and the CLI exits 65 on hadError
+    assert capsys.readouterr().out == "[line 3] Error: Can't compile Logical.\n"
+    assert interpreter.hadError
+
+
+def test_compile_error_exit_code(tmp_path: Path, capsys):
+    # Past CPython's limit of 20 nested loops
+    script = tmp_path / "loops.lox"
+    script.write_text("print 1;\n" + "while (false)\n" * 25 + "print 2;\n")
+    with pytest.raises(SystemExit) as exit:
+        Pythox(backend="python").runFile(str(script))
+    assert exit.value.code == 65
+    assert capsys.readouterr().out == (
+        "[line 22] Error: Too many statically nested blocks.\n"
+    )
+    assert not Path(astCache.code_path(str(script))).exists()
+
+
+def test_closures_in_loops_keep_their_iteration(capsys):
+    statements = parse(
+        "var fns = nil; var last = nil;"
+        "for (var i = 0; i < 3; i = i + 1) {"
+        "  var j = i;"
+        "  fun get() { return j; }"
+        "  if (i == 0) fns = get; last = get;"
+        "}"
+        "print fns(); print last();"
+        "fun outer() { var n = 0; while (n < 5) { n = n + 1;"
+        "  { var k = n; fun f() { return k; } if (k == 2) return f; } } }"
+        "print outer()();"
+    )
+    expected = run_engine(Interpreter, statements, capsys)
+    assert expected == ("0\n2\n2\n", "")
+    assert run_engine(PythonInterpreter, statements, capsys) == expected
+
+
+def test_classes_match_the_tree_walker(capsys):
+    statements = parse(
+        "class A { init(n) { this.n = n; if (n > 1) return; this.small = true; }"
+        "  get() { return this.n; } }"
+        "class B < A { init() { super.init(2); } get() { return super.get() + 1; } }"
+        "var b = B(); print b.get(); print b.init().n; print b.get; print B;"
+        "fun twice() { return 2; } b.get = twice; print b.get();"
+        "for (var i = 0; i < 2; i = i + 1) {"
+        "  class C < A { get() { return i; } } print C(i).get(); }"
+        "print A(1).small; print b.small;"
+    )
+    expected = run_engine(Interpreter, statements, capsys)
+    assert expected == (
+        "3\n2\n<fn get>\nB\n2\n0\n1\ntrue\n",
+        "[line 1] RuntimeError: Undefined property 'small'.\n",
+    )
+    assert run_engine(PythonInterpreter, statements, capsys) == expected
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "var a = 1; class A < a {}",
+        "class A {} A(1);",
+        "class A { init(x) {} } A();",
+        "class A { m(x) {} } A().m();",
+        "print 1 .x;",
+        "fun f() { print 2; } var a = 1; a.x = f();",
+        "class A {} print A().x;",
+        "class A {} class B < A { m() { return super.m; } } B().m();",
+    ],
+)
+def test_class_errors_match_the_tree_walker(source: str, capsys):
+    statements = parse(source)
+    expected = run_engine(Interpreter, statements, capsys)
+    assert "RuntimeError" in expected[1]
+    assert run_engine(PythonInterpreter, statements, capsys) == expected
+
+
+@pytest.mark.parametrize("depth", [INLINE_DEPTH, INLINE_DEPTH + 1, 300])
+def test_deep_nesting(depth: int, capsys):
+    # Right-nested with a failing operand on the left at every level, so a
+    # wrong evaluation order would report a different line
+    one = Literal(1.0)
+    expr = Literal(2.0)
+    for line in range(depth, 0, -1):
+        minus = Token(TokenType.MINUS, "-", None, line)
+        bang = Token(TokenType.BANG, "!", None, line)
+        expr = Grouping(Binary(one, minus, Unary(bang, Unary(bang, expr))))
+    statements = [Print(expr), Print(Binary(Literal("a"), minus, expr))]
+
+    assert run_engine(PythonInterpreter, statements, capsys) == run_engine(
+        Interpreter, statements, capsys
+    )
+
+
+@pytest.mark.parametrize("depth", [INLINE_DEPTH, INLINE_DEPTH + 1, 300])
+def test_deep_calls(depth: int, capsys):
+    # f(f(...f(a = 1 - (1 - ...)))), lowered too past INLINE_DEPTH
+    name = Token(TokenType.IDENTIFIER, "a", None, 1)
+    minus = Token(TokenType.MINUS, "-", None, 1)
+    paren = Token(TokenType.RIGHT_PAREN, ")", None, 1)
+    expr = Literal(2.0)
+    for _ in range(depth):
+        expr = Grouping(Binary(Literal(1.0), minus, expr))
+    expr = Assign(name, expr)
+    for _ in range(depth):
+        f = Variable(Token(TokenType.IDENTIFIER, "f", None, 1))
+        expr = Call(f, paren, [expr])
+    statements = parse("var a; fun f(x) { return x + 1; }")
+    statements += [Print(expr), Print(Variable(name))]
+
+    assert run_engine(PythonInterpreter, statements, capsys) == run_engine(
+        Interpreter, statements, capsys
+    )
+
+
+def test_code_cache(tmp_path: Path, monkeypatch, capsys):
+    script = tmp_path / "precedence.lox"
+    script.write_text((LOX_ROOT / "precedence" / "precedence.lox").read_text())
+
+    Pythox(backend="python").runFile(str(script))
+    first = capsys.readouterr().out
+    assert Path(astCache.code_path(str(script))).exists()
+
+    # A hit runs the cached code object without parsing at all
+    def fail(*args):
+        raise AssertionError("parsed despite a cached code object")
+
+    monkeypatch.setattr(Pythox, "parse", fail)
+    monkeypatch.setattr(astCache, "load", fail)
+    Pythox(backend="python").runFile(str(script))
+    assert capsys.readouterr().out == first
+
+    # Code from the other optimize setting is a different entry
+    assert astCache.load_code(str(script), script.read_text(), "") is None
+
+
+def test_code_cache_invalidation(tmp_path: Path):
+    script = tmp_path / "a.lox"
+    code = compile_program(parse("print 1;"))
+    assert astCache.store_code(str(script), "print 1;", code)
+
+    assert astCache.load_code(str(script), "print 1;") == code
+    assert astCache.load_code(str(script), "print 2;") is None
+
+    path = Path(astCache.code_path(str(script)))
+    path.write_bytes(path.read_bytes()[:-3])
+    assert astCache.load_code(str(script), "print 1;") is None
+
+
+def test_python_speed(capsys):
+    """Reports tree walking vs running the transpiled code object."""
+    source = "\n".join(p.read_text() for p in EXPRESSION_FILES) * 20
+    statements = parse(source)
+    sink = []
+
+    walker = Interpreter(output_writer=sink.append)
+    backend = PythonInterpreter(output_writer=sink.append)
+    code = compile_program(statements)
+
+    def walk():
+        for stmt in statements:
+            walker.execute(stmt)
+
+    tree = min(timeit.repeat(walk, number=20, repeat=5))
+    hot = min(timeit.repeat(lambda: backend.run(code), number=20, repeat=5))
+    cold = min(timeit.repeat(lambda: compile_program(statements), number=1, repeat=5))
+
+    with capsys.disabled():
+        print(
+            f"\nexpression suite x20, 20 runs: tree {tree * 1000:.1f} ms, "
+            f"python {hot * 1000:.1f} ms ({tree / hot:.1f}x), "
+            f"transpile + compile {cold * 1000:.1f} ms once"
+        )
+
+
+def test_call_speed(capsys):
+    """Reports tree walking vs running the transpiled code on recursive calls."""
+    statements = parse((LOX_ROOT / "benchmark" / "fib.lox").read_text())
+    # fib(15) three times instead of fib(35) once
+    statements = statements[:1] + parse(
+        "var i = 0; while (i < 3) { fib(15); i = i + 1; }"
+    )
+
+    def run(engine):
+        engine(output_writer=io.StringIO().write).interpret(statements)
+
+    tree = min(timeit.repeat(lambda: run(Interpreter), number=1, repeat=3))
+    python = min(timeit.repeat(lambda: run(PythonInterpreter), number=1, repeat=3))
+    with capsys.disabled():
+        print(
+            f"\nfib(15) x3: tree {tree * 1000:.1f} ms, "
+            f"python {python * 1000:.1f} ms ({tree / python:.1f}x)"
+        )
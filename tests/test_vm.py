@@ -0,0 +1,167 @@
+import io
+import re
+import sys
+import timeit
+from pathlib import Path
+
+import pytest
+
+from pythox.bytecode import (
+    MAX_CONSTANTS,
+    MAX_LONG_CONSTANTS,
+    CompileError,
+    Compiler,
+    OpCode,
+)
+from pythox.expr import Binary, Literal, Logical, Variable
+from pythox.interpreter import Interpreter
+from pythox.stmt import Expression, Print
+from pythox.ttoken import Token, TokenType
+from pythox.vm import STACK_MAX, VM
+from tests.test_helper import (
+    EXPRESSION_FILES,
+    LIMIT_FILES,
+    parse,
+    parse_expectations,
+    script_id,
+)
+
+# The whole message, where the script expects it on the comment's line
+COMPILE_ERR_RE = re.compile(r"// (Error at '.+': .+)")
+
+
+def test_vm_passes_expression_suite():
+    for script in EXPRESSION_FILES:
+        expected, _, _ = parse_expectations(script.read_text())
+        out = io.StringIO()
+        VM(output_writer=out.write).interpret(parse(script.read_text()))
+        assert out.getvalue().splitlines() == expected
+
+
+def test_chunk_layout():
+    chunk = Compiler().compile(parse("print -(1 + 2) * 3;"))
+
+    assert chunk.disassemble().split("\n") == [
+        "0000    1 CONSTANT 0 '1.0'",
+        "0002    1 CONSTANT 1 '2.0'",
+        "0004    1 ADD",
+        "0005    1 NEGATE",
+        "0006    1 CONSTANT 2 '3.0'",
+        "0008    1 MULTIPLY",
+        "0009    1 PRINT",
+    ]
+    assert chunk.code[0] == OpCode.CONSTANT
+    assert len(chunk.lines) == len(chunk.code)
+    assert chunk.maxStack == 2
+
+
+def test_too_many_constants(capsys):
+    source = "\n".join(f"{i};" for i in range(MAX_CONSTANTS)) + "\n1;"
+    with pytest.raises(CompileError, match="Too many constants in one chunk."):
+        Compiler().compile(parse(source))
+
+    # The script chunk switches to CONSTANT_LONG instead
+    out = io.StringIO()
+    VM(output_writer=out.write).interpret(parse(source + "\nprint 300;"))
+    assert out.getvalue() == "300\n"
+
+    # But a function's chunk is held to clox's limit
+    vm = VM(output_writer=out.write)
+    vm.interpret(parse(f"fun f() {{\n{source}\n}}\nprint 300;"))
+    assert capsys.readouterr().out == (
+        f"[line {MAX_CONSTANTS + 2}] Error at '1': Too many constants in one chunk.\n"
+    )
+    assert vm.hadError
+
+
+@pytest.mark.parametrize("script", LIMIT_FILES, ids=script_id)
+def test_limits_are_compile_errors(script: Path, capsys):
+    source = script.read_text()
+    expected = [
+        f"[line {number}] {m.group(1)}"
+        for number, line in enumerate(source.splitlines(), 1)
+        if (m := COMPILE_ERR_RE.search(line))
+    ]
+    out = io.StringIO()
+    vm = VM(output_writer=out.write)
+    vm.interpret(parse(source))
+
+    # Nothing ran, and the CLI exits 65 on hadError
+    assert capsys.readouterr().out.splitlines() == expected
+    assert out.getvalue() == ""
+    assert vm.hadError
+
+
+def test_compile_error_reports_its_line(capsys):
+    # The parser never makes a Logical, the VM has no op for it
+    a = Variable(Token(TokenType.IDENTIFIER, "a", None, 7))
+    operator = Token(TokenType.OR, "or", None, 7)
+    vm = VM(output_writer=io.StringIO().write)
+    vm.interpret(parse("var a = 1;\nprint a;") + [Expression(Logical(a, operator, a))])
+
+    # Nothing ran, and the CLI exits 65 on hadError
+    assert capsys.readouterr().out == "[line 7] Error: Can't compile Logical.\n"
+    assert vm.hadError
+
+
+def test_stack_overflow(capsys):
+    # Right-nested so every operand stays on the stack. Built by hand, the
+    # recursive parser can't go this deep.
+    one = Literal(1.0)
+    plus = Token(TokenType.PLUS, "+", None, 3)
+    expr = one
+    for _ in range(STACK_MAX):
+        expr = Binary(one, plus, expr)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(STACK_MAX * 4)
+    try:
+        VM(output_writer=io.StringIO().write).interpret([Print(expr)])
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert "RuntimeError: Stack overflow." in capsys.readouterr().out
+
+
+def test_vm_speed(capsys):
+    """Reports tree walking vs the bytecode VM on the expression suite."""
+    source = "\n".join(p.read_text() for p in EXPRESSION_FILES) * 20
+    statements = parse(source)
+    sink = []
+
+    walker = Interpreter(output_writer=sink.append)
+    vm = VM(output_writer=sink.append)
+    chunk = Compiler(maxConstants=MAX_LONG_CONSTANTS).compile(statements)
+
+    def walk():
+        for stmt in statements:
+            walker.execute(stmt)
+
+    tree = min(timeit.repeat(walk, number=20, repeat=5))
+    hot = min(timeit.repeat(lambda: vm.run(chunk), number=20, repeat=5))
+    cold = min(timeit.repeat(lambda: vm.interpret(statements), number=20, repeat=5))
+
+    with capsys.disabled():
+        print(
+            f"\nexpression suite x20, 20 runs: tree {tree * 1000:.1f} ms, "
+            f"vm {hot * 1000:.1f} ms precompiled ({tree / hot:.1f}x), "
+            f"{cold * 1000:.1f} ms compiling every run"
+        )
+
+
+def test_vm_call_speed(capsys):
+    """Reports tree walking vs the bytecode VM on recursive calls."""
+    statements = parse(
+        "fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }"
+        "var i = 0; while (i < 3) { fib(15); i = i + 1; }"
+    )
+
+    def run(engine):
+        engine(output_writer=io.StringIO().write).interpret(statements)
+
+    tree = min(timeit.repeat(lambda: run(Interpreter), number=1, repeat=3))
+    vm = min(timeit.repeat(lambda: run(VM), number=1, repeat=3))
+    with capsys.disabled():
+        print(
+            f"\nfib(15) x3: tree {tree * 1000:.1f} ms, "
+            f"vm {vm * 1000:.1f} ms ({tree / vm:.1f}x)"
+        )
@@ -13,16 +13,31 @@ def main():
     expr: dict = {
         "Assign": "Token name, Expr value",
         "Binary": "Expr left, Token operator, Expr right",
+        "Call": "Expr callee, Token paren, list[Expr] arguments",
+        "Get": "Expr object, Token name",
         "Grouping": "Expr expression",
         "Literal": "object value",
         "Logical": "Expr left, Token operator, Expr right",
+        "Set": "Expr object, Token name, Expr value",
+        "Super": "Token keyword, Token method",
+        "This": "Token keyword",
         "Unary": "Token operator, Expr right",
         "Ternary": "Expr left, Token qmark, Expr middle, Token colon, Expr right",
         "Variable": "Token name",
     }
     defineAst(outputDir, "expr", expr)
 
-    stmt: dict = {"Expression": "Expr expression", "Print": "Expr expression"}
+    stmt: dict = {
+        "Block": "list[Stmt] statements",
+        "Class": "Token name, Expr superclass, list[Stmt] methods",
+        "Expression": "Expr expression",
+        "Function": "Token name, list[Token] params, list[Stmt] body",
+        "If": "Expr condition, Stmt thenBranch, Stmt elseBranch",
+        "Print": "Expr expression",
+        "Return": "Token keyword, Expr value",
+        "Var": "Token name, Expr initializer",
+        "While": "Expr condition, Stmt body",
+    }
     defineAst(outputDir, "stmt", stmt)
 
 
@@ -30,6 +45,8 @@ def defineAst(outputDir: Path, baseName: str, types: dict[str, str]):
     path = outputDir / f"{baseName}.py"
     with open(path, "w") as f:
         f.write("from dataclasses import dataclass\n\n")
+        if baseName != "expr":
+            f.write("from .expr import Expr\n")
         f.write("from .ttoken import Token\n\n")
 
         f.write(f"class {baseName.capitalize()}:\n")
@@ -63,3 +63,35 @@ print("class TokenType(StrEnum):")
 for token in tokens:
     print(*map(lambda x: f"    {x}='{x}'", token), sep="\n", end="\n")
     print()
+
+# Binding power of the binary operators, higher binds tighter
+precedence = [
+    ["BANG_EQUAL", "EQUAL_EQUAL"],
+    ["GREATER", "GREATER_EQUAL", "LESS", "LESS_EQUAL"],
+    ["MINUS", "PLUS"],
+    ["SLASH", "STAR"],
+]
+unary = ["BANG", "MINUS"]
+# Kinds synchronize() stops in front of
+statementStart = ["CLASS", "FUN", "VAR", "FOR", "IF", "WHILE", "PRINT", "RETURN"]
+
+# Generate the lookup tables
+allTokens = [x for token in tokens for x in token]
+print("TOKEN_TYPES: tuple[TokenType, ...] = (")
+print(*map(lambda x: f"    TokenType.{x},", allTokens), sep="\n")
+print(")")
+print("TOKEN_CODES: dict[TokenType, int] = {")
+print(*map(lambda x: f"    TokenType.{x[1]}: {x[0]},", enumerate(allTokens)), sep="\n")
+print("}\n")
+
+print("BINARY_PRECEDENCE: dict[TokenType, int] = {")
+for level, ops in enumerate(precedence, start=1):
+    print(*map(lambda x: f"    TokenType.{x}: {level},", ops), sep="\n")
+print("}\n")
+
+for name, kinds in (("UNARY_OPERATORS", unary), ("STATEMENT_START", statementStart)):
+    print(f"{name}: frozenset[TokenType] = frozenset(")
+    print("    (")
+    print(*map(lambda x: f"        TokenType.{x},", kinds), sep="\n")
+    print("    )")
+    print(")\n")